@@ -0,0 +1,194 @@
+"""
+Automatic choice of a frequent itemset miner and of its representation of the
+data, from a profile of a sample of the encoded transactions.
+"""
+from collections import Counter
+import random
+import pandas as pd
+
+from pml.base.loading import EncodedTransactions, load_transactions
+from pml.pattern_mining.apriori import Apriori
+from pml.pattern_mining.apriori_TID import AprioriTID
+from pml.pattern_mining.eclat import Eclat
+from pml.pattern_mining.pattern_growth import PatternGrowth
+from pml.pattern_mining.fp_growth.fp_growth import FPGrowth
+
+
+ENGINES = {
+    'Apriori': Apriori,
+    'AprioriTID': AprioriTID,
+    'Eclat': Eclat,
+    'PatternGrowth': PatternGrowth,
+    'FPGrowth': FPGrowth,
+}
+
+# Representations of the data, by engine: the first one is the default
+REPRESENTATIONS = {
+    'Apriori': ('horizontal',),
+    'AprioriTID': ('candidate lists',),
+    'Eclat': ('tidset', 'bitset', 'diffset'),
+    'PatternGrowth': ('projected database',),
+    'FPGrowth': ('FP-tree',),
+}
+
+
+def mine_itemsets(data, min_support, item_col='items', engine=None, representation=None,
+                  sample_size=1000, max_bitset_mb=256, seed=0, chunksize=100000, hooks=None, **kwargs):
+    """
+    Mine the frequent itemsets of data with the engine and representation
+    chosen from a profile of the encoded transactions (see choose_engine).
+
+    Parameters:
+    data: Transactions, in any format accepted by the miners (see FPMiner).
+    min_support (float): Minimum support, also used to drop items while loading.
+    item_col (str): Name of the column of items.
+    engine (str): Engine to use instead of the chosen one, see ENGINES.
+    representation (str): Representation to use, see REPRESENTATIONS.
+    sample_size (int): Number of transactions profiled.
+    max_bitset_mb (float): Memory allowed for the bitsets of the frequent items.
+    seed (int): Seed of the sample.
+    chunksize (int): Number of rows read at a time.
+    hooks (list): Hooks of the stats of the miner (see MiningStats).
+    kwargs: Control arguments of the run, e.g., max_seconds or sink (see interruptible).
+
+    The data is encoded once, and the miner is built on the encoded
+    transactions. The profile, the choice and its reasons are recorded as
+    notes of the stats of the miner, along with the counters of the run.
+    Returns the miner, whose results are given by get_results().
+    """
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f'Unknown engine: {engine}, expected one of {list(ENGINES)}.')
+
+    transactions, codebook = load_transactions(data, item_col, min_support, chunksize)
+    profile = profile_transactions(transactions, len(codebook), sample_size, seed)
+    chosen, chosen_representation, reasons = choose_engine(profile, max_bitset_mb)
+    if engine is not None and engine != chosen:
+        chosen, chosen_representation, reasons = engine, None, ['engine given']
+    if representation is not None:
+        chosen_representation, reasons = representation, reasons + ['representation given']
+    if chosen_representation is None:
+        chosen_representation = REPRESENTATIONS[chosen][0]
+    if chosen_representation not in REPRESENTATIONS[chosen]:
+        raise ValueError(
+            f'Invalid representation for {chosen}: {chosen_representation}, '
+            f'expected one of {list(REPRESENTATIONS[chosen])}.'
+        )
+
+    miner = ENGINES[chosen](EncodedTransactions(transactions, codebook, min_support), item_col)
+    stats = miner.enable_stats(hooks)
+    stats.note('profile', profile)
+    stats.note('engine', chosen)
+    stats.note('representation', chosen_representation)
+    stats.note('reasons', reasons)
+
+    if chosen == 'Eclat':
+        kwargs['representation'] = chosen_representation
+    miner.run(min_support, **kwargs)
+    return miner
+
+
+def profile_transactions(transactions, n_items, sample_size=1000, seed=0):
+    """
+    Profile encoded transactions from a uniform sample of them.
+
+    Returns a dictionary with:
+    - n_transactions, n_items: size of the database, with the frequent items only,
+    - sample_size: number of transactions profiled,
+    - mean_length, max_length: lengths of the transactions,
+    - density: mean_length / n_items, the mean support of the items,
+    - top_items_share: share of the occurrences of the 10% most frequent items,
+    - fp_tree_ratio: nodes of the FP-tree of the sample per occurrence, low
+      when transactions share their most frequent items.
+    """
+    n_transactions = len(transactions)
+    if n_transactions > sample_size:
+        rng = random.Random(seed)
+        sample = [transactions[t] for t in sorted(rng.sample(range(n_transactions), sample_size))]
+    else:
+        sample = list(transactions)
+
+    lengths = [len(transaction) for transaction in sample]
+    n_occurrences = sum(lengths)
+    counts = Counter(item for transaction in sample for item in transaction)
+    top = sorted(counts.values(), reverse=True)[:max(1, len(counts) // 10)]
+
+    # FP-tree of the sample, items by decreasing count, as a set of its paths
+    nodes = set()
+    for transaction in sample:
+        path = ()
+        for item in sorted(transaction, key=lambda x: (-counts[x], x)):
+            path += (item,)
+            nodes.add(path)
+
+    mean_length = n_occurrences / len(sample) if sample else 0
+    return {
+        'n_transactions': n_transactions,
+        'n_items': n_items,
+        'sample_size': len(sample),
+        'mean_length': mean_length,
+        'max_length': max(lengths, default=0),
+        'density': mean_length / n_items if n_items else 0,
+        'top_items_share': sum(top) / n_occurrences if n_occurrences else 0,
+        'fp_tree_ratio': len(nodes) / n_occurrences if n_occurrences else 0,
+    }
+
+
+def choose_engine(profile, max_bitset_mb=256):
+    """
+    Choose an engine and a representation for a profile of the data (see
+    profile_transactions). Returns the engine, the representation and the
+    list of the reasons of the choice.
+
+    The rules follow measurements of the engines of this package (see
+    pml.benchmarks), where the level-wise engines were never the fastest:
+    1. With many frequent items on sparse data, FP-growth, since Eclat joins
+       each frequent item with all the others, and FP-growth only with the
+       items it co-occurs with.
+    2. Otherwise, Eclat with bitsets if those of the frequent items fit in
+       max_bitset_mb, since their intersections run word by word in C.
+    3. Otherwise, FP-growth if transactions share their frequent items, which
+       makes the FP-tree much smaller than the data.
+    4. Otherwise, Eclat with diffsets on dense data, where they are smaller
+       than TID-lists, and with TID-lists on sparse data.
+    """
+    n_items = profile['n_items']
+    density = profile['density']
+    if not n_items:
+        return 'Eclat', 'tidset', ['no frequent item']
+
+    if n_items >= 300 and density < 0.02:
+        return 'FPGrowth', 'FP-tree', [
+            f'{n_items} frequent items with density {density:.4f} (>= 300 items, < 0.02): '
+            'FP-growth only joins the items that co-occur'
+        ]
+
+    bitset_mb = n_items * profile['n_transactions'] / 8 / 2**20
+    if bitset_mb <= max_bitset_mb:
+        return 'Eclat', 'bitset', [
+            f'bitsets of the frequent items take {bitset_mb:.2f} MB (<= {max_bitset_mb} MB)'
+        ]
+    reasons = [f'bitsets of the frequent items would take {bitset_mb:.2f} MB (> {max_bitset_mb} MB)']
+
+    if profile['fp_tree_ratio'] < 0.25:
+        return 'FPGrowth', 'FP-tree', reasons + [
+            f'FP-tree of the sample has {profile["fp_tree_ratio"]:.2f} nodes per occurrence (< 0.25)'
+        ]
+    reasons.append(f'FP-tree of the sample has {profile["fp_tree_ratio"]:.2f} nodes per occurrence (>= 0.25)')
+
+    if density >= 0.5:
+        return 'Eclat', 'diffset', reasons + [f'density {density:.2f} (>= 0.5): diffsets are smaller than TID-lists']
+    return 'Eclat', 'tidset', reasons + [f'density {density:.2f} (< 0.5): TID-lists are smaller than diffsets']
+
+
+if __name__ == "__main__":
+    data = pd.DataFrame({
+        'items': [
+            ['bread', 'milk'], ['bread', 'diaper', 'beer', 'egg'], ['milk', 'diaper', 'beer', 'coke'],
+            ['bread', 'milk', 'diaper', 'beer'], ['bread', 'milk', 'diaper', 'coke']
+        ]
+    })
+    alg = mine_itemsets(data, min_support=0.4)
+
+    print(data)
+    print(alg.stats.notes)
+    print(alg.get_results())
@@ -1,2 +1,7 @@
-
 from .base_classes import FPMiner, FSPMiner
+from .stats import MiningStats
+from .control import CancellationToken, Progress, interruptible
+from .cache import ResultCache, cached
+from .sinks import Sink, CallbackSink, QueueSink, CSVSink, ParquetSink
+from .store import EncodedStore
+from .loading import EncodedTransactions
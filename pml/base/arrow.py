@@ -0,0 +1,112 @@
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def itemsets_to_arrow(patterns, int_to_item, n):
+    """
+    Build an Arrow table from integer-coded itemsets {frozenset: support}.
+
+    Columns are pattern_id, support (as a count), length and items, a list of
+    dictionary-encoded items: the indices are the item codes and the dictionary
+    is the item codebook, shared by all the rows.
+    """
+    _check_pyarrow()
+    codes = [sorted(pattern) for pattern in patterns]
+    offsets = np.cumsum([0] + [len(c) for c in codes], dtype=np.int32)
+    flat = np.fromiter((i for c in codes for i in c), dtype=np.int32, count=int(offsets[-1]))
+
+    items = pa.ListArray.from_arrays(pa.array(offsets), _dictionary(flat, int_to_item))
+    return _table(patterns.values(), n, np.diff(offsets), items)
+
+
+def sequences_to_arrow(patterns, n):
+    """
+    Build an Arrow table from sequences {tuple of tuples: support}.
+
+    Columns are pattern_id, support (as a count), length (number of items) and
+    items, a list of lists of dictionary-encoded items whose dictionary is the
+    item codebook, shared by all the rows.
+    """
+    _check_pyarrow()
+    int_to_item = sorted({item for p in patterns for e in p for item in e}, key=_sort_key)
+    item_to_int = {item: i for i, item in enumerate(int_to_item)}
+
+    elements = [element for p in patterns for element in p]
+    outer = np.cumsum([0] + [len(p) for p in patterns], dtype=np.int32)
+    inner = np.cumsum([0] + [len(e) for e in elements], dtype=np.int32)
+    flat = np.fromiter(
+        (item_to_int[item] for e in elements for item in e), dtype=np.int32, count=int(inner[-1])
+    )
+
+    itemsets = pa.ListArray.from_arrays(pa.array(inner), _dictionary(flat, int_to_item))
+    items = pa.ListArray.from_arrays(pa.array(outer), itemsets)
+    return _table(patterns.values(), n, np.diff(inner[outer]), items)
+
+
+def to_pandas(table, decode=False):
+    """
+    Convert a result table to a DataFrame. Numeric columns are converted without
+    copies (one block per column). Items are item codes unless decode is True,
+    see codebook(table) to decode them.
+    """
+    if not decode:
+        table = table.set_column(
+            table.schema.get_field_index('items'), 'items', _codes(table.column('items').combine_chunks())
+        )
+    return table.to_pandas(split_blocks=True)
+
+
+def codebook(table):
+    """
+    Return the item codebook of a result table, as a list indexed by item code.
+    """
+    items = table.column('items').combine_chunks()
+    while not isinstance(items, pa.DictionaryArray):
+        items = items.values
+    return items.dictionary.to_pylist()
+
+
+def _table(supports, n, lengths, items):
+    """
+    Assemble the result table.
+    """
+    counts = np.rint(np.fromiter(supports, dtype=float, count=len(lengths)) * n).astype(np.int64)
+    return pa.table({
+        'pattern_id': pa.array(np.arange(len(lengths), dtype=np.int64)),
+        'support': pa.array(counts),
+        'length': pa.array(lengths.astype(np.int32)),
+        'items': items,
+    })
+
+
+def _codes(items):
+    """
+    Replace the dictionary-encoded items of a (nested) list array by their codes.
+    """
+    if isinstance(items, pa.DictionaryArray):
+        return items.indices
+    return pa.ListArray.from_arrays(items.offsets, _codes(items.values))
+
+
+def _dictionary(codes, int_to_item):
+    """
+    Dictionary-encoded items, the dictionary being the codebook.
+    """
+    codebook = pa.array([int_to_item[i] for i in range(len(int_to_item))])
+    return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int32()), codebook)
+
+
+def _sort_key(item):
+    """
+    Sort items of possibly different types.
+    """
+    return (type(item).__name__, item)
+
+
+def _check_pyarrow():
+    if pa is None:
+        raise ImportError('Arrow results require pyarrow.')
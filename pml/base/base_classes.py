@@ -1,21 +1,41 @@
 
 from abc import ABC, abstractmethod
+from itertools import chain
+from math import ceil
 import pandas as pd
 
-class FPMiner(ABC):
-    def __init__(self, data: pd.DataFrame, item_col: str):
+from pml.base.mixin import MinerMixin
+from pml.base.arrow import itemsets_to_arrow, sequences_to_arrow
+from pml.base.loading import EncodedTransactions, load_transactions, load_sequences
+from pml.base.store import EncodedStore
+from pml.base.incremental import fup, incspan
+from pml.base.rules import association_rules, sequential_rules
+from pml.base.sampling import sample_transactions, lowered_threshold, support_interval, negative_border, count_itemsets
+
+class FPMiner(MinerMixin, ABC):
+    def __init__(self, data, item_col: str, min_support=None, chunksize=100000):
         """
         Abstract class for a frequent pattern miner. 
         
         Parameters:
-        data (pd.DataFrame): A DataFrame with at least one column for items.
+        data: A DataFrame with at least one column for items, or a source read
+            chunk by chunk (see pml.base.loading.iter_chunks): an iterable of 
+            DataFrame chunks, a CSV or Parquet path, a pyarrow Table or Dataset,
+            an EncodedStore (see from_store), or EncodedTransactions, used
+            as they are. The data is not retained once encoded.
+        item_col (str): Name of the column of items.
+        min_support (float): Items below this support are dropped while loading.
+            Runs must then use a min_support at least as high.
+        chunksize (int): Number of rows read at a time.
         """
-        self.data = data
         self.item_col = item_col
-        self.transactions = self._prepare_transactions()
+        self.min_item_support = min_support
+        self._store = None
+        self.transactions = self._prepare_transactions(data, chunksize)
         self.n_transactions = len(self.transactions)
         self._frequent_patterns = {}
         self.frequent_patterns = {}
+        self._init_state()
 
     def get_results(self):
         """ 
@@ -30,32 +50,246 @@ class FPMiner(ABC):
             for pattern, support in self._frequent_patterns.items()
         }
         return self.frequent_patterns
-        
-    def _prepare_transactions(self):
+
+    def association_rules(self, min_confidence=0.5, metrics=('lift', 'leverage', 'conviction')):
+        """
+        Return the association rules of the frequent itemsets of the last run
+        whose confidence reaches min_confidence, as a DataFrame with columns
+        antecedent, consequent, support, confidence and the given metrics
+        (see pml.base.rules). Requires all the frequent itemsets, not only the
+        closed or maximal ones.
+        """
+        if not self._frequent_patterns:
+            raise RuntimeError('Run algorithm first.')
+        with self._phase('association_rules'):
+            return association_rules(self._frequent_patterns, self.int_to_item, min_confidence, metrics)
+
+    def approximate(self, min_support, sample_size=10000, verify=True, delta=0.05, seed=0):
+        """
+        Mine the frequent itemsets from a uniform sample of the transactions, with
+        a miner of the same class, at the threshold lowered by Toivonen so that
+        each frequent itemset is missed with probability at most delta (see
+        pml.base.sampling).
+
+        With verify, the itemsets of the sample and their negative border are
+        counted in one scan of the transactions, and the supports are exact. If
+        an itemset of the border is frequent, some frequent itemsets may have
+        been missed: the negative border of the frequent itemsets is counted
+        again until none is, so that the results are those of run(min_support).
+        Without verify, the transactions are not scanned: the supports are those
+        in the sample, each within an interval holding the support in the
+        database with probability 1 - delta, and the itemsets are those whose
+        interval reaches min_support.
+
+        Returns a DataFrame with columns itemset, support, lower and upper, the
+        ends of the interval of the support (the support itself when
+        verified), by decreasing support. The itemsets are also the
+        results of the miner. The sample, the threshold and the number of
+        scans are recorded in approximation, and as a note of the stats.
+        """
+        self._check_min_support(min_support)
+        sample_size = min(sample_size, self.n_transactions)
+        if not sample_size:
+            raise ValueError('Cannot sample an empty database.')
+        threshold = lowered_threshold(min_support, sample_size, delta)
+
+        # Mine the sample with a miner of the same class, on the same codes
+        with self._phase('sample'):
+            sample = sample_transactions(self.transactions, sample_size, seed)
+            codebook = [self.int_to_item[i] for i in range(len(self.int_to_item))]
+            sample_miner = type(self)(EncodedTransactions(sample, codebook), self.item_col)
+            sample_miner.stats = self.stats
+            sample_miner.run(threshold)
+            sample_patterns = sample_miner._frequent_patterns
+
+        self.approximation = {
+            'sample_size': sample_size,
+            'threshold': threshold,
+            'delta': delta,
+            'verified': verify,
+            'n_sample_patterns': len(sample_patterns),
+            'scans': 0,
+            'border_misses': 0,
+        }
+        if verify:
+            patterns = self._verify_sample(set(sample_patterns), min_support)
+            intervals = {pattern: (support, support) for pattern, support in patterns.items()}
+        else:
+            # Keep the itemsets that may be frequent in the database
+            intervals = {
+                pattern: support_interval(support, sample_size, delta)
+                for pattern, support in sample_patterns.items()
+            }
+            patterns = {
+                pattern: support for pattern, support in sample_patterns.items()
+                if intervals[pattern][1] >= min_support
+            }
+        if self.stats is not None:
+            self.stats.note('approximation', dict(self.approximation))
+
+        self._reset_results()
+        self.interrupted = None
+        # Sampled supports are estimates, which incremental updates cannot start from
+        self.run_min_support = min_support if verify else None
+        self.run_constraints = {}
+        self._set_results(patterns)
+
+        rows = sorted(patterns.items(), key=lambda x: -x[1])
+        return pd.DataFrame({
+            'itemset': [frozenset(self.int_to_item[i] for i in pattern) for pattern, _ in rows],
+            'support': [support for _, support in rows],
+            'lower': [intervals[pattern][0] for pattern, _ in rows],
+            'upper': [intervals[pattern][1] for pattern, _ in rows],
+        })
+
+    def _verify_sample(self, sample_patterns, min_support):
+        """
+        Count the itemsets frequent in a sample and their negative border against
+        the transactions, then the negative border of the frequent itemsets
+        until it holds none. Returns the frequent itemsets with their support.
         """
-        Prepare transactions as a list of sorted integer-mapped items from the DataFrame.
+        for pattern in sample_patterns:
+            if len(pattern) > 1 and any(pattern - {item} not in sample_patterns for item in pattern):
+                raise ValueError(
+                    'Verification needs all the frequent itemsets of the sample, '
+                    'not only the closed or maximal ones.'
+                )
+        min_count = ceil(min_support * self.n_transactions - 1e-9)
+        items = range(len(self.int_to_item))
+
+        counts = {}
+        candidates = list(sample_patterns) + negative_border(sample_patterns, items)
+        with self._phase('verify'):
+            while candidates:
+                counts.update(count_itemsets(candidates, self.transactions))
+                self.approximation['scans'] += 1
+                self._count('candidates_counted', self.approximation['scans'], len(candidates))
+
+                frequent = {pattern for pattern, count in counts.items() if count >= min_count}
+                misses = len(frequent - sample_patterns) - self.approximation['border_misses']
+                if not misses:
+                    break
+                # Frequent itemsets of the border: their extensions may be frequent too
+                self.approximation['border_misses'] += misses
+                candidates = [c for c in negative_border(frequent, items) if c not in counts]
+
+        return {pattern: counts[pattern] / self.n_transactions for pattern in frequent}
+
+    @classmethod
+    def from_store(cls, path, **kwargs):
+        """
+        Create a miner on an encoded database saved with save_encoded, whose
+        arrays are memory-mapped instead of loaded.
         """
-        raw_transactions = [sorted(itemset) for itemset in self.data[self.item_col]]
+        store = EncodedStore.open(path)
+        return cls(store, store.item_col, **kwargs)
 
-        # Build the set of unique items
-        unique_items = sorted({item for transaction in raw_transactions for item in transaction})
+    def save_encoded(self, path):
+        """
+        Save the encoded transactions, their TID-lists and the item codebook to
+        a directory (see pml.base.store), to be reopened with from_store.
+        """
+        codebook = [self.int_to_item[i] for i in range(len(self.int_to_item))]
+        return EncodedStore.save(path, self.transactions, codebook, self.item_col, self.min_item_support)
+
+    def update(self, new_data, chunksize=100000):
+        """
+        Append new transactions and update the frequent itemsets of the last run
+        with FUP (see pml.base.incremental): candidates are counted against the
+        new transactions, and only those that may newly become frequent are
+        counted against the previous ones. Runs with constraints, e.g., closed
+        itemsets, and miners whose supports_update is False cannot be updated.
+
+        Parameters:
+        new_data: New transactions, in any format accepted by the constructor.
+        chunksize (int): Number of rows read at a time.
+        """
+        self._check_update()
+        if self._sink_run:
+            raise RuntimeError('Cannot update the results of a run streamed to a sink.')
+
+        increment = self._encode_increment(new_data, chunksize)
+        if not increment:
+            return
+
+        counts = {
+            pattern: round(support * self.n_transactions)
+            for pattern, support in self._frequent_patterns.items()
+        }
+        with self._phase('update'):
+            counts = fup(
+                self.transactions, increment, counts, self.run_min_support, 
+                self.int_to_item, self._count
+            )
+
+        self._append_transactions(increment)
+        self._reset_results()
+        for pattern, count in counts.items():
+            self._frequent_patterns[pattern] = count / self.n_transactions
+
+    def _encode_increment(self, data, chunksize):
+        """
+        Encode new transactions, adding their new items to the codebook.
+        """
+        transactions, items = load_transactions(data, self.item_col, None, chunksize)
+        for item in items:
+            if item not in self.item_to_int:
+                code = len(self.int_to_item)
+                self.item_to_int[item] = code
+                self.int_to_item[code] = item
+
+        recode = [self.item_to_int[item] for item in items]
+        return [sorted(recode[i] for i in transaction) for transaction in transactions]
+
+    def _append_transactions(self, transactions):
+        """
+        Append encoded transactions, and their ids to the TID-lists of vertical miners.
+        """
+        if self._store is not None:
+            if getattr(self, 'TID_lists', False) is None:
+                # TID-lists read from the store until now
+                self.TID_lists = self._store.vertical_db()
+            # Stored transactions are read-only
+            self.transactions = list(self.transactions)
+            self._store = None
+
+        n = len(self.transactions)
+        self.transactions.extend(transactions)
+        self.n_transactions = len(self.transactions)
+        self._fingerprint = None
+
+        if hasattr(self, 'TID_lists'):
+            for tid, transaction in enumerate(transactions, n):
+                for item in transaction:
+                    self.TID_lists.setdefault(item, set()).add(tid)
+
+    def _prepare_transactions(self, data, chunksize):
+        """
+        Prepare transactions as a list of sorted integer-mapped items from the data.
+        """
+        if isinstance(data, (EncodedStore, EncodedTransactions)):
+            if isinstance(data, EncodedStore):
+                self._store = data
+            if self.min_item_support is None:
+                self.min_item_support = data.min_item_support
+            unique_items, transactions = data.codebook, data.transactions
+        else:
+            transactions, unique_items = load_transactions(
+                data, self.item_col, self.min_item_support, chunksize
+            )
         
         # Create mapping dictionaries
         self.item_to_int = {item: idx for idx, item in enumerate(unique_items)}
         self.int_to_item = {idx: item for item, idx in self.item_to_int.items()}
         
-        # Map transactions to integers
-        transactions = [
-            [self.item_to_int[item] for item in transaction]
-            for transaction in raw_transactions
-        ]
-        
         return transactions
     
     def _create_vertical_db(self):
         """
         Create a map of items to the indices of transactions containing them.
         """
+        if self._store is not None:
+            return self._store.vertical_db()
         TID_lists = {}
         for tid, transaction in enumerate(self.transactions):
             for item in transaction:
@@ -64,37 +298,143 @@ class FPMiner(ABC):
                 TID_lists[item].add(tid)
         return dict(sorted(TID_lists.items()))
     
+    @property
+    def _results(self):
+        """
+        Integer-coded patterns held by the miner. Setting them clears the
+        decoded results of get_results.
+        """
+        return self._frequent_patterns
+
+    @_results.setter
+    def _results(self, patterns):
+        self._frequent_patterns = patterns
+        self.frequent_patterns = {}
+
+    @property
+    def _records(self):
+        """
+        Encoded transactions of the miner.
+        """
+        return self.transactions
+
+    def _decode(self, pattern):
+        """
+        Itemset of the items of an integer-coded pattern.
+        """
+        return frozenset(self.int_to_item[i] for i in pattern)
+
+    def _fingerprint_records(self):
+        """
+        Encoded transactions, preceded by the codebook of their items.
+        """
+        return chain([self.int_to_item], self.transactions)
+
+    def to_arrow(self):
+        """
+        Return mining results as an Arrow table with integer-coded items
+        (see pml.base.arrow). Requires pyarrow.
+        """
+        return itemsets_to_arrow(self._frequent_patterns, self.int_to_item, self.n_transactions)
+
     @abstractmethod
     def run(self):
         """
         Abstract method that should be implemented by all subclasses to execute the algorithm.
+        Decorated with interruptible, it accepts a progress callback, a cancellation
+        token and budgets, checked wherever the algorithm calls _checkpoint.
         """
         pass
 
 
-class FSPMiner(ABC):
-    def __init__(self, data: pd.DataFrame, item_col: str):
+class FSPMiner(MinerMixin, ABC):
+    def __init__(self, data, item_col: str, min_support=None, chunksize=100000):
         """
         Abstract class for a frequent sequential pattern miner. 
         
         Parameters:
-        data (pd.DataFrame): A DataFrame with at least one column for items.
+        data: A DataFrame with at least one column for items, or a source read
+            chunk by chunk (see pml.base.loading.iter_chunks): an iterable of 
+            DataFrame chunks, a CSV or Parquet path, a pyarrow Table or Dataset.
+            The data is not retained once encoded.
+        item_col (str): Name of the column of items.
+        min_support (float): Items below this support are dropped while loading.
+            Runs must then use a min_support at least as high.
+        chunksize (int): Number of rows read at a time.
         """
-        self.data = data
         self.item_col = item_col
-        self.sequences = self._prepare_sequences()
+        self.min_item_support = min_support
+        self.sequences = self._prepare_sequences(data, chunksize)
         self.n_sequences = len(self.sequences)
+        self._incremental = None
+        self._init_state()
+
+    def update(self, new_data=None, appended=None, buffer_ratio=0.8, chunksize=100000):
+        """
+        Add new sequences and extend existing ones, and update the frequent 
+        patterns of the last run incrementally (see pml.base.incremental).
 
-    def _prepare_sequences(self):
+        Semi-frequent patterns, whose support reaches buffer_ratio * min_support,
+        are kept between updates, so that only the patterns occurring in the new
+        or extended sequences are re-mined. The first update builds this buffer
+        from all the sequences. Runs with constraints, e.g., gaps, and miners
+        whose supports_update is False cannot be updated.
+
+        Parameters:
+        new_data: New sequences, in any format accepted by the constructor.
+        appended (dict): Itemsets appended to existing sequences, as
+            {sequence index: list of itemsets}.
+        buffer_ratio (float): Ratio of min_support from which patterns are buffered.
+        chunksize (int): Number of rows read at a time.
         """
-        Prepare sequences from a list of sets from the DataFrame column.
+        self._check_update()
+
+        min_support = self.run_min_support
+        state = self._incremental
+        if state is None or state['min_support'] != min_support or state['buffer_ratio'] != buffer_ratio:
+            # No buffer yet: every sequence is mined
+            state = {'min_support': min_support, 'buffer_ratio': buffer_ratio, 'counts': {}, 'bound': 0}
+            affected = set(range(self.n_sequences))
+        else:
+            affected = set()
+
+        # Apply changes
+        for sid, itemsets in (appended or {}).items():
+            self.sequences[sid] = self.sequences[sid] + [tuple(sorted(e)) for e in itemsets]
+            affected.add(sid)
+        if new_data is not None:
+            new_sequences = load_sequences(new_data, self.item_col, None, chunksize)
+            affected.update(range(self.n_sequences, self.n_sequences + len(new_sequences)))
+            self.sequences.extend(new_sequences)
+            self.n_sequences = len(self.sequences)
+        self._fingerprint = None
+        self._sequences_updated()
+
+        # Semi-frequent patterns are kept from the buffer bound, which never decreases
+        bound = max(1, state['bound'], ceil(buffer_ratio * min_support * self.n_sequences - 1e-9))
+        with self._phase('update'):
+            state['counts'] = incspan(self.sequences, affected, state['counts'], bound, self._count)
+        state['bound'] = bound
+        self._incremental = state
+
+        self._reset_results()
+        for pattern, count in state['counts'].items():
+            if count / self.n_sequences >= min_support:
+                self.frequent_patterns[pattern] = count / self.n_sequences
+
+    def _sequences_updated(self):
+        """
+        Rebuild the structures derived from the sequences after an update.
+        """
+        pass
+
+    def _prepare_sequences(self, data, chunksize):
+        """
+        Prepare sequences from a list of sets from the data column.
         Transaction data is a list of list of sets.
         In each itemset, items are sorted in lexicographic order.
         """
-        return [
-            list(map(lambda t: tuple(sorted(t)), row)) 
-            for row in self.data['items']
-        ]
+        return load_sequences(data, self.item_col, self.min_item_support, chunksize)
 
     def _create_vertical_db(self):
         """
@@ -108,9 +448,50 @@ class FSPMiner(ABC):
                 TID_lists[item].add(tid)
         return dict(sorted(TID_lists.items()))
     
+    @property
+    def _results(self):
+        """
+        Patterns held by the miner.
+        """
+        return self.frequent_patterns
+
+    @_results.setter
+    def _results(self, patterns):
+        self.frequent_patterns = patterns
+
+    @property
+    def _records(self):
+        """
+        Sequences of the miner.
+        """
+        return self.sequences
+
+    def sequential_rules(self, min_confidence=0.5):
+        """
+        Return the sequential rules "X, then Y" of the frequent patterns of the
+        last run whose confidence reaches min_confidence, where X is a prefix of
+        a pattern and Y the rest, as a DataFrame with columns antecedent,
+        consequent, support, confidence and lift (see pml.base.rules).
+        See RuleGrowth to mine rules between unordered itemsets directly.
+        """
+        patterns = dict(self._retained_patterns())
+        if not patterns:
+            raise RuntimeError('Run algorithm first.')
+        with self._phase('sequential_rules'):
+            return sequential_rules(patterns, min_confidence)
+
+    def to_arrow(self):
+        """
+        Return mining results as an Arrow table with integer-coded items
+        (see pml.base.arrow). Requires pyarrow.
+        """
+        return sequences_to_arrow(dict(self._retained_patterns()), self.n_sequences)
+
     @abstractmethod
     def run(self):
         """
         Abstract method that should be implemented by all subclasses to execute the algorithm.
+        Decorated with interruptible, it accepts a progress callback, a cancellation
+        token and budgets, checked wherever the algorithm calls _checkpoint.
         """
         pass
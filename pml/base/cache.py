@@ -0,0 +1,153 @@
+from functools import wraps
+import inspect
+import hashlib
+import pickle
+import os
+
+
+# Keyword arguments of run() handled by interruptible, not part of the constraints
+CONTROL_KWARGS = ('progress', 'cancel', 'max_patterns', 'max_seconds', 'max_memory_mb', 'sink')
+
+
+class ResultCache:
+    """
+    Cache of mining results, keyed by dataset fingerprint, algorithm and
+    constraints (the arguments of run() other than min_support).
+
+    Each key holds the results of the run with the lowest min_support so far.
+    A run at a higher support is answered by filtering these results, which is
+    exact for all patterns and for closed patterns alike (runs of maximal
+    patterns and top-k runs are not cached).
+
+    A run at a lower support is run in full, except by Apriori, which records
+    the supports of all the candidates it counted (frequent itemsets and
+    negative border) and does not count them again. Depth-first miners (Eclat,
+    PrefixSpan, ...) record no frontier: their search needs the TID-lists or
+    projected databases of the border, not only its supports.
+
+    With a path, entries are also pickled to that directory and shared between
+    processes and sessions. Entries are read back with pickle, which can run
+    arbitrary code: the directory must only be writable by trusted users. A
+    cache can be shared by several miners.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def get(self, key):
+        """
+        Return the entry of a key as a dictionary with keys min_support, patterns
+        and frontier, or None.
+        """
+        if key not in self.entries and self.path is not None:
+            file = os.path.join(self.path, f'{key}.pkl')
+            if os.path.exists(file):
+                with open(file, 'rb') as f:
+                    self.entries[key] = pickle.load(f)
+        return self.entries.get(key)
+
+    def put(self, key, min_support, patterns, frontier=None):
+        """
+        Save the results of a run, unless results at a lower support are cached.
+        """
+        entry = self.get(key)
+        if entry is not None and entry['min_support'] <= min_support:
+            return
+        entry = {'min_support': min_support, 'patterns': patterns, 'frontier': frontier}
+        self.entries[key] = entry
+
+        if self.path is not None:
+            # Write then rename, so that readers never see a partial entry
+            file = os.path.join(self.path, f'{key}.pkl')
+            with open(f'{file}.{os.getpid()}.tmp', 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f'{file}.{os.getpid()}.tmp', file)
+
+    def clear(self):
+        """
+        Remove all entries, on disk as well.
+        """
+        self.entries = {}
+        if self.path is not None:
+            for file in os.listdir(self.path):
+                if file.endswith('.pkl'):
+                    os.remove(os.path.join(self.path, file))
+
+
+def cached(run):
+    """
+    Decorator for run() methods, placed above interruptible: answers runs from
+    the cache of the miner, if any (see FPMiner.enable_cache), and saves the
+    results of complete runs. Runs streaming to a sink are not cached.
+    """
+    signature = inspect.signature(run)
+
+    @wraps(run)
+    def wrapper(self, *args, **kwargs):
+        self._cached_frontier = None
+        if self.cache is None or kwargs.get('sink') is not None:
+            return run(self, *args, **kwargs)
+
+        # Split min_support from the other constraints
+        run_kwargs = {k: v for k, v in kwargs.items() if k not in CONTROL_KWARGS}
+        bound = signature.bind(self, *args, **run_kwargs)
+        bound.apply_defaults()
+        constraints = dict(bound.arguments)
+        del constraints['self']
+        min_support = constraints.pop('min_support')
+        if constraints.get('mode') == 'maximal' or constraints.get('top_k') is not None:
+            # Maximal patterns at a higher support are not among those at a lower
+            # support, and top-k runs have no fixed support
+            return run(self, *args, **kwargs)
+        key = _key(self, constraints)
+
+        entry = self.cache.get(key)
+        if entry is not None and entry['min_support'] <= min_support:
+            # Higher support: filter the cached results
+            self._count('cache_hits')
+            self._reset_results()
+            self.interrupted = None
+            self._sink_run = False
+            self.run_min_support = min_support
+            self.run_constraints = {
+                name: value for name, value in constraints.items()
+                if value != signature.parameters[name].default
+            }
+            self._set_results({p: s for p, s in entry['patterns'].items() if s >= min_support})
+            return None
+
+        # Lower support: run from the cached frontier
+        self._count('cache_misses')
+        if entry is not None:
+            self._cached_frontier = entry['frontier']
+        self._frontier = None
+        result = run(self, *args, **kwargs)
+        if self.interrupted is None:
+            self.cache.put(key, min_support, self._get_cached_results(), self._frontier)
+        return result
+
+    return wrapper
+
+
+def fingerprint(records):
+    """
+    Fingerprint of a dataset given as an iterable of records.
+    """
+    h = hashlib.sha1()
+    for record in records:
+        h.update(repr(record).encode())
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+def _key(miner, constraints):
+    """
+    Cache key of a run: dataset fingerprint, algorithm and constraints.
+    """
+    cls = type(miner)
+    algorithm = f'{cls.__module__}.{cls.__qualname__}'
+    description = repr((miner.fingerprint(), algorithm, sorted(constraints.items())))
+    return hashlib.sha1(description.encode()).hexdigest()
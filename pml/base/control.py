@@ -0,0 +1,205 @@
+from collections import namedtuple
+from functools import wraps
+import inspect
+import threading
+import time
+import os
+
+try:
+    import psutil
+except ImportError:  # Optional: memory is then read from /proc, on Linux only
+    psutil = None
+
+
+# Minimum time between two reads of the memory of the process, in seconds
+MEMORY_CHECK_INTERVAL = 0.01
+
+
+# Progress report passed to progress callbacks
+Progress = namedtuple('Progress', ['n_patterns', 'level', 'prefix', 'elapsed'])
+
+
+class CancellationToken(threading.Event):
+    """
+    Token to cancel a mining run from another thread. Any threading.Event can
+    be used as well: the run stops once the event is set.
+    """
+
+    def cancel(self):
+        self.set()
+
+    @property
+    def cancelled(self):
+        return self.is_set()
+
+
+class MiningInterrupted(Exception):
+    """
+    Raised at a checkpoint to stop a run, and caught by RunControl.
+    """
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class RunControl:
+    """
+    Progress reporting, cancellation and budgets of a mining run.
+
+    Used as a context manager around run(), see interruptible. Miners call
+    _checkpoint(level, prefix) at each level (level-wise miners) or each
+    recursion (depth-first miners), which reports progress and stops the run
+    cleanly if it is cancelled or over budget. The reason of the interruption
+    is saved in miner.interrupted and the patterns found so far are kept.
+
+    Parameters:
+    progress (callable): Called with a Progress(n_patterns, level, prefix, elapsed)
+        at each checkpoint.
+    cancel (threading.Event): Cancellation token, e.g., a CancellationToken.
+    max_patterns (int): Stop once this many patterns have been found.
+    max_seconds (float): Stop after this many seconds.
+    max_memory_mb (float): Stop once the resident memory (RSS) of the process
+        has grown by this many MB since the start of the run, so that memory
+        used before the run does not count. RSS is read with psutil if it is
+        installed, else from /proc/self/statm, at most every
+        MEMORY_CHECK_INTERVAL seconds. Ignored where neither is available.
+    sink (Sink): Destination of the patterns, which are then not retained by 
+        the miner (see pml.base.sinks). The sink is closed at the end of the run.
+    """
+
+    def __init__(self, miner, progress=None, cancel=None, max_patterns=None, max_seconds=None, 
+                 max_memory_mb=None, sink=None):
+        self.miner = miner
+        self.sink = sink
+        self.progress = progress
+        self.cancel = cancel
+        self.max_patterns = max_patterns
+        self.max_seconds = max_seconds
+        self.max_memory_mb = max_memory_mb
+        self.t_start = None
+        self.memory_start = None
+        self.next_memory_check = 0
+
+    @property
+    def active(self):
+        """
+        Whether checkpoints have anything to do.
+        """
+        return any(x is not None for x in (
+            self.progress, self.cancel, self.max_patterns, self.max_seconds, self.max_memory_mb
+        ))
+
+    def __enter__(self):
+        self.t_start = time.perf_counter()
+        if self.max_memory_mb is not None:
+            self.memory_start = _memory_mb()
+            if self.memory_start is None:
+                self.max_memory_mb = None
+        self.miner.interrupted = None
+        self.miner._reset_results()
+        self.miner._run_control = self if self.active else None
+        self.miner._sink = self.sink
+        self.miner._n_emitted = 0
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.miner._run_control = None
+        if exc_type is None or exc_type is MiningInterrupted:
+            # Patterns kept by a top-k run are saved at the end of the run
+            self.miner._end_top_k()
+        self.miner._top_k = None
+        if self.sink is not None:
+            try:
+                # Patterns retained by the miner are emitted at the end of the run
+                if exc_type is None or exc_type is MiningInterrupted:
+                    for pattern, support in self.miner._retained_patterns():
+                        self.sink.emit(pattern, support)
+            finally:
+                self.miner._sink = None
+                self.sink.close()
+        if exc_type is MiningInterrupted:
+            self.miner.interrupted = exc.reason
+            return True
+        return False
+
+    def check(self, n_patterns, level, prefix):
+        """
+        Report progress and raise MiningInterrupted if the run must stop.
+        """
+        elapsed = time.perf_counter() - self.t_start
+        if self.progress is not None:
+            self.progress(Progress(n_patterns, level, prefix, elapsed))
+
+        if self.cancel is not None and self.cancel.is_set():
+            raise MiningInterrupted('cancelled')
+        if self.max_patterns is not None and n_patterns >= self.max_patterns:
+            raise MiningInterrupted('max_patterns')
+        if self.max_seconds is not None and elapsed >= self.max_seconds:
+            raise MiningInterrupted('max_seconds')
+        if self.max_memory_mb is not None and elapsed >= self.next_memory_check:
+            self.next_memory_check = elapsed + MEMORY_CHECK_INTERVAL
+            if _memory_mb() - self.memory_start >= self.max_memory_mb:
+                raise MiningInterrupted('max_memory_mb')
+
+
+def interruptible(run):
+    """
+    Decorator for run() methods: adds the progress, cancel, max_patterns,
+    max_seconds, max_memory_mb and sink keyword arguments (see RunControl).
+    The minimum support of the run is checked against the data loaded.
+    Runs with a top_k argument keep the top_k patterns of highest support
+    (see pml.base.topk). The other arguments of the run that differ from their
+    defaults are saved in run_constraints.
+    """
+    signature = inspect.signature(run)
+
+    @wraps(run)
+    def wrapper(self, *args, progress=None, cancel=None, max_patterns=None, 
+                max_seconds=None, max_memory_mb=None, sink=None, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs).arguments
+        min_support = _min_support(signature, arguments)
+        self._check_min_support(min_support)
+        self.run_min_support = min_support
+        self.run_constraints = _constraints(signature, arguments)
+        self._sink_run = sink is not None
+        self._start_top_k(arguments.get('top_k'), min_support)
+        with RunControl(self, progress, cancel, max_patterns, max_seconds, max_memory_mb, sink):
+            return run(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _min_support(signature, arguments):
+    """
+    Minimum support among the arguments bound to run(), its first argument or
+    in a dictionary of constraints (CloSPEC).
+    """
+    min_support = arguments.get(list(signature.parameters)[1])
+    if isinstance(min_support, dict):
+        min_support = min_support.get('min_support')
+    return min_support
+
+
+def _constraints(signature, arguments):
+    """
+    Arguments bound to run() other than min_support and top_k that differ from
+    their defaults, as {name: value}.
+    """
+    return {
+        name: value for name, value in list(arguments.items())[1:]
+        if name not in ('min_support', 'top_k') and value != signature.parameters[name].default
+    }
+
+
+def _memory_mb():
+    """
+    Resident memory of the process, in MB, or None if it cannot be read.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
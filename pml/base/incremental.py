@@ -0,0 +1,186 @@
+from itertools import combinations
+
+
+def fup(transactions, increment, counts, min_support, items, count=None):
+    """
+    FUP update of frequent itemsets when transactions are appended, from
+    Cheung et al., Maintenance of Discovered Association Rules in Large
+    Databases: An Incremental Updating Technique (1996).
+
+    Parameters:
+    transactions (list): Original transactions, as lists of item codes.
+    increment (list): Appended transactions, as lists of item codes.
+    counts (dict): Counts of the frequent itemsets of the original transactions,
+        as {frozenset: count}.
+    min_support (float): Minimum support, relative to all the transactions.
+    items (iterable): Item codes of the updated database.
+    count (callable): Instrumentation callback count(event, level, value).
+
+    Candidates of size k are generated from the updated frequent (k-1)-itemsets
+    and counted against the increment only. Previously frequent itemsets get
+    their new count directly. The others cannot be frequent unless they are
+    frequent in the increment, and only those are counted against the original
+    transactions, in one scan per level.
+    Returns the counts of the frequent itemsets of the updated database.
+    """
+    count = count or (lambda event, level=0, value=1: None)
+    n_old, n_new = len(transactions), len(increment)
+    n = n_old + n_new
+    increment = [set(t) for t in increment]
+
+    frequent = {}
+    candidates = [frozenset([item]) for item in items]
+    k = 1
+    while candidates:
+        # Count candidates against the increment
+        increment_counts = _count_candidates(candidates, increment)
+        count('candidates_counted', k, len(candidates))
+
+        # Previously frequent itemsets are updated, the others are pruned unless
+        # they are frequent in the increment
+        F_k = {}
+        rescan = []
+        for candidate, c in increment_counts.items():
+            if candidate in counts:
+                if (counts[candidate] + c) / n >= min_support:
+                    F_k[candidate] = counts[candidate] + c
+            elif c / n_new >= min_support:
+                rescan.append(candidate)
+
+        # Count the remaining candidates against the original transactions
+        if rescan:
+            count('rescans', k, len(rescan))
+            old_counts = _count_candidates(rescan, [set(t) for t in transactions])
+            for candidate in rescan:
+                total = old_counts[candidate] + increment_counts[candidate]
+                if total / n >= min_support:
+                    F_k[candidate] = total
+
+        count('frequent', k, len(F_k))
+        frequent.update(F_k)
+        k += 1
+        candidates = _generate_candidates(F_k, k)
+
+    return frequent
+
+
+def _count_candidates(candidates, transactions):
+    """
+    Count the transactions containing each candidate.
+    """
+    counts = dict.fromkeys(candidates, 0)
+    for transaction in transactions:
+        for candidate in candidates:
+            if candidate <= transaction:
+                counts[candidate] += 1
+    return counts
+
+
+def _generate_candidates(F_k, k):
+    """
+    Join frequent (k-1)-itemsets sharing k-2 items into k-itemsets, and prune
+    those with an infrequent (k-1)-subset.
+    """
+    prefixes = {}
+    for itemset in F_k:
+        items = sorted(itemset)
+        prefixes.setdefault(tuple(items[:-1]), []).append(items[-1])
+
+    candidates = []
+    for prefix, last_items in prefixes.items():
+        for a, b in combinations(sorted(last_items), 2):
+            candidate = frozenset(prefix + (a, b))
+            if all(frozenset(subset) in F_k for subset in combinations(candidate, k - 1)):
+                candidates.append(candidate)
+    return candidates
+
+
+def incspan(sequences, affected, counts, bound, count=None):
+    """
+    Incremental update of the frequent and semi-frequent sequential patterns
+    when sequences are added or extended, in the style of IncSpan from Cheng
+    et al., IncSpan: Incremental Mining of Sequential Patterns in Large
+    Database (2004).
+
+    Parameters:
+    sequences (list): Updated sequences, as lists of sorted tuples.
+    affected (set): Ids of the new and extended sequences.
+    counts (dict): Counts of the patterns of the sequences before the update
+        whose count reached the previous bound, as {pattern: count}.
+    bound (int): Count from which patterns are kept, at least the previous bound.
+    count (callable): Instrumentation callback count(event, level, value).
+
+    The counts of patterns that do not occur in any affected sequence are
+    unchanged. The others are re-mined by prefix projection, growing only
+    prefixes that occur in an affected sequence: candidate extensions are found
+    in the affected sequences, then counted in the other ones.
+    Returns the counts of the patterns whose count reaches bound.
+    """
+    count = count or (lambda event, level=0, value=1: None)
+    unaffected = [sid for sid in range(len(sequences)) if sid not in affected]
+
+    # Occurrences are (sequence id, end of the prefix without its last itemset,
+    # end of the prefix), using the leftmost match of the prefix
+    remined = {}
+
+    def grow(pattern, occ_affected, occ_unaffected):
+        level = len(pattern) + 1
+        extensions = _extensions(sequences, pattern, occ_affected)
+        others = _extensions(sequences, pattern, occ_unaffected, extensions)
+        count('candidates_counted', level, len(extensions))
+        for (extension, item), occurrences in extensions.items():
+            n = len(occurrences) + len(others.get((extension, item), ()))
+            if n < bound:
+                continue
+            if extension == 's':
+                child = pattern + ((item,),)
+            else:
+                child = pattern[:-1] + (pattern[-1] + (item,),)
+            remined[child] = n
+            count('frequent', level)
+            grow(child, occurrences, others.get((extension, item), []))
+
+    grow((), [(sid, -1, -1) for sid in affected], [(sid, -1, -1) for sid in unaffected])
+
+    # Patterns that do not occur in any affected sequence keep their count
+    updated = {p: c for p, c in counts.items() if c >= bound and p not in remined}
+    updated.update(remined)
+    return updated
+
+
+def _extensions(sequences, pattern, occurrences, candidates=None):
+    """
+    Map the s- and i-extensions of a pattern to the occurrences of the extended
+    pattern, restricted to the candidates if given.
+    Extensions are identified as ('s', item) or ('i', item).
+    """
+    extensions = {}
+
+    def add(key, occurrence):
+        if candidates is not None and key not in candidates:
+            return
+        extensions.setdefault(key, []).append(occurrence)
+
+    for sid, prev_end, end in occurrences:
+        sequence = sequences[sid]
+        seen = set()
+
+        # s-extensions: first itemset after the prefix containing the item
+        for j in range(end + 1, len(sequence)):
+            for item in sequence[j]:
+                if ('s', item) not in seen:
+                    seen.add(('s', item))
+                    add(('s', item), (sid, end, j))
+
+        # i-extensions: first itemset after the rest of the prefix containing
+        # the last itemset of the prefix and a greater item
+        if pattern:
+            last = set(pattern[-1])
+            for j in range(prev_end + 1, len(sequence)):
+                if last <= set(sequence[j]):
+                    for item in sequence[j]:
+                        if item > pattern[-1][-1] and ('i', item) not in seen:
+                            seen.add(('i', item))
+                            add(('i', item), (sid, prev_end, j))
+
+    return extensions
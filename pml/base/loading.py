@@ -0,0 +1,221 @@
+from collections import Counter
+from math import ceil
+import ast
+import os
+import pandas as pd
+
+from pml.utils.symbol import Symbol
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class EncodedTransactions:
+    """
+    Transactions encoded by load_transactions, with their codebook and the
+    support used to drop items. Passed as data, miners use them as they are
+    instead of encoding the data again, e.g., in pml.auto.
+    """
+
+    def __init__(self, transactions, codebook, min_item_support=None):
+        self.transactions = transactions
+        self.codebook = codebook
+        self.min_item_support = min_item_support
+
+
+def iter_chunks(data, item_col, chunksize=100000):
+    """
+    Yield the item column of a data source chunk by chunk, as sequences of cells.
+
+    data can be:
+    - a DataFrame,
+    - an iterable of DataFrame chunks, e.g., pd.read_csv(..., chunksize=...),
+    - the path of a CSV file, whose cells are lists written as literals,
+    - the path of a Parquet file or of a directory of Parquet files,
+    - a pyarrow Table or Dataset.
+    Only the item column is read from files and Arrow sources.
+    """
+    if isinstance(data, pd.DataFrame):
+        column = data[item_col]
+        for start in range(0, len(column), chunksize):
+            yield column.iloc[start:start+chunksize]
+
+    elif isinstance(data, (str, os.PathLike)):
+        path = os.fspath(data)
+        if path.endswith(('.csv', '.csv.gz')):
+            yield from (
+                chunk[item_col] for chunk in pd.read_csv(
+                    path, usecols=[item_col], converters={item_col: ast.literal_eval}, chunksize=chunksize
+                )
+            )
+        else:
+            _check_pyarrow()
+            if os.path.isdir(path):
+                batches = ds.dataset(path, format='parquet').to_batches(columns=[item_col], batch_size=chunksize)
+            else:
+                batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=[item_col])
+            yield from (batch.column(0).to_pylist() for batch in batches)
+
+    elif pa is not None and isinstance(data, pa.Table):
+        for batch in data.select([item_col]).to_batches(chunksize):
+            yield batch.column(0).to_pylist()
+
+    elif pa is not None and isinstance(data, ds.Dataset):
+        for batch in data.to_batches(columns=[item_col], batch_size=chunksize):
+            yield batch.column(0).to_pylist()
+
+    else:
+        for chunk in data:
+            yield chunk[item_col]
+
+
+def is_reiterable(data):
+    """
+    Check if a data source can be read more than once.
+    One-shot iterators, e.g., generators of chunks, cannot.
+    """
+    if isinstance(data, (pd.DataFrame, str, os.PathLike)):
+        return True
+    if pa is not None and isinstance(data, (pa.Table, ds.Dataset)):
+        return True
+    return iter(data) is not data
+
+
+def load_transactions(data, item_col, min_support=None, chunksize=100000):
+    """
+    Encode the transactions of a data source as sorted lists of item codes.
+
+    Items are counted in a first pass and the frequent ones (all the items if
+    min_support is None) are encoded in a second pass, so that neither the raw
+    data nor the infrequent items are held in memory. One-shot iterators are
+    read once: transactions are encoded as they come and re-encoded at the end.
+    Returns the transactions and the codebook, a sorted list of items.
+    """
+    if not is_reiterable(data):
+        return _load_transactions_once(data, item_col, min_support, chunksize)
+
+    # First pass: count items
+    counts = Counter()
+    n = 0
+    for chunk in iter_chunks(data, item_col, chunksize):
+        for transaction in chunk:
+            counts.update(set(transaction))
+            n += 1
+
+    int_to_item = _frequent_items(counts, n, min_support)
+    item_to_int = {item: idx for idx, item in enumerate(int_to_item)}
+
+    # Second pass: encode transactions, without infrequent items
+    transactions = [
+        sorted(item_to_int[item] for item in transaction if item in item_to_int)
+        for chunk in iter_chunks(data, item_col, chunksize)
+        for transaction in chunk
+    ]
+    return transactions, int_to_item
+
+
+def load_sequences(data, item_col, min_support=None, chunksize=100000):
+    """
+    Read the sequences of a data source as lists of sorted tuples.
+
+    Items are counted once per sequence in a first pass, and infrequent items
+    (none if min_support is None) are dropped while reading the sequences in a
+    second pass, along with the itemsets left empty. Symbols are counted by their
+    representation. One-shot iterators are read once and filtered at the end.
+    """
+    if not is_reiterable(data):
+        sequences = [
+            [tuple(sorted(itemset)) for itemset in sequence]
+            for chunk in iter_chunks(data, item_col, chunksize)
+            for sequence in chunk
+        ]
+        if min_support is None:
+            return sequences
+        counts = Counter(item for sequence in sequences for item in _items(sequence))
+        frequent_items = set(_frequent_items(counts, len(sequences), min_support))
+        return [_filter_sequence(sequence, frequent_items) for sequence in sequences]
+
+    frequent_items = None
+    if min_support is not None:
+        # First pass: count items
+        counts = Counter()
+        n = 0
+        for chunk in iter_chunks(data, item_col, chunksize):
+            for sequence in chunk:
+                counts.update(_items(sequence))
+                n += 1
+        frequent_items = set(_frequent_items(counts, n, min_support))
+
+    # Second pass: read sequences, without infrequent items
+    return [
+        _filter_sequence([tuple(sorted(itemset)) for itemset in sequence], frequent_items)
+        for chunk in iter_chunks(data, item_col, chunksize)
+        for sequence in chunk
+    ]
+
+
+def _load_transactions_once(data, item_col, min_support, chunksize):
+    """
+    Encode the transactions of a one-shot source with temporary codes, in order
+    of appearance, then drop infrequent items and switch to sorted codes.
+    """
+    temp_codes = {}
+    transactions = []
+    for chunk in iter_chunks(data, item_col, chunksize):
+        for transaction in chunk:
+            transactions.append([temp_codes.setdefault(item, len(temp_codes)) for item in transaction])
+
+    # Count items, by temporary code
+    counts = Counter(code for transaction in transactions for code in set(transaction))
+    items = list(temp_codes)
+    counts = Counter({items[code]: count for code, count in counts.items()})
+    int_to_item = _frequent_items(counts, len(transactions), min_support)
+
+    recode = {temp_codes[item]: idx for idx, item in enumerate(int_to_item)}
+    transactions = [
+        sorted(recode[code] for code in transaction if code in recode)
+        for transaction in transactions
+    ]
+    return transactions, int_to_item
+
+
+def _frequent_items(counts, n, min_support):
+    """
+    Sorted list of the items whose count reaches min_support (all the items if
+    min_support is None).
+    """
+    min_count = ceil(min_support * n - 1e-9) if min_support is not None else 0
+    return sorted(item for item, count in counts.items() if count >= min_count)
+
+
+def _filter_sequence(sequence, frequent_items):
+    """
+    Drop infrequent items from a sequence, and the itemsets left empty.
+    """
+    if frequent_items is None:
+        return sequence
+    filtered = (tuple(item for item in itemset if _item(item) in frequent_items) for itemset in sequence)
+    return [itemset for itemset in filtered if itemset]
+
+
+def _items(sequence):
+    """
+    Items of a sequence, each one once, Symbols by their representation.
+    """
+    return {_item(item) for itemset in sequence for item in itemset}
+
+
+def _item(item):
+    """
+    Item counted for an item of a sequence.
+    """
+    return item.repr if isinstance(item, Symbol) else item
+
+
+def _check_pyarrow():
+    if pa is None:
+        raise ImportError('Reading Parquet files requires pyarrow.')
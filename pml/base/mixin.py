@@ -0,0 +1,230 @@
+from contextlib import nullcontext
+
+from pml.base.stats import MiningStats
+from pml.base.sinks import iter_patterns
+from pml.base.cache import ResultCache, fingerprint
+from pml.base.topk import TopK
+
+
+class MinerMixin:
+    """
+    Instrumentation, run control, top-k runs, result cache and result access
+    shared by FPMiner and FSPMiner.
+
+    Miners provide two hooks:
+    - _results: the dictionary of the patterns held by the miner, as {pattern: support},
+    - _records: the encoded database (transactions or sequences),
+    and may override _decode, which gives a pattern as emitted to the sinks, and
+    _fingerprint_records, the records fingerprinted for the cache.
+    """
+
+    # Whether the results of a run can be updated incrementally, see update
+    supports_update = True
+
+    # Arguments of run() that do not change its results, e.g., a representation
+    # of the data, so that incremental updates can ignore them
+    update_ignored_args = ()
+
+    def _init_state(self):
+        """
+        Initialize the state of the instrumentation, of the runs and of the cache.
+        """
+        self.stats = None
+        self.interrupted = None
+        self._run_control = None
+        self._sink = None
+        self._n_emitted = 0
+        self.cache = None
+        self._fingerprint = None
+        self._frontier = None
+        self._cached_frontier = None
+        self.run_min_support = None
+        self.run_constraints = {}
+        self._sink_run = False
+        self._top_k = None
+
+    def _decode(self, pattern):
+        """
+        Pattern as emitted to the sinks.
+        """
+        return pattern
+
+    def _fingerprint_records(self):
+        """
+        Records fingerprinted for the cache.
+        """
+        return self._records
+
+    def _check_update(self):
+        """
+        Check that the results of the last run can be updated incrementally:
+        updates maintain all the frequent patterns, without the constraints
+        of the run.
+        """
+        if not self.supports_update:
+            raise ValueError(f'{type(self).__name__} does not support incremental updates.')
+        if self.run_min_support is None:
+            raise RuntimeError('Run algorithm first.')
+        if self.min_item_support is not None:
+            raise ValueError('Cannot update data loaded with a min_support, infrequent items were dropped.')
+        if self.interrupted is not None:
+            raise RuntimeError(f'Cannot update the partial results of a run interrupted by {self.interrupted}.')
+        constraints = {
+            name: value for name, value in self.run_constraints.items()
+            if name not in self.update_ignored_args
+        }
+        if constraints:
+            raise RuntimeError(f'Cannot update the results of a run with constraints: {constraints}.')
+
+    def enable_stats(self, hooks=None):
+        """
+        Enable instrumentation: candidates, projections and phase timings are
+        recorded in the returned MiningStats object, and hooks are called on
+        every update. Instrumentation is disabled by default.
+        """
+        self.stats = MiningStats(hooks)
+        return self.stats
+
+    def disable_stats(self):
+        """
+        Disable instrumentation.
+        """
+        self.stats = None
+
+    def _count(self, event, level=0, value=1):
+        """
+        Update a counter if instrumentation is enabled.
+        """
+        if self.stats is not None:
+            self.stats.count(event, level, value)
+
+    def _phase(self, name):
+        """
+        Time a phase if instrumentation is enabled.
+        """
+        return self.stats.phase(name) if self.stats is not None else nullcontext()
+
+    def _check_min_support(self, min_support):
+        """
+        Check that a run does not go below the support used to drop items while loading.
+        """
+        if min_support is not None and self.min_item_support is not None \
+                and min_support < self.min_item_support - 1e-9:
+            raise ValueError(
+                f'min_support={min_support} is below the support used to load the data '
+                f'({self.min_item_support}).'
+            )
+
+    def _checkpoint(self, level, prefix=None):
+        """
+        Report progress and stop the run if it is cancelled or over budget.
+        """
+        if self._run_control is not None:
+            self._run_control.check(self._n_patterns(), level, prefix)
+
+    def _n_patterns(self):
+        """
+        Number of patterns found so far.
+        """
+        n_kept = len(self._top_k) if self._top_k is not None else 0
+        return len(self._results) + self._n_emitted + n_kept
+
+    def _save(self, pattern, support):
+        """
+        Save a frequent pattern, or emit it to the sink of the run.
+        """
+        if self._top_k is not None:
+            self._top_k.push(pattern, support)
+        elif self._sink is None:
+            self._results[pattern] = support
+        else:
+            self._sink.emit(self._decode(pattern), support)
+            self._n_emitted += 1
+
+    def _start_top_k(self, k, min_support):
+        """
+        Keep the k patterns of highest support of the run (see pml.base.topk),
+        above min_support and the support used to load the data.
+        """
+        if k is None:
+            self._top_k = None
+            return
+        floor = max(min_support or 0, self.min_item_support or 0, 1 / max(len(self._records), 1))
+        self._top_k = TopK(k, floor)
+
+    def _end_top_k(self):
+        """
+        Save the patterns kept by a top-k run. Its final threshold becomes the
+        min_support of the run.
+        """
+        top_k, self._top_k = self._top_k, None
+        if top_k is None:
+            return
+        self.run_min_support = top_k.min_support
+        for pattern, support in top_k.patterns():
+            self._save(pattern, support)
+
+    def _min_support_now(self, min_support):
+        """
+        Minimum support at this point of the run: min_support, or the current
+        threshold of a top-k run.
+        """
+        if self._top_k is None:
+            return min_support
+        return self._top_k.min_support
+
+    def enable_cache(self, cache=None, path=None):
+        """
+        Cache the results of complete runs, to answer later runs at a higher
+        support, and for Apriori to start runs at a lower support from the
+        recorded frontier (see pml.base.cache). A ResultCache can be shared by
+        several miners, and is saved to path if given, a directory that must be
+        trusted, as entries are unpickled from it. Returns the cache.
+        """
+        self.cache = cache if cache is not None else ResultCache(path)
+        return self.cache
+
+    def disable_cache(self):
+        """
+        Disable the result cache.
+        """
+        self.cache = None
+
+    def fingerprint(self):
+        """
+        Fingerprint of the encoded data, used as part of the cache keys.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self._fingerprint_records())
+        return self._fingerprint
+
+    def _reset_results(self):
+        """
+        Clear the results of a previous run.
+        """
+        self._results = {}
+
+    def _set_results(self, patterns):
+        """
+        Set the results of a run, e.g., from the cache.
+        """
+        self._results = dict(patterns)
+
+    def _get_cached_results(self):
+        """
+        Results of a run, as saved in the cache.
+        """
+        return dict(self._results)
+
+    def _retained_patterns(self):
+        """
+        Patterns held by the miner, emitted to the sink at the end of the run.
+        """
+        for pattern, support in self._results.items():
+            yield self._decode(pattern), support
+
+    def iter_patterns(self, *args, **kwargs):
+        """
+        Run the algorithm and yield the (pattern, support) pairs as they are found.
+        """
+        return iter_patterns(self, *args, **kwargs)
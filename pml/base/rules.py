@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+
+# Rule metrics, computed as vectors from the supports of the rules (s_xy), of
+# their antecedents (s_x) and of their consequents (s_y), and their confidence
+METRICS = {
+    'lift': lambda s_xy, s_x, s_y, confidence: confidence / s_y,
+    'leverage': lambda s_xy, s_x, s_y, confidence: s_xy - s_x * s_y,
+    'conviction': lambda s_xy, s_x, s_y, confidence: _divide(1 - s_y, 1 - confidence),
+    'jaccard': lambda s_xy, s_x, s_y, confidence: s_xy / (s_x + s_y - s_xy),
+}
+
+
+def association_rules(patterns, int_to_item, min_confidence=0.5, metrics=('lift', 'leverage', 'conviction')):
+    """
+    Generate the association rules X -> Y of integer-coded frequent itemsets.
+
+    Parameters:
+    patterns (dict): Frequent itemsets as {frozenset of item codes: support},
+        with all their subsets, e.g., the results of a run with mode='all'.
+    int_to_item (dict): Items by code.
+    min_confidence (float): Minimum confidence, support(X + Y) / support(X).
+    metrics (iterable): Names of the metrics to compute, see METRICS.
+
+    Confidence can only decrease when items move from the antecedent to the
+    consequent (Agrawal and Srikant, Fast Algorithms for Mining Association
+    Rules, 1994), so the consequents of each itemset are only extended if they
+    reached min_confidence. They are grown depth-first, with items greater than
+    their last one, instead of joining the consequents of each size, which
+    costs more than the confidence checks it saves. Supports of antecedents and
+    consequents are looked up in patterns, and metrics are computed as NumPy
+    vectors.
+    Returns a DataFrame with columns antecedent, consequent, support,
+    confidence and the metrics.
+    """
+    unknown = [metric for metric in metrics if metric not in METRICS]
+    if unknown:
+        raise ValueError(f'Unknown metrics: {unknown}, expected some of {list(METRICS)}.')
+
+    # Itemsets as bitmasks, whose differences and hashes are much cheaper than frozensets
+    items = sorted({item for itemset in patterns for item in itemset})
+    bits = {item: 1 << b for b, item in enumerate(items)}
+    supports = {}
+    decoded = {}
+    for itemset, support in patterns.items():
+        mask = sum(bits[item] for item in itemset)
+        supports[mask] = support
+        decoded[mask] = itemset
+
+    rules = []
+    try:
+        for itemset, support in patterns.items():
+            if len(itemset) < 2:
+                continue
+            itemset_bits = [bits[item] for item in sorted(itemset)]
+            mask = sum(itemset_bits)
+
+            # Consequents grown depth-first with greater items, from those that passed
+            stack = [(bit, j) for j, bit in enumerate(itemset_bits)]
+            while stack:
+                consequent, last = stack.pop()
+                antecedent = mask ^ consequent
+                antecedent_support = supports[antecedent]
+                if support / antecedent_support < min_confidence:
+                    continue
+                rules.append((antecedent, consequent, support, antecedent_support))
+                # Extend unless the antecedent has a single item left
+                if antecedent & (antecedent - 1):
+                    for j in range(last + 1, len(itemset_bits)):
+                        stack.append((consequent | itemset_bits[j], j))
+
+    except KeyError as e:
+        missing = {item for item in items if bits[item] & e.args[0]}
+        raise ValueError(
+            f'Missing the support of the subset {missing} of a frequent itemset: association '
+            'rules need all the frequent itemsets, e.g., from a run with mode="all".'
+        ) from None
+
+    antecedents, consequents, s_xy, s_x = zip(*rules) if rules else ((),) * 4
+    s_xy, s_x = np.array(s_xy, dtype=float), np.array(s_x, dtype=float)
+    s_y = np.array([supports[y] for y in consequents], dtype=float)
+    confidence = s_xy / s_x
+
+    # Decode each itemset once, rules share the decoded frozensets
+    for mask, itemset in decoded.items():
+        decoded[mask] = frozenset(int_to_item[item] for item in itemset)
+
+    rules = pd.DataFrame({
+        'antecedent': [decoded[x] for x in antecedents],
+        'consequent': [decoded[y] for y in consequents],
+        'support': s_xy,
+        'confidence': confidence,
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for metric in metrics:
+            rules[metric] = METRICS[metric](s_xy, s_x, s_y, confidence)
+    return rules
+
+
+def _divide(a, b):
+    """
+    Element-wise a / b, infinite where b is 0 (e.g., conviction of exact rules).
+    """
+    return np.divide(a, b, out=np.full_like(a, np.inf), where=b > 0)
+
+
+def sequential_rules(patterns, min_confidence=0.5):
+    """
+    Generate the sequential rules X => Y of frequent sequential patterns: X is a
+    prefix of a pattern, its first itemsets, and Y the rest, so that the rule
+    reads "X, then Y".
+
+    Parameters:
+    patterns (dict): Frequent sequential patterns as {tuple of itemsets: support},
+        with all their prefixes and suffixes, e.g., the results of PrefixSpan.
+    min_confidence (float): Minimum confidence, support(X + Y) / support(X).
+
+    Patterns are their own prefix index: the prefixes of a pattern are looked up
+    from the longest one, whose support is the lowest, and the search stops at
+    the first prefix whose confidence is below min_confidence, as the shorter
+    ones cannot reach it. Confidence and lift are computed as NumPy vectors.
+    Returns a DataFrame with columns antecedent, consequent, support,
+    confidence and lift.
+    """
+    rules = []
+    try:
+        for pattern, support in patterns.items():
+            for k in range(len(pattern) - 1, 0, -1):
+                antecedent_support = patterns[pattern[:k]]
+                # Supports are fractions: confidences on min_confidence may be rounded below it
+                if support / antecedent_support < min_confidence - 1e-9:
+                    break
+                rules.append((pattern[:k], pattern[k:], support, antecedent_support, patterns[pattern[k:]]))
+
+    except KeyError as e:
+        raise ValueError(
+            f'Missing the support of the sub-pattern {e.args[0]} of a frequent pattern: sequential '
+            'rules need all the frequent patterns, not only the closed ones.'
+        ) from None
+
+    antecedents, consequents, s_xy, s_x, s_y = zip(*rules) if rules else ((),) * 5
+    s_xy, s_x, s_y = (np.array(s, dtype=float) for s in (s_xy, s_x, s_y))
+    confidence = s_xy / s_x
+
+    return pd.DataFrame({
+        'antecedent': list(antecedents),
+        'consequent': list(consequents),
+        'support': s_xy,
+        'confidence': confidence,
+        'lift': confidence / s_y,
+    })
@@ -0,0 +1,113 @@
+from collections import defaultdict
+from math import log, sqrt
+import random
+
+from pml.base.incremental import _generate_candidates
+
+
+def sample_transactions(transactions, sample_size, seed=0):
+    """
+    Uniform sample of transactions without replacement, in their original order.
+    """
+    if sample_size >= len(transactions):
+        return list(transactions)
+    rng = random.Random(seed)
+    return [transactions[t] for t in sorted(rng.sample(range(len(transactions)), sample_size))]
+
+
+def lowered_threshold(min_support, sample_size, delta):
+    """
+    Support threshold for a sample, from Toivonen, Sampling Large Databases for
+    Association Rules (1996): an itemset of support min_support in the database
+    has a support below it in the sample with probability at most delta.
+
+    It is the higher of the thresholds given by the additive Hoeffding bound,
+    as in Toivonen's paper, and by the multiplicative Chernoff bound, much
+    closer to min_support for low supports. It is at least one transaction of
+    the sample, which makes samples too small for min_support costly to mine.
+    """
+    hoeffding = min_support - sqrt(log(1 / delta) / (2 * sample_size))
+    chernoff = min_support - sqrt(2 * min_support * log(1 / delta) / sample_size)
+    return max(hoeffding, chernoff, 1 / sample_size)
+
+
+def support_interval(support, sample_size, delta):
+    """
+    Interval holding the support of an itemset in the database with probability
+    at least 1 - delta, from its support in a sample.
+
+    Each end is the tighter of those given by the additive Hoeffding bound and
+    by the multiplicative Chernoff bounds, each at level 1 - delta / 4. The
+    Chernoff ends are the supports at which the observed one lies at the bound,
+    much closer to it for itemsets of low support.
+    Returns the lower and upper ends.
+    """
+    hoeffding = sqrt(log(4 / delta) / (2 * sample_size))
+    L = log(4 / delta) / sample_size
+
+    # P(observed <= (1 - b) s) <= exp(-b^2 s n / 2): solve s - observed = sqrt(2 L s)
+    upper = ((sqrt(2 * L) + sqrt(2 * L + 4 * support)) / 2) ** 2
+    # P(observed >= (1 + b) s) <= exp(-b^2 s n / 3) for b <= 1: solve observed - s = sqrt(3 L s)
+    lower = ((sqrt(3 * L + 4 * support) - sqrt(3 * L)) / 2) ** 2
+    if support > 2 * lower:
+        lower = 0
+
+    return max(0, support - hoeffding, lower), min(1, support + hoeffding, upper)
+
+
+def negative_border(itemsets, items):
+    """
+    Negative border of a downward closed collection of itemsets: the itemsets
+    outside of it whose subsets are all in it, i.e., the items outside of it,
+    and the candidates generated from it as by Apriori that are not in it.
+    """
+    border = [frozenset([item]) for item in items if frozenset([item]) not in itemsets]
+
+    levels = defaultdict(set)
+    for itemset in itemsets:
+        levels[len(itemset)].add(itemset)
+    for k, F_k in levels.items():
+        border.extend(
+            candidate for candidate in _generate_candidates(F_k, k + 1)
+            if candidate not in itemsets
+        )
+    return border
+
+
+def count_itemsets(itemsets, transactions, chunksize=2**20):
+    """
+    Count the transactions containing each itemset, in one scan.
+
+    Transactions are read by chunks, whose items are turned into bitsets (as
+    Python integers) to count the itemsets by intersections. Itemsets are
+    visited in lexicographic order, so that the intersection of a prefix is
+    computed once for all the itemsets sharing it. Memory is bounded by the
+    bitsets of one chunk.
+    Returns the counts as {frozenset: count}.
+    """
+    itemsets = sorted({tuple(sorted(itemset)) for itemset in itemsets})
+    items = {item for itemset in itemsets for item in itemset}
+    counts = dict.fromkeys(itemsets, 0)
+
+    for start in range(0, len(transactions), chunksize):
+        chunk = transactions[start:start + chunksize]
+        bits = {item: bytearray((len(chunk) + 7) // 8) for item in items}
+        for tid, transaction in enumerate(chunk):
+            for item in transaction:
+                if item in bits:
+                    bits[item][tid >> 3] |= 1 << (tid & 7)
+        bits = {item: int.from_bytes(b, 'little') for item, b in bits.items()}
+
+        # Intersections along the current itemset, kept for its prefixes
+        path, stack = (), []
+        for itemset in itemsets:
+            k = 0
+            while k < min(len(path), len(itemset)) and path[k] == itemset[k]:
+                k += 1
+            del stack[k:]
+            for item in itemset[k:]:
+                stack.append(stack[-1] & bits[item] if stack else bits[item])
+            path = itemset
+            counts[itemset] += bin(stack[-1]).count('1')
+
+    return {frozenset(itemset): count for itemset, count in counts.items()}
@@ -0,0 +1,176 @@
+from queue import Queue, Full
+import threading
+import json
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class Sink:
+    """
+    Destination of the patterns found by a miner, passed to run() as sink=...
+    Patterns are emitted as they are found and are not retained by the miner
+    (closed pattern miners and miners that need their results to grow patterns
+    emit them at the end of the run).
+    Itemsets are emitted as frozensets and sequences as tuples of tuples.
+    """
+
+    def emit(self, pattern, support):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CallbackSink(Sink):
+    """
+    Call callback(pattern, support) for each pattern.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def emit(self, pattern, support):
+        self.callback(pattern, support)
+
+
+class QueueSink(Sink):
+    """
+    Put (pattern, support) pairs in a bounded queue, which blocks the miner
+    while the queue is full. QueueSink.DONE is put in the queue on close.
+    """
+
+    DONE = object()
+
+    def __init__(self, maxsize=10000, queue=None):
+        self.queue = queue if queue is not None else Queue(maxsize)
+        # Set to give up on a full queue, e.g., when the consumer is gone
+        self.abandoned = threading.Event()
+        self.closed = False
+
+    def emit(self, pattern, support):
+        while not self.abandoned.is_set():
+            try:
+                self.queue.put((pattern, support), timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def close(self):
+        if not self.closed and not self.abandoned.is_set():
+            self.queue.put(self.DONE)
+        self.closed = True
+
+
+class CSVSink(Sink):
+    """
+    Write patterns to a CSV file with columns pattern and support, patterns
+    being written as JSON lists (of lists for sequences).
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['pattern', 'support'])
+
+    def emit(self, pattern, support):
+        self.writer.writerow([json.dumps(_to_lists(pattern), default=str), support])
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink(Sink):
+    """
+    Write patterns to a Parquet file with columns pattern (list of items, or
+    list of lists of items for sequences) and support, in row groups of
+    batch_size patterns. Requires pyarrow.
+    """
+
+    def __init__(self, path, batch_size=100000):
+        if pa is None:
+            raise ImportError('ParquetSink requires pyarrow.')
+        self.path = path
+        self.batch_size = batch_size
+        self.writer = None
+        self._patterns = []
+        self._supports = []
+
+    def emit(self, pattern, support):
+        self._patterns.append(_to_lists(pattern))
+        self._supports.append(support)
+        if len(self._patterns) >= self.batch_size:
+            self._write_batch()
+
+    def close(self):
+        if self._patterns:
+            self._write_batch()
+        if self.writer is not None:
+            self.writer.close()
+
+    def _write_batch(self):
+        """
+        Write buffered patterns as a row group.
+        """
+        table = pa.table({
+            'pattern': pa.array(self._patterns),
+            'support': pa.array(self._supports, type=pa.float64()),
+        })
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self._patterns, self._supports = [], []
+
+
+def iter_patterns(miner, *args, maxsize=10000, **kwargs):
+    """
+    Run a miner in a background thread and yield its (pattern, support) pairs
+    as they are found. Arguments are passed to miner.run. The run is cancelled
+    if the generator is closed before the end.
+    """
+    sink = QueueSink(maxsize)
+    cancel = threading.Event()
+    error = []
+
+    def target():
+        try:
+            miner.run(*args, sink=sink, cancel=cancel, **kwargs)
+        except BaseException as e:
+            error.append(e)
+            sink.close()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = sink.queue.get()
+            if item is QueueSink.DONE:
+                break
+            yield item
+    finally:
+        # Consumer is gone: stop the miner and unblock it
+        cancel.set()
+        sink.abandoned.set()
+        thread.join()
+
+    if error:
+        raise error[0]
+
+
+def _to_lists(pattern):
+    """
+    Convert an itemset to a sorted list, and a sequence to a list of lists.
+    """
+    if isinstance(pattern, (set, frozenset)):
+        return sorted(pattern)
+    return [list(element) for element in pattern]
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import time
+
+
+class MiningStats:
+    """
+    Counters and phase timings collected while mining.
+
+    Counters are indexed by event and by level, i.e., the size of the candidates
+    for level-wise miners and the depth of the search for depth-first miners.
+    Hooks are called as hook(event, level, value) each time a counter is updated,
+    as hook('phase', name, seconds) at the end of each phase, and as
+    hook('note', name, value) when a note is recorded.
+    Notes record decisions taken for a run, e.g., by pml.auto.
+    """
+
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+        self.reset()
+
+    def reset(self):
+        """
+        Clear counters and timings.
+        """
+        self.counters = defaultdict(lambda: defaultdict(int))
+        self.timings = defaultdict(float)
+        self.notes = {}
+
+    def add_hook(self, hook):
+        """
+        Register a callback called on every update.
+        """
+        self.hooks.append(hook)
+
+    def count(self, event, level=0, value=1):
+        """
+        Increment the counter of an event at a given level.
+        """
+        self.counters[event][level] += value
+        for hook in self.hooks:
+            hook(event, level, value)
+
+    def note(self, name, value):
+        """
+        Record a decision or a measure, replacing any previous value.
+        """
+        self.notes[name] = value
+        for hook in self.hooks:
+            hook('note', name, value)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a phase of the algorithm. Time spent in the same phase accumulates.
+        """
+        t_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t_start
+            self.timings[name] += elapsed
+            for hook in self.hooks:
+                hook('phase', name, elapsed)
+
+    def totals(self):
+        """
+        Return the counters summed over all levels as {event: count}.
+        """
+        return {event: sum(levels.values()) for event, levels in self.counters.items()}
+
+    def to_dict(self):
+        """
+        Return counters, timings and notes as plain dictionaries.
+        """
+        return {
+            'counters': {event: dict(levels) for event, levels in self.counters.items()},
+            'timings': dict(self.timings),
+            'notes': dict(self.notes),
+        }
+
+    def __repr__(self):
+        if self.notes:
+            return f'MiningStats(counters={self.totals()}, timings={dict(self.timings)}, notes={self.notes})'
+        return f'MiningStats(counters={self.totals()}, timings={dict(self.timings)})'
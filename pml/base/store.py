@@ -0,0 +1,164 @@
+from collections.abc import Sequence
+import json
+import os
+import numpy as np
+
+
+# Version of the on-disk format, bumped on incompatible changes
+FORMAT_VERSION = 1
+
+
+class EncodedStore:
+    """
+    Encoded basket database saved on disk and opened as memory-mapped arrays,
+    so that repeated jobs start without re-encoding the data and processes
+    opening the same store share its pages.
+
+    A store is a directory holding:
+    - meta.json: format version, item column, number of transactions, loading
+      support and item codebook (the items, indexed by code),
+    - indptr.npy, indices.npy: transactions in CSR format, i.e., the item codes
+      of transaction t are indices[indptr[t]:indptr[t+1]],
+    - tid_indptr.npy, tid_indices.npy: vertical TID-lists in the same format,
+      the transactions containing item i being tid_indices[tid_indptr[i]:tid_indptr[i+1]].
+    meta.json is written last, so that a store is only opened once complete.
+
+    Miners are built from a store with FPMiner.from_store(path), or by passing
+    an EncodedStore as data. Pass the path to worker processes, not the miner.
+    """
+
+    def __init__(self, path, meta, indptr, indices, tid_indptr, tid_indices):
+        self.path = path
+        self.meta = meta
+        self.indptr = indptr
+        self.indices = indices
+        self.tid_indptr = tid_indptr
+        self.tid_indices = tid_indices
+
+    @classmethod
+    def open(cls, path, mmap_mode='r'):
+        """
+        Open a store with memory-mapped arrays.
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(
+                f'Unsupported store version {meta.get("version")} (expected {FORMAT_VERSION}).'
+            )
+        arrays = (
+            np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ('indptr', 'indices', 'tid_indptr', 'tid_indices')
+        )
+        return cls(path, meta, *arrays)
+
+    @classmethod
+    def save(cls, path, transactions, codebook, item_col, min_item_support=None):
+        """
+        Save encoded transactions (lists of item codes) and their codebook, and
+        return the opened store. An existing store at path is overwritten.
+        """
+        n_items = len(codebook)
+        lengths = np.fromiter((len(t) for t in transactions), dtype=np.int64, count=len(transactions))
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        indices = np.fromiter(
+            (i for t in transactions for i in t), dtype=_code_dtype(n_items), count=int(indptr[-1])
+        )
+
+        # Vertical format: transaction ids sorted by item code
+        tids = np.repeat(np.arange(len(transactions), dtype=_code_dtype(len(transactions))), lengths)
+        tid_indices = tids[np.argsort(indices, kind='stable')]
+        tid_indptr = np.concatenate(([0], np.cumsum(np.bincount(indices, minlength=n_items))))
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'item_col': item_col,
+            'n_transactions': len(transactions),
+            'min_item_support': min_item_support,
+            'codebook': list(codebook),
+        }
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name, array in (('indptr', indptr), ('indices', indices),
+                            ('tid_indptr', tid_indptr), ('tid_indices', tid_indices)):
+            np.save(os.path.join(path, f'{name}.npy'), array)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+        return cls.open(path)
+
+    @property
+    def item_col(self):
+        return self.meta['item_col']
+
+    @property
+    def n_transactions(self):
+        return self.meta['n_transactions']
+
+    @property
+    def min_item_support(self):
+        return self.meta['min_item_support']
+
+    @property
+    def codebook(self):
+        return self.meta['codebook']
+
+    @property
+    def transactions(self):
+        """
+        Transactions as a read-only sequence of lists of item codes.
+        """
+        return CSRTransactions(self.indptr, self.indices)
+
+    def tid_list(self, code):
+        """
+        Array of the ids of the transactions containing an item.
+        """
+        return self.tid_indices[self.tid_indptr[code]:self.tid_indptr[code + 1]]
+
+    def vertical_db(self):
+        """
+        Map of item codes to the set of ids of the transactions containing them.
+        The sets are built in memory, for miners working on TID sets (AprioriTID):
+        Eclat reads the arrays of the frequent items with tid_list instead.
+        """
+        return {code: set(self.tid_list(code).tolist()) for code in range(len(self.codebook))}
+
+
+class CSRTransactions(Sequence):
+    """
+    Read-only sequence of transactions stored in CSR format. Each transaction
+    is materialized as a list of item codes when accessed.
+    """
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __getitem__(self, t):
+        if isinstance(t, slice):
+            return [self[i] for i in range(*t.indices(len(self)))]
+        if t < 0:
+            t += len(self)
+        if not 0 <= t < len(self):
+            raise IndexError('Transaction index out of range.')
+        return self.indices[self.indptr[t]:self.indptr[t + 1]].tolist()
+
+    def __iter__(self):
+        indptr = self.indptr.tolist()
+        for start, end in zip(indptr, indptr[1:]):
+            yield self.indices[start:end].tolist()
+
+
+def _code_dtype(n):
+    """
+    Integer type for codes in range(n).
+    """
+    return np.int32 if n < 2**31 else np.int64
@@ -0,0 +1,65 @@
+import heapq
+
+
+class TopK:
+    """
+    The k patterns of highest support found so far, for runs with top_k instead
+    of a fixed min_support.
+
+    Patterns are kept in a min-heap by support. Once k patterns are found, the
+    support of the k-th best one is the threshold a pattern must reach to enter,
+    and it only rises: miners use it as their current min_support (see
+    FPMiner._min_support_now) to prune the search space. Patterns tied with the
+    k-th best one are kept as well, so that the results are the patterns whose
+    support reaches the final threshold, whatever the search order.
+    """
+
+    def __init__(self, k, min_support):
+        if k < 1:
+            raise ValueError(f'top_k must be at least 1, got {k}.')
+        self.k = k
+        self.floor = min_support
+        self.heap = []
+        self.ties = []
+        self._n_pushed = 0
+
+    def __len__(self):
+        return len(self.heap) + len(self.ties)
+
+    @property
+    def min_support(self):
+        """
+        Current threshold: the support of the k-th best pattern, or the floor.
+        """
+        if len(self.heap) < self.k:
+            return self.floor
+        return max(self.heap[0][0], self.floor)
+
+    def push(self, pattern, support):
+        """
+        Offer a pattern, kept if its support reaches the current threshold.
+        """
+        if support < self.min_support:
+            return
+        # The counter breaks ties, so that patterns are never compared
+        entry = (support, self._n_pushed, pattern)
+        self._n_pushed += 1
+
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif support == self.heap[0][0]:
+            self.ties.append(entry)
+        else:
+            evicted = heapq.heapreplace(self.heap, entry)
+            # Ties of the evicted pattern remain tied with the new k-th best one, or drop out
+            if evicted[0] == self.heap[0][0]:
+                self.ties.append(evicted)
+            else:
+                self.ties = []
+
+    def patterns(self):
+        """
+        The patterns kept, as (pattern, support) pairs by decreasing support.
+        """
+        entries = sorted(self.heap + self.ties, key=lambda entry: (-entry[0], entry[1]))
+        return [(pattern, support) for support, _, pattern in entries]
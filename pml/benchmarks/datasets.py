@@ -0,0 +1,212 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import numpy as np
+
+from pml.utils.symbol import Symbol
+
+
+def quest_baskets(D=1000, T=10, I=4, L=100, N=100, correlation=0.5, seed=0):
+    """
+    Synthetic basket data from the IBM Quest generator, as described in Agrawal
+    and Srikant, Fast Algorithms for Mining Association Rules (1994).
+
+    Parameters:
+    D (int): Number of transactions.
+    T (float): Average size of the transactions.
+    I (float): Average size of the maximal potentially large itemsets.
+    L (int): Number of maximal potentially large itemsets.
+    N (int): Number of items.
+    correlation (float): Mean fraction of items shared by consecutive itemsets.
+    seed (int): Seed of the random generator.
+
+    Returns a DataFrame with an 'items' column holding lists of items.
+    """
+    rng = np.random.default_rng(seed)
+    itemsets, weights, corruption = _potentially_large_patterns(
+        rng, L, I, lambda rng, n, previous: _pick_itemset(rng, n, N, previous, correlation)
+    )
+
+    transactions = []
+    for _ in range(D):
+        size = max(1, rng.poisson(T))
+        transactions.append(sorted(_fill(rng, size, itemsets, weights, corruption)))
+
+    return pd.DataFrame({'items': transactions})
+
+
+def quest_sequences(D=500, C=5, T=3, S=4, I=2, N=100, N_S=50, N_I=100, correlation=0.5, seed=0):
+    """
+    Synthetic sequence data from the IBM Quest generator, as described in Agrawal
+    and Srikant, Mining Sequential Patterns (1995).
+
+    Parameters:
+    D (int): Number of customers, i.e., of data sequences.
+    C (float): Average number of transactions per customer.
+    T (float): Average number of items per transaction.
+    S (float): Average length of the maximal potentially large sequences.
+    I (float): Average size of the itemsets in the maximal potentially large sequences.
+    N (int): Number of items.
+    N_S (int): Number of maximal potentially large sequences.
+    N_I (int): Number of maximal potentially large itemsets.
+    correlation (float): Mean fraction of elements shared by consecutive patterns.
+    seed (int): Seed of the random generator.
+
+    Returns a DataFrame with an 'items' column holding lists of itemsets (tuples).
+    """
+    rng = np.random.default_rng(seed)
+
+    # Large itemsets, used as the elements of the large sequences
+    itemsets, itemset_weights, _ = _potentially_large_patterns(
+        rng, N_I, I, lambda rng, n, previous: _pick_itemset(rng, n, N, previous, correlation)
+    )
+
+    # Large sequences
+    def pick_sequence(rng, n, previous):
+        n_shared = min(n, int(round(rng.exponential(correlation) * len(previous))))
+        sequence = list(previous[:n_shared])
+        while len(sequence) < n:
+            sequence.append(itemsets[rng.choice(len(itemsets), p=itemset_weights)])
+        return tuple(sequence)
+    sequences, weights, corruption = _potentially_large_patterns(rng, N_S, S, pick_sequence)
+
+    # Customer sequences
+    data = []
+    for _ in range(D):
+        n_transactions = max(1, rng.poisson(C))
+        size = max(1, rng.poisson(C * T))
+        elements = []
+        while sum(len(element) for element in elements) < size:
+            sequence = sequences[rng.choice(len(sequences), p=weights)]
+            elements += [
+                tuple(item for item in element if rng.random() >= corruption[sequence])
+                for element in sequence
+            ]
+
+        # Spread the elements over the transactions of the customer
+        transactions = [set() for _ in range(n_transactions)]
+        positions = np.sort(rng.integers(0, n_transactions, size=len(elements)))
+        for position, element in zip(positions, elements):
+            transactions[position].update(element)
+        data.append([tuple(sorted(t)) for t in transactions if t])
+
+    return pd.DataFrame({'items': data})
+
+
+def retail_baskets(n_transactions=1000, n_items=500, mean_size=4, alpha=1.2, seed=0):
+    """
+    Seeded sample shaped like retail basket data: item popularity follows a Zipf
+    law and basket sizes follow a heavy-tailed (log-normal) distribution.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = _zipf_weights(n_items, alpha)
+    sizes = np.maximum(1, np.round(rng.lognormal(np.log(mean_size), 0.6, n_transactions))).astype(int)
+
+    transactions = []
+    for size in sizes:
+        size = min(size, n_items)
+        items = rng.choice(n_items, size=size, replace=False, p=popularity)
+        transactions.append(sorted(_item_name(i) for i in items))
+
+    return pd.DataFrame({'items': transactions})
+
+
+def clickstream_sequences(n_sessions=500, n_pages=100, mean_length=6, alpha=1.1, stickiness=0.3, seed=0):
+    """
+    Seeded sample shaped like clickstream data: sessions are sequences of single
+    page views, with Zipf-distributed page popularity, geometric session lengths
+    and a probability (stickiness) to follow the previous page's neighbour.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = _zipf_weights(n_pages, alpha)
+
+    sessions = []
+    for _ in range(n_sessions):
+        length = rng.geometric(1 / mean_length)
+        page = rng.choice(n_pages, p=popularity)
+        session = [(_item_name(page),)]
+        for _ in range(length - 1):
+            if rng.random() < stickiness:
+                page = (page + 1) % n_pages
+            else:
+                page = rng.choice(n_pages, p=popularity)
+            session.append((_item_name(page),))
+        sessions.append(session)
+
+    return pd.DataFrame({'items': sessions})
+
+
+def with_timestamps(data, start=datetime(2000, 1, 1), step=1):
+    """
+    Convert sequence data into Symbol sequences: the k-th itemset of each sequence
+    starts k*step seconds after start and lasts step seconds.
+    """
+    sequences = []
+    for sequence in data['items']:
+        symbols = []
+        for k, itemset in enumerate(sequence):
+            t_s = start + timedelta(seconds=k*step)
+            t_e = t_s + timedelta(seconds=step)
+            symbols.append(tuple(Symbol(item, t_s, t_e) for item in itemset))
+        sequences.append(symbols)
+    return pd.DataFrame({'items': sequences})
+
+
+def _potentially_large_patterns(rng, n_patterns, mean_size, pick):
+    """
+    Generate potentially large patterns with their weights and corruption levels.
+    pick(rng, size, previous) builds a pattern of the given size that shares
+    some of its content with the previous pattern.
+    """
+    patterns, corruption = [], {}
+    previous = ()
+    for _ in range(n_patterns):
+        size = max(1, rng.poisson(mean_size))
+        pattern = pick(rng, size, previous)
+        patterns.append(pattern)
+        corruption[pattern] = float(np.clip(rng.normal(0.5, 0.1), 0, 0.9))
+        previous = pattern
+    weights = rng.exponential(1, n_patterns)
+    return patterns, weights / weights.sum(), corruption
+
+
+def _pick_itemset(rng, size, n_items, previous, correlation):
+    """
+    Pick an itemset, some items being taken from the previous itemset.
+    """
+    size = min(size, n_items)
+    n_shared = min(size, len(previous), int(round(rng.exponential(correlation) * size)))
+    items = set(rng.choice(previous, size=n_shared, replace=False).tolist()) if n_shared else set()
+    while len(items) < size:
+        items.add(_item_name(rng.integers(n_items)))
+    return tuple(sorted(items))
+
+
+def _fill(rng, size, itemsets, weights, corruption):
+    """
+    Fill a transaction with corrupted potentially large itemsets.
+    """
+    transaction = set()
+    while len(transaction) < size:
+        itemset = itemsets[rng.choice(len(itemsets), p=weights)]
+        items = [item for item in itemset if rng.random() >= corruption[itemset]]
+
+        # Itemsets that do not fit are kept half of the time
+        if len(transaction) + len(items) > size and transaction and rng.random() < 0.5:
+            break
+        transaction.update(items)
+    return transaction
+
+
+def _zipf_weights(n, alpha):
+    """
+    Normalized Zipf weights of n ranks.
+    """
+    weights = 1 / np.arange(1, n + 1) ** alpha
+    return weights / weights.sum()
+
+
+def _item_name(i):
+    """
+    Items are strings, as some miners rely on string operations.
+    """
+    return f'i{int(i)}'
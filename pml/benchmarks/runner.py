@@ -0,0 +1,257 @@
+from importlib import import_module
+from datetime import datetime
+import argparse
+import platform
+import tracemalloc
+import time
+import json
+import pandas as pd
+import numpy as np
+
+from pml.benchmarks.datasets import (
+    quest_baskets, quest_sequences, retail_baskets, clickstream_sequences, with_timestamps
+)
+
+
+# Miners as {name: (module, class, kind[, options])}
+# kind is 'itemsets' for FPMiner subclasses, 'sequences' for FSPMiner subclasses
+# and 'symbols' for miners that require Symbol sequences, options are passed to run
+MINERS = {
+    'Apriori': ('pml.pattern_mining.apriori', 'Apriori', 'itemsets'),
+    'AprioriTID': ('pml.pattern_mining.apriori_TID', 'AprioriTID', 'itemsets'),
+    'Eclat': ('pml.pattern_mining.eclat', 'Eclat', 'itemsets'),
+    'Eclat (bitset)': ('pml.pattern_mining.eclat', 'Eclat', 'itemsets', {'representation': 'bitset'}),
+    'Eclat (diffset)': ('pml.pattern_mining.eclat', 'Eclat', 'itemsets', {'representation': 'diffset'}),
+    'Eclat (closed)': ('pml.pattern_mining.eclat', 'Eclat', 'itemsets', {'mode': 'closed'}),
+    'Eclat (maximal)': ('pml.pattern_mining.eclat', 'Eclat', 'itemsets', {'mode': 'maximal'}),
+    'PatternGrowth': ('pml.pattern_mining.pattern_growth', 'PatternGrowth', 'itemsets'),
+    'FPGrowth': ('pml.pattern_mining.fp_growth.fp_growth', 'FPGrowth', 'itemsets'),
+    'FPGrowth (closed)': ('pml.pattern_mining.fp_growth.fp_growth', 'FPGrowth', 'itemsets', {'mode': 'closed'}),
+    'FPGrowth (maximal)': ('pml.pattern_mining.fp_growth.fp_growth', 'FPGrowth', 'itemsets', {'mode': 'maximal'}),
+    'LCM': ('pml.pattern_mining.lcm', 'LCM', 'itemsets'),
+    'GSP': ('pml.sequential_pattern_mining.GSP.gsp', 'GSP', 'sequences'),
+    'AprioriAll': ('pml.sequential_pattern_mining.AprioriAll.apriori_all', 'AprioriAll', 'sequences'),
+    'PrefixSpan': ('pml.sequential_pattern_mining.PrefixSpan.prefixspan', 'PrefixSpan', 'sequences'),
+    'Spam': ('pml.sequential_pattern_mining.Spam.spam', 'Spam', 'sequences'),
+    'CloSpan': ('pml.sequential_pattern_mining.CloSpan.clospan', 'CloSpan', 'sequences'),
+    'FreeSpan': ('pml.sequential_pattern_mining.FreeSpan.freespan', 'FreeSpan', 'sequences'),
+    'CloSPEC': ('pml.sequential_pattern_mining.CloSPEC.clospec', 'CloSPEC', 'symbols'),
+}
+
+# Datasets as {name: (generator, parameters, kind)}
+DATASETS = {
+    'quick': {
+        'T5.I2.D200.N50': (quest_baskets, {'D': 200, 'T': 5, 'I': 2, 'L': 20, 'N': 50}, 'itemsets'),
+        'retail.D200': (retail_baskets, {'n_transactions': 200, 'n_items': 100}, 'itemsets'),
+        'C4.T2.S3.I2.D50.N20': (
+            quest_sequences, {'D': 50, 'C': 4, 'T': 2, 'S': 3, 'I': 2, 'N': 20, 'N_S': 10, 'N_I': 20}, 'sequences'
+        ),
+        'clickstream.D100': (clickstream_sequences, {'n_sessions': 100, 'n_pages': 30}, 'sequences'),
+    },
+    'default': {
+        'T10.I4.D1K.N100': (quest_baskets, {'D': 1000, 'T': 10, 'I': 4, 'L': 100, 'N': 100}, 'itemsets'),
+        'retail.D2K': (retail_baskets, {'n_transactions': 2000, 'n_items': 500}, 'itemsets'),
+        'C5.T3.S4.I2.D200.N50': (
+            quest_sequences, {'D': 200, 'C': 5, 'T': 3, 'S': 4, 'I': 2, 'N': 50, 'N_S': 25, 'N_I': 50}, 'sequences'
+        ),
+        'clickstream.D500': (clickstream_sequences, {'n_sessions': 500, 'n_pages': 100}, 'sequences'),
+    },
+}
+
+SUPPORTS = {
+    'quick': [0.3, 0.2, 0.1],
+    'default': [0.2, 0.1, 0.05, 0.02],
+}
+
+
+def run_benchmarks(suite='quick', miners=None, supports=None, seed=0, max_seconds=60, output=None, memory=True):
+    """
+    Time and memory-profile miners on the datasets of a suite, across support
+    thresholds. Thresholds are processed in decreasing order, and lower thresholds
+    are skipped for a miner once a run exceeds max_seconds. Memory is profiled
+    in a second run of each miner, skipped if memory is False.
+
+    Returns the results as a dictionary, also written as JSON to output if given.
+    """
+    miners = miners or list(MINERS)
+    supports = sorted(supports or SUPPORTS[suite], reverse=True)
+
+    records = []
+    for dataset, (generator, params, kind) in DATASETS[suite].items():
+        data = generator(**params, seed=seed)
+        symbol_data = with_timestamps(data) if kind == 'sequences' else None
+
+        for name in miners:
+            miner_kind = MINERS[name][2]
+            if (miner_kind == 'itemsets') != (kind == 'itemsets'):
+                continue
+            for min_support in supports:
+                record = benchmark(name, symbol_data if miner_kind == 'symbols' else data, min_support, memory)
+                record.update({'dataset': dataset, 'params': params, 'seed': seed})
+                records.append(record)
+                if record['error'] or record['run_seconds'] > max_seconds:
+                    break
+
+    results = {'metadata': _metadata(suite), 'results': records}
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def benchmark(name, data, min_support, memory=True):
+    """
+    Build and run a miner on data with a given support threshold.
+    Returns a record with the build and run times (in seconds), the peak memory
+    allocated during the run (in MB), the number of patterns found and the error
+    raised, if any.
+
+    tracemalloc slows down allocations, so the miner is timed without it, and
+    the peak memory is measured in a second run of a new miner, unless memory
+    is False (peak_memory_mb is then None).
+    """
+    module, class_name, kind, *options = MINERS[name]
+    options = options[0] if options else {}
+    record = {
+        'algorithm': name, 'min_support': min_support, 'build_seconds': None,
+        'run_seconds': None, 'peak_memory_mb': None, 'n_patterns': None, 'error': None,
+    }
+
+    try:
+        cls = getattr(import_module(module), class_name)
+
+        # Construction
+        t_start = time.perf_counter()
+        alg = cls(data, 'items')
+        record['build_seconds'] = time.perf_counter() - t_start
+
+        # Mining
+        t_start = time.perf_counter()
+        _run(alg, kind, min_support, options)
+        record['run_seconds'] = time.perf_counter() - t_start
+        record['n_patterns'] = _count_patterns(alg, kind)
+
+        # Memory, in a second run traced from the construction of the miner
+        if memory:
+            del alg
+            tracemalloc.start()
+            alg = cls(data, 'items')
+            tracemalloc.reset_peak()
+            _run(alg, kind, min_support, options)
+            record['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    return record
+
+
+def compare_results(baseline, current, tolerance=0.25):
+    """
+    Compare two benchmark results (as dictionaries or JSON paths).
+    Returns the list of regressions: runs that became slower (or used more memory)
+    by more than the relative tolerance, that found a different number of patterns,
+    or that started failing.
+    """
+    baseline, current = _load(baseline), _load(current)
+
+    def key(record):
+        return record['algorithm'], record['dataset'], record['min_support']
+    baseline_records = {key(r): r for r in baseline['results']}
+
+    regressions = []
+    for record in current['results']:
+        reference = baseline_records.get(key(record))
+        if reference is None or reference['error']:
+            continue
+        if record['error']:
+            regressions.append({'run': key(record), 'metric': 'error', 'current': record['error']})
+            continue
+        for metric in ('run_seconds', 'peak_memory_mb'):
+            if record[metric] is None or reference[metric] is None:
+                # Memory not profiled
+                continue
+            if record[metric] > reference[metric] * (1 + tolerance):
+                regressions.append({
+                    'run': key(record), 'metric': metric,
+                    'baseline': reference[metric], 'current': record[metric]
+                })
+        if record['n_patterns'] != reference['n_patterns']:
+            regressions.append({
+                'run': key(record), 'metric': 'n_patterns',
+                'baseline': reference['n_patterns'], 'current': record['n_patterns']
+            })
+
+    return regressions
+
+
+def _run(alg, kind, min_support, options):
+    """
+    Run a miner with a given support threshold.
+    """
+    if kind == 'symbols':
+        alg.run({'min_support': min_support})
+    else:
+        alg.run(min_support=min_support, **options)
+
+
+def _count_patterns(alg, kind):
+    """
+    Number of patterns found by a miner.
+    """
+    if kind == 'itemsets':
+        return len(alg._frequent_patterns)
+    if kind == 'symbols':
+        return sum(len(patterns) for patterns in alg.patterns.values())
+    return len(alg.frequent_patterns)
+
+
+def _metadata(suite):
+    """
+    Environment of the benchmark run.
+    """
+    return {
+        'suite': suite,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def _load(results):
+    """
+    Load benchmark results from a JSON path if needed.
+    """
+    if isinstance(results, dict):
+        return results
+    with open(results) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark the pml miners.')
+    parser.add_argument('--suite', default='quick', choices=list(DATASETS))
+    parser.add_argument('--miners', nargs='+', choices=list(MINERS))
+    parser.add_argument('--supports', nargs='+', type=float)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-seconds', type=float, default=60)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='Previous results to compare with.')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the memory-profiling runs.')
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.suite, args.miners, args.supports, args.seed, args.max_seconds, args.output, not args.no_memory
+    )
+    for record in results['results']:
+        print(record)
+
+    if args.baseline:
+        print('\nRegressions =\n', compare_results(args.baseline, results))
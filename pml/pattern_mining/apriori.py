@@ -3,46 +3,82 @@ from itertools import combinations
 from collections import Counter
 import pandas as pd
 
-from pml.base import FPMiner
+from pml.base import FPMiner, interruptible, cached
 
 
 class Apriori(FPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
-    def run(self, min_support: float):
+    @cached
+    @interruptible
+    def run(self, min_support: float = None, top_k=None):
         """
         Run the Apriori algorithm.
+
+        With top_k, the top_k itemsets of highest support are found instead,
+        above min_support if given: the threshold rises as itemsets are found
+        (see pml.base.topk).
         """
+        if min_support is None and top_k is None:
+            raise ValueError('Either min_support or top_k must be given.')
 
         # k = 1: first scan to compute support of 1-itemsets
         counter = Counter()
         for items in self.transactions:
             for item in items:
-                counter[item] += 1/self.n_transactions
+                counter[item] += 1
         F_k = []
         for candidate in sorted(counter):
-            if (counter[candidate]) >= min_support:
-                self._frequent_patterns[frozenset([candidate])] = counter[candidate]
+            # Supports are computed from integer counts to avoid accumulated rounding errors
+            support = counter[candidate] / self.n_transactions
+            if support >= self._min_support_now(min_support):
+                self._save(frozenset([candidate]), support)
                 F_k.append(set([candidate]))
 
+        self._count('frequent', 1, len(F_k))
+
+        # Supports of the candidates counted by a previous run at a higher support
+        # (frequent itemsets and negative border), and of the candidates of this
+        # run, only recorded for the cache and when patterns are retained
+        known_supports = self._cached_frontier or {}
+        self._frontier = {} if self.cache is not None and self._sink is None else None
+
         # k >= 2
         k = 2
         while F_k:
+            self._checkpoint(k)
 
-            # Generate k-itemsets
-            candidates_iter = self._generate_candidates(F_k, k)
+            # Generate k-itemsets, only listed to be counted when stats are enabled
+            with self._phase('candidate_generation'):
+                candidates_iter = self._generate_candidates(F_k, k)
+                if self.stats is not None:
+                    candidates_iter = list(candidates_iter)
 
             # Pruning
-            candidates = self._prune_candidates(F_k, candidates_iter, k)
+            with self._phase('pruning'):
+                candidates = self._prune_candidates(F_k, candidates_iter, k)
+            if self.stats is not None:
+                self._count('candidates_generated', k, len(candidates_iter))
+                self._count('candidates_pruned', k, len(candidates_iter) - len(candidates))
 
             # Compute support of potential candidates
             F_k = []
-            for candidate in candidates:
-                support = self._compute_support(candidate)
-                if support >= min_support:
-                    F_k.append(candidate)
-                    self._frequent_patterns[frozenset(candidate)] = support
+            n_counted = 0
+            with self._phase('support_counting'):
+                for candidate in candidates:
+                    itemset = frozenset(candidate)
+                    support = known_supports.get(itemset)
+                    if support is None:
+                        support = self._compute_support(candidate)
+                        n_counted += 1
+                    if self._frontier is not None:
+                        self._frontier[itemset] = support
+                    if support >= self._min_support_now(min_support):
+                        F_k.append(candidate)
+                        self._save(itemset, support)
+            self._count('candidates_counted', k, n_counted)
+            self._count('frequent', k, len(F_k))
 
             k += 1
 
@@ -94,3 +130,4 @@ if __name__ == "__main__":
     
     print(data)
     print(alg.get_results())
+    print(alg.association_rules(min_confidence=0.6))
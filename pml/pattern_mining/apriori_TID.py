@@ -2,16 +2,18 @@
 from itertools import combinations
 import pandas as pd
 
-from pml.base import FPMiner
+from pml.base import FPMiner, interruptible, cached
 
 
 class AprioriTID(FPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
         # Convert input into a vertical format
         self.TID_lists = self._create_vertical_db()
 
+    @cached
+    @interruptible
     def run(self, min_support: float):
         """
         Run the Apriori-TID algorithm.
@@ -22,26 +24,36 @@ class AprioriTID(FPMiner):
         for item, TID_list in self.TID_lists.items():
             support = len(TID_list) / self.n_transactions
             if support >= min_support:
-                self._frequent_patterns[frozenset([item])] = support
+                self._save(frozenset([item]), support)
                 F_k.append(set([item]))
 
+        self._count('frequent', 1, len(F_k))
+
         # k >= 2
         k = 2
         while F_k:
+            self._checkpoint(k)
 
             # Generate k-itemsets
-            candidates_iter = self._generate_candidates(F_k, k)
+            with self._phase('candidate_generation'):
+                candidates_iter = list(self._generate_candidates(F_k, k))
 
             # Pruning
-            candidates = self._prune_candidates(F_k, candidates_iter, k)
+            with self._phase('pruning'):
+                candidates = self._prune_candidates(F_k, candidates_iter, k)
+            self._count('candidates_generated', k, len(candidates_iter))
+            self._count('candidates_pruned', k, len(candidates_iter) - len(candidates))
 
             # Compute support of potential candidates
             F_k = []
-            for candidate in candidates:
-                support = self._compute_support(candidate)
-                if support >= min_support:
-                    F_k.append(candidate)
-                    self._frequent_patterns[frozenset(candidate)] = support
+            with self._phase('support_counting'):
+                for candidate in candidates:
+                    support = self._compute_support(candidate)
+                    if support >= min_support:
+                        F_k.append(candidate)
+                        self._save(frozenset(candidate), support)
+            self._count('candidates_counted', k, len(candidates))
+            self._count('frequent', k, len(F_k))
 
             k += 1
 
@@ -80,6 +92,7 @@ class AprioriTID(FPMiner):
                 return 0
             item_indexes = self.TID_lists[item]
             indexes = item_indexes if indexes is None else indexes.intersection(item_indexes)
+        self._count('intersections', len(candidate), len(candidate) - 1)
         return len(indexes) / self.n_transactions if indexes else 0
 
 
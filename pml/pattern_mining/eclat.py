@@ -1,63 +1,254 @@
 
+import numpy as np
 import pandas as pd
 
-from pml.base import FPMiner
+from pml.base import FPMiner, interruptible, cached
 
 
 class Eclat(FPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    update_ignored_args = ('representation',)
 
-        # Convert input into a vertical format
-        self.TID_lists = self._create_vertical_db()
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
-    def run(self, min_support: float):
+        # Convert input into a vertical format, except for a store, whose TID-lists
+        # are read from its memory-mapped arrays for the frequent items only
+        self.TID_lists = self._create_vertical_db() if self._store is None else None
+
+    @cached
+    @interruptible
+    def run(self, min_support: float = None, mode='all', top_k=None, representation='tidset'):
         """
         Run the Eclat algorithm.
+
+        mode is 'all' for all frequent itemsets, 'closed' for closed itemsets
+        (CHARM) or 'maximal' for maximal itemsets (MaxEclat).
+        With top_k, the top_k itemsets of highest support are found instead,
+        above min_support if given (see pml.base.topk).
+        representation is how the transactions of an itemset are held in mode
+        'all': 'tidset' for TID-lists, 'bitset' for bitsets as Python integers,
+        or 'diffset' for the TIDs of its prefix without it (dEclat, from Zaki
+        and Gouda, Fast Vertical Mining Using Diffsets, 2003), much smaller
+        than TID-lists on dense data.
         """
+        if mode not in ('all', 'closed', 'maximal'):
+            raise ValueError(f'Invalid mode: {mode}.')
+        if representation not in ('tidset', 'bitset', 'diffset'):
+            raise ValueError(f'Invalid representation: {representation}.')
+        if min_support is None and top_k is None:
+            raise ValueError('Either min_support or top_k must be given.')
+        if top_k is not None and mode != 'all':
+            raise ValueError(f'top_k is not supported for {mode} itemsets.')
+        if representation != 'tidset' and mode != 'all':
+            raise ValueError(f'The {representation} representation is not supported for {mode} itemsets.')
+        self.mode = mode
+        self.representation = representation
 
         # Get frequent 1-itemsets
-        R = {
-            frozenset([item]): tid_list 
-            for item, tid_list in self.TID_lists.items()
-            if len(tid_list) / self.n_transactions >= min_support
-        }
+        R = {frozenset([item]): tid_list for item, tid_list in self._frequent_items(min_support).items()}
+
+        self._count('frequent', 1, len(R))
+
+        if mode == 'all':
+            # Process starts with all frequent 1-itemsets
+            self._eclat({itemset: self._cover(tid_list) for itemset, tid_list in R.items()}, min_support)
+            return
 
-        # Process starts with all frequent 1-itemsets
-        self._eclat(R, min_support)
+        # CHARM processes itemsets by increasing support, which favors merges
+        P = sorted(
+            ([itemset, self._cover(tid_list)[0]] for itemset, tid_list in R.items()),
+            key=lambda x: len(x[1])
+        )
+        # Closed itemsets indexed by (support, sum of the TIDs) for subsumption checks
+        self._closed_hash = {}
+        # Maximal itemsets indexed by item, for containment checks
+        self._maximal = {}
+        self._charm(P, min_support, mode)
 
     def _eclat(self, R, min_support):
         """
         Main recursive function of the Eclat algorithm.
-        R is a dictionary of frequent itemsets with their TID-lists.
+        R is a dictionary of frequent itemsets with their (cover, count), the
+        cover being a TID-list, a bitset or a diffset (see _cover).
         """
-        # print('\nR =', R)
-        for itemset, TID_list in R.items():
-            # print(f'\t itemset={itemset}, tid={TID_list}')
+        itemsets = R.items()
+        if self._top_k is not None:
+            # Save the whole class, then explore the itemsets of highest support
+            # first, so that the threshold of the top-k run rises quickly
+            itemsets = sorted(itemsets, key=lambda x: -x[1][1])
+            for itemset, (cover, count) in itemsets:
+                self._save(itemset, count / self.n_transactions)
 
-            # Add frequent patterns
-            self._frequent_patterns[itemset] = len(TID_list) / self.n_transactions
+        for itemset, (cover, count) in itemsets:
+            self._checkpoint(len(itemset), itemset)
+            if self._top_k is not None:
+                if count / self.n_transactions < self._min_support_now(min_support):
+                    # Below the threshold, which rose since R was built
+                    continue
+            else:
+                # Add frequent patterns
+                self._save(itemset, count / self.n_transactions)
             
             # Generate k+1-itemsets that are extensions of the current itemset
             E = {}
             for candidate, other in self._generate_candidates(itemset, R):
-                # print('\t\t candidate =', candidate, 'other =', other)
+                if R[other][1] / self.n_transactions < self._min_support_now(min_support):
+                    continue
                 
-                # Compute TID-list of the candidate and its support
-                tid = set.intersection(
-                    R[itemset], R[other]
-                )
-                # print('\t\t tid =', tid)
-                support = len(tid) / self.n_transactions
-                if support < min_support:
-                    continue 
+                # Compute the cover of the candidate and its support
+                candidate_cover, candidate_count = self._join(cover, count, R[other][0], len(itemset))
+                self._count('intersections', len(candidate))
+                support = candidate_count / self.n_transactions
+                if support < self._min_support_now(min_support):
+                    continue
+                self._count('frequent', len(candidate))
 
                 # Add to E
-                E[candidate] = tid
+                E[candidate] = (candidate_cover, candidate_count)
 
-                # Continue depth-first search
+            # Continue depth-first search with all the extensions at once, so
+            # that each itemset is only explored (and emitted) once
+            if E:
                 self._eclat(E, min_support)
-    
+
+    def _frequent_items(self, min_support):
+        """
+        TID-lists of the frequent items. Those of a store are its arrays, with
+        the counts of the items read from its offsets.
+        """
+        threshold = self._min_support_now(min_support)
+        if self.TID_lists is not None:
+            return {
+                item: tid_list for item, tid_list in self.TID_lists.items()
+                if len(tid_list) / self.n_transactions >= threshold
+            }
+        counts = np.diff(self._store.tid_indptr)
+        frequent = np.flatnonzero(counts / self.n_transactions >= threshold)
+        return {int(code): self._store.tid_list(code) for code in frequent}
+
+    def _cover(self, tid_list):
+        """
+        Cover of a 1-itemset in the representation of the run, with its count.
+        In the diffset representation, 1-itemsets keep their TID-list, from
+        which the diffsets of 2-itemsets are computed (see _join).
+        """
+        if isinstance(tid_list, np.ndarray):
+            # Array of a store: bitsets are packed from it without a set
+            if self.representation == 'bitset':
+                bits = np.zeros(self.n_transactions, dtype=bool)
+                bits[tid_list] = True
+                return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little'), len(tid_list)
+            tid_list = set(tid_list.tolist())
+        if self.representation == 'bitset':
+            bits = bytearray((self.n_transactions + 7) // 8)
+            for tid in tid_list:
+                bits[tid >> 3] |= 1 << (tid & 7)
+            return int.from_bytes(bits, 'little'), len(tid_list)
+        return tid_list, len(tid_list)
+
+    def _join(self, cover, count, other_cover, k):
+        """
+        Cover and count of PXY from those of PX and the cover of PY, where PX
+        and PY have k items.
+        """
+        if self.representation == 'diffset':
+            # d(XY) = t(X) - t(Y), d(PXY) = d(PY) - d(PX), and support(PXY) = support(PX) - |d(PXY)|
+            diffset = cover - other_cover if k == 1 else other_cover - cover
+            return diffset, count - len(diffset)
+        intersection = cover & other_cover
+        if self.representation == 'bitset':
+            return intersection, bin(intersection).count('1')
+        return intersection, len(intersection)
+
+    def _charm(self, P, min_support, mode):
+        """
+        Main recursive function of CHARM, from Zaki and Hsiao, CHARM: An Efficient
+        Algorithm for Closed Itemset Mining (2002).
+        P is a list of [itemset, TID-list] pairs of an equivalence class.
+
+        For a pair (Xi, ti) and each following pair (Xj, tj):
+        1. ti == tj: Xj is merged into Xi and removed.
+        2. ti < tj: Xj is merged into Xi.
+        3. ti > tj: Xj is removed, Xi + Xj is added to the new class.
+        4. otherwise: Xi + Xj is added to the new class.
+        In maximal mode, itemsets without frequent extension that are not
+        contained in a maximal itemset found before are maximal (MaxEclat).
+        """
+        for i in range(len(P)):
+            X_i, t_i = P[i]
+            if X_i is None:
+                continue
+            self._checkpoint(len(X_i), X_i)
+
+            P_i = []
+            for j in range(i + 1, len(P)):
+                X_j, t_j = P[j]
+                if X_j is None:
+                    continue
+                t = t_i & t_j
+                self._count('intersections', len(X_i) + 1)
+                if len(t) / self.n_transactions < min_support:
+                    continue
+                if t_i == t_j:
+                    P[j][0] = None
+                    X_i = X_i | X_j
+                elif t_i < t_j:
+                    X_i = X_i | X_j
+                elif t_i > t_j:
+                    P[j][0] = None
+                    P_i.append([X_i | X_j, t])
+                else:
+                    P_i.append([X_i | X_j, t])
+
+            # Itemsets of the new class all contain the final Xi
+            if P_i:
+                P_i = sorted(([X | X_i, t] for X, t in P_i), key=lambda x: len(x[1]))
+                self._count('frequent', len(X_i) + 1, len(P_i))
+                if mode == 'maximal' and self._is_contained(X_i.union(*(X for X, _ in P_i))):
+                    # All the itemsets of the class are in a maximal itemset found before
+                    self._count('safe_prunings', len(X_i) + 1)
+                    continue
+                self._charm(P_i, min_support, mode)
+
+            if mode == 'closed':
+                self._save_closed(X_i, t_i)
+            elif not P_i:
+                self._save_maximal(X_i, t_i)
+
+    def _save_closed(self, itemset, tid_list):
+        """
+        Save an itemset unless it is subsumed by a closed itemset with the same
+        TID-list, i.e., a superset with the same support and sum of TIDs.
+        """
+        self._count('closure_checks', len(itemset))
+        key = (len(tid_list), sum(tid_list))
+        closed = self._closed_hash.setdefault(key, [])
+        if any(itemset <= other for other in closed):
+            return
+        closed.append(itemset)
+        self._count('closed', len(itemset))
+        self._save(itemset, len(tid_list) / self.n_transactions)
+
+    def _save_maximal(self, itemset, tid_list):
+        """
+        Save an itemset unless it is contained in a maximal itemset found before.
+        """
+        self._count('closure_checks', len(itemset))
+        if self._is_contained(itemset):
+            return
+        for item in itemset:
+            self._maximal.setdefault(item, []).append(itemset)
+        self._count('maximal', len(itemset))
+        self._save(itemset, len(tid_list) / self.n_transactions)
+
+    def _is_contained(self, itemset):
+        """
+        Check if an itemset is contained in a maximal itemset found before, among
+        those containing its least common item.
+        """
+        candidates = min((self._maximal.get(item, ()) for item in itemset), key=len)
+        return any(itemset <= other for other in candidates)
+
     def _generate_candidates(self, itemset, itemsets):
         """
         Create k+1 extensions.
@@ -75,8 +266,8 @@ class Eclat(FPMiner):
             # Get extension
             extension = other[-1]
 
-            # If extension is not already in the input set, create a new extended set
-            if extension not in itemset:
+            # Only extend with greater items, so that each itemset is generated once
+            if extension > itemset[-1]:
                 yield frozenset(itemset + [extension]), frozenset(other)
 
 
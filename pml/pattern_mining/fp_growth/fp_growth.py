@@ -1,94 +1,179 @@
-
 from collections import defaultdict
+from math import ceil
 import pandas as pd
 
-from pml.base import FPMiner
-from fp_tree import FPTree
+from pml.base import FPMiner, interruptible, cached
+from pml.pattern_mining.fp_growth.fp_tree import FPTree, PatternTree
+
 
-"""
-WIP
-"""
 class FPGrowth(FPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
-    def run(self, min_support):
+    @cached
+    @interruptible
+    def run(self, min_support, mode='all'):
         """
         Executes the FP-Growth algorithm on the input data with the given minimum support.
-        
+
         Parameters:
         min_support (float): Minimum support threshold as a fraction of the total transactions.
+        mode (str): 'all' for all frequent itemsets, 'closed' for closed itemsets
+            (FPClose) or 'maximal' for maximal itemsets (FPMax).
 
         Note:
-        This implementation does not rely on transforming the min_support value into a min_count parameter
-        like most other implementations. 
+        In closed and maximal modes, the itemsets found so far are kept in a
+        CFI-tree or MFI-tree, checked during mine_tree to prune the conditional
+        trees whose itemsets are all subsumed, so that the frequent itemsets
+        are never all enumerated.
         """
-        self.results = self.find_frequent_itemsets(self.data, min_support)
+        if mode not in ('all', 'closed', 'maximal'):
+            raise ValueError(f'Invalid mode: {mode}.')
+        self.mode = mode
+        self.find_frequent_itemsets(self.transactions, min_support)
 
-    def find_frequent_itemsets(self, df, min_support):
-        transactions = df['items'].tolist()
+    def find_frequent_itemsets(self, transactions, min_support):
         item_counts = defaultdict(int)
         n_transactions = len(transactions)
 
         # First pass: count item frequencies
         for transaction in transactions:
-            for item in transaction:
+            for item in set(transaction):
                 item_counts[item] += 1
-        
+
         # Filter items by min_support
-        min_count = min_support * n_transactions
-        print('min_count =', min_count)
+        min_count = ceil(min_support * n_transactions - 1e-9)
+        # print('min_count =', min_count)
         frequent_items = {item: count for item, count in item_counts.items() if count >= min_count}
-        
+        self._count('frequent', 1, len(frequent_items))
+
         if not frequent_items:
-            return []
+            return
+
+        # Items are ordered by decreasing frequency in all the trees, ties broken by code
+        ordered_items = sorted(frequent_items, key=lambda x: (-frequent_items[x], x))
+        self.rank = {item: idx for idx, item in enumerate(ordered_items)}
 
         # Second pass: build the FP-tree
         fp_tree = FPTree()
         for transaction in transactions:
-            filtered_transaction = [item for item in transaction if item in frequent_items]
-            ordered_transaction = sorted(filtered_transaction, key=lambda x: -frequent_items[x])
+            filtered_transaction = {item for item in transaction if item in frequent_items}
+            ordered_transaction = sorted(filtered_transaction, key=self.rank.get)
             fp_tree.insert_transaction(ordered_transaction)
-        
+
         # Recursive mining
-        return self.mine_tree(fp_tree, min_count)
+        if self.mode == 'all':
+            self.mine_tree(fp_tree, [], min_count)
+            return
+        # Trees of the closed or maximal itemsets found so far, conditional on each head
+        pattern_tree = PatternTree(self.rank)
+        self._pattern_trees = [(pattern_tree, set())]
+        self.mine_tree(fp_tree, [], min_count, pattern_tree)
 
-    def mine_tree(self, tree, min_count):
-        frequent_itemsets = []
-        items = sorted(tree.header_table.keys(), key=lambda x: -len(tree.header_table[x]))
+    def mine_tree(self, tree, head, min_count, pattern_tree=None):
+        """
+        Mine the itemsets extending head with the items of its conditional tree.
+        Items are processed from the least frequent, so that the supersets of an
+        itemset are found before it in closed and maximal modes. pattern_tree is
+        then the conditional CFI-tree or MFI-tree of head.
+        """
+        items = sorted(tree.header_table.keys(), key=self.rank.get, reverse=True)
         for item in items:
-            support = sum(node.count for node in tree.header_table[item])
-            if support >= min_count:
-                frequent_itemsets.append(([item], support))
-                conditional_patterns = tree.get_conditional_patterns(item)
-                conditional_tree = self.build_conditional_tree(conditional_patterns, min_count)
-                if conditional_tree:
-                    suffix_itemsets = self.mine_tree(conditional_tree, min_count)
-                    for suffix_itemset, suffix_support in suffix_itemsets:
-                        frequent_itemsets.append(([item] + suffix_itemset, suffix_support))
-        return frequent_itemsets
-
-    def build_conditional_tree(self, conditional_patterns, min_count):
-        conditional_tree = FPTree()
+            support = tree.support(item)
+            if support < min_count:
+                continue
+            itemset = head + [item]
+            self._checkpoint(len(itemset), itemset)
+
+            conditional_patterns = tree.get_conditional_patterns(item)
+            item_counts = self.count_items(conditional_patterns)
+            tail = {i for i, count in item_counts.items() if count >= min_count}
+
+            if self.mode == 'all':
+                self._save(frozenset(itemset), support / self.n_transactions)
+
+            elif self.mode == 'closed':
+                # Skip itemsets of a closed itemset found before, and all their extensions
+                self._count('closure_checks', len(itemset))
+                if pattern_tree.contains_superset([item], support):
+                    self._count('safe_prunings', len(itemset))
+                    continue
+
+                # Items in all the transactions of the itemset belong to its closure
+                closure = {i for i in tail if item_counts[i] == support}
+                itemset = itemset + sorted(closure, key=self.rank.get)
+                tail -= closure
+                self._insert_pattern(itemset, support)
+                self._count('closed', len(itemset))
+                self._save(frozenset(itemset), support / self.n_transactions)
+
+            else:
+                # FPMax look-ahead: skip if the itemset and its tail are in a maximal itemset
+                self._count('closure_checks', len(itemset))
+                if pattern_tree.contains_superset([item, *tail]):
+                    self._count('safe_prunings', len(itemset))
+                    continue
+                if not tail:
+                    self._save_maximal(itemset, support)
+                    continue
+
+            if not tail:
+                continue
+            conditional_tree = self.build_conditional_tree(conditional_patterns, tail)
+            self._count('frequent', len(itemset) + 1, len(tail))
+
+            if self.mode == 'all':
+                self.mine_tree(conditional_tree, itemset, min_count)
+                continue
+
+            if self.mode == 'maximal':
+                # A single path and the itemset form a frequent itemset, maximal
+                # since the look-ahead found no superset
+                path = conditional_tree.single_path()
+                if path is not None:
+                    self._save_maximal(itemset + path, conditional_tree.support(path[-1]))
+                    continue
+
+            conditional_pattern_tree = pattern_tree.project(item, tail)
+            self._pattern_trees.append((conditional_pattern_tree, set(itemset)))
+            self.mine_tree(conditional_tree, itemset, min_count, conditional_pattern_tree)
+            self._pattern_trees.pop()
+
+    def count_items(self, conditional_patterns):
         item_counts = defaultdict(int)
         for path, count in conditional_patterns:
             for item in path:
                 item_counts[item] += count
-        
-        # Filter items by min_support
-        frequent_items = {item: count for item, count in item_counts.items() if count >= min_count}
-        if not frequent_items:
-            return None
+        return item_counts
 
-        # Insert filtered and ordered conditional patterns into the new FP-tree
+    def build_conditional_tree(self, conditional_patterns, frequent_items):
+        """
+        Insert the frequent items of the conditional patterns into a new FP-tree.
+        """
+        conditional_tree = FPTree()
         for path, count in conditional_patterns:
-            filtered_path = [item for item in path if item in frequent_items]
-            ordered_path = sorted(filtered_path, key=lambda x: -frequent_items[x])
+            ordered_path = [item for item in path if item in frequent_items]
             if ordered_path:
                 conditional_tree.insert_transaction(ordered_path, count)
 
         return conditional_tree
 
+    def _save_maximal(self, itemset, support):
+        """
+        Save a maximal itemset.
+        """
+        self._insert_pattern(itemset)
+        self._count('maximal', len(itemset))
+        self._save(frozenset(itemset), support / self.n_transactions)
+
+    def _insert_pattern(self, itemset, count=0):
+        """
+        Insert a closed or maximal itemset into the pattern trees of its heads.
+        """
+        itemset = sorted(itemset, key=self.rank.get)
+        for pattern_tree, head in self._pattern_trees:
+            pattern_tree.insert([item for item in itemset if item not in head], count, ordered=True)
+
 
 if __name__ == "__main__":
 
@@ -100,6 +185,9 @@ if __name__ == "__main__":
     })
     alg = FPGrowth(data, 'items')
     alg.run(min_support=0.5)
-    
+
     print(data)
     print(alg.get_results())
+
+    alg.run(min_support=0.4, mode='maximal')
+    print(alg.get_results())
@@ -1,4 +1,3 @@
-
 from collections import defaultdict
 
 
@@ -22,7 +21,7 @@ class FPTree:
         current_node = self.root
         for item in transaction:
             if item not in current_node.children:
-                new_node = FPNode(item)
+                new_node = FPNode(item, 0)
                 new_node.parent = current_node
                 current_node.children[item] = new_node
                 self.header_table[item].append(new_node)
@@ -39,4 +38,91 @@ class FPTree:
                 parent = parent.parent
             if path:
                 conditional_patterns.append((path[::-1], node.count))
-        return conditional_patterns
\ No newline at end of file
+        return conditional_patterns
+
+    def support(self, item):
+        """
+        Number of transactions containing an item.
+        """
+        return sum(node.count for node in self.header_table[item])
+
+    def single_path(self):
+        """
+        Return the items of the tree if it is a single path, None otherwise.
+        """
+        path = []
+        node = self.root
+        while node.children:
+            if len(node.children) > 1:
+                return None
+            node = next(iter(node.children.values()))
+            path.append(node.item)
+        return path
+
+
+class PatternTree:
+    """
+    Prefix tree of the closed (CFI-tree) or maximal (MFI-tree) itemsets found so
+    far, from Grahne and Zhu, Efficiently Using Prefix-trees in Mining Frequent
+    Itemsets (2003). Itemsets are inserted with their items in a fixed order, and
+    each node holds the highest count of the itemsets through it.
+    A conditional tree holds the itemsets containing a given itemset, without it.
+    """
+
+    def __init__(self, rank):
+        self.rank = rank
+        self.root = FPNode(None, 0)
+        self.header_table = defaultdict(list)
+
+    def insert(self, itemset, count=0, ordered=False):
+        current_node = self.root
+        for item in (itemset if ordered else sorted(itemset, key=self.rank.get)):
+            child = current_node.children.get(item)
+            if child is None:
+                child = FPNode(item, count)
+                child.parent = current_node
+                current_node.children[item] = child
+                self.header_table[item].append(child)
+            elif child.count < count:
+                child.count = count
+            current_node = child
+
+    def contains_superset(self, itemset, count=0):
+        """
+        Check if a superset of an itemset with at least a given count was inserted.
+        Supersets go through a node of the last item of the itemset in the order
+        of the tree, whose ancestors hold its other items.
+        """
+        items = sorted(itemset, key=self.rank.get)
+        for node in self.header_table[items[-1]]:
+            if node.count < count:
+                continue
+            # Ancestors come in decreasing order: stop once past the next item
+            k = len(items) - 2
+            parent = node.parent
+            while k >= 0 and parent.item is not None:
+                if parent.item == items[k]:
+                    k -= 1
+                elif self.rank[parent.item] < self.rank[items[k]]:
+                    break
+                parent = parent.parent
+            if k < 0:
+                return True
+        return False
+
+    def project(self, item, items):
+        """
+        Conditional tree of an item: the itemsets containing it, restricted to
+        the given items.
+        """
+        conditional_tree = PatternTree(self.rank)
+        for node in self.header_table[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                if parent.item in items:
+                    path.append(parent.item)
+                parent = parent.parent
+            if path:
+                conditional_tree.insert(path[::-1], node.count, ordered=True)
+        return conditional_tree
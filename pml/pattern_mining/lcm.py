@@ -0,0 +1,161 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from math import ceil
+import pandas as pd
+
+from pml.base import FPMiner, interruptible, cached
+
+
+class LCM(FPMiner):
+    """
+    Closed itemset miner, following LCM ver. 2 from Uno et al., LCM ver. 2:
+    Efficient Mining Algorithms for Frequent/Closed/Maximal Itemsets (2004).
+
+    Closed itemsets are enumerated as a tree by prefix-preserving closure (ppc)
+    extension: the closure of P + e is a child of P if it adds no item smaller
+    than e. Each closed itemset is reached once, without storing the previous
+    ones, so the time per closed itemset is polynomial.
+
+    Items are renamed by increasing frequency, so that few extensions fail the
+    ppc check. The occurrences of all the extensions of P are computed in one
+    scan of its conditional database (occurrence deliver). Conditional
+    databases drop the infrequent items and the items of the closure, and
+    identical transactions are merged with a weight; only the items greater
+    than the extension must be identical, the smaller ones being replaced by
+    their intersection, which is all the ppc check needs.
+    """
+
+    # Closed itemsets are not maintained by update
+    supports_update = False
+
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
+
+    @cached
+    @interruptible
+    def run(self, min_support: float):
+        """
+        Run the LCM algorithm.
+        """
+        min_count = ceil(min_support * self.n_transactions - 1e-9)
+
+        # Rename frequent items by increasing frequency
+        counts = Counter(item for transaction in self.transactions for item in set(transaction))
+        frequent_items = sorted(
+            (item for item, count in counts.items() if count >= min_count),
+            key=lambda x: (counts[x], x)
+        )
+        self._count('frequent', 1, len(frequent_items))
+        if not frequent_items:
+            return
+        self.rank_to_item = frequent_items
+        rank = {item: idx for idx, item in enumerate(frequent_items)}
+
+        # Merge identical transactions, without infrequent items
+        weights = Counter(
+            tuple(sorted({rank[item] for item in transaction if item in rank}))
+            for transaction in self.transactions
+        )
+        self._count('merged_transactions', 0, self.n_transactions - len(weights))
+
+        # The closure of the empty itemset holds the items of all the transactions
+        closure = [r for r in range(len(frequent_items)) if counts[frequent_items[r]] == self.n_transactions]
+        if closure:
+            self._save_closed(closure, self.n_transactions)
+        database = [
+            (tuple(r for r in transaction if r not in closure), weight)
+            for transaction, weight in weights.items()
+        ]
+        self._lcm(closure, database, -1, min_count)
+
+    def _lcm(self, P, database, core, min_count):
+        """
+        Main recursive function of the LCM algorithm.
+        P is a closed itemset, database its conditional database as a list of
+        (transaction, weight) pairs, and core the item it was extended with.
+        Transactions are sorted tuples of ranks without the items of P.
+        """
+        self._checkpoint(len(P) + 1, P)
+
+        # Occurrence deliver: transactions and frequency of each extension
+        occurrences = defaultdict(list)
+        frequency = defaultdict(int)
+        for t, (transaction, weight) in enumerate(database):
+            for item in transaction[bisect_right(transaction, core):]:
+                occurrences[item].append(t)
+                frequency[item] += weight
+
+        for e in sorted(occurrences):
+            if frequency[e] < min_count:
+                continue
+            support = frequency[e]
+            self._count('frequent', len(P) + 1)
+
+            # ppc check: no item smaller than e in all the occurrences
+            smaller = None
+            for t in occurrences[e]:
+                transaction = database[t][0]
+                prefix = transaction[:bisect_left(transaction, e)]
+                smaller = set(prefix) if smaller is None else smaller.intersection(prefix)
+                if not smaller:
+                    break
+            if smaller:
+                self._count('ppc_prunings', len(P) + 1)
+                continue
+
+            # Closure and frequent items of the occurrences, among the greater items
+            counts = defaultdict(int)
+            for t in occurrences[e]:
+                transaction, weight = database[t]
+                for item in transaction[bisect_right(transaction, e):]:
+                    counts[item] += weight
+            closure = [item for item, count in counts.items() if count == support]
+            frequent = {item for item, count in counts.items() if min_count <= count < support}
+
+            Q = P + [e] + closure
+            self._save_closed(Q, support)
+            if not frequent:
+                continue
+
+            # Database reduction: keep the frequent greater items, merge the
+            # transactions they make identical and intersect their smaller items
+            merged = {}
+            for t in occurrences[e]:
+                transaction, weight = database[t]
+                suffix = tuple(item for item in transaction[bisect_right(transaction, e):] if item in frequent)
+                if not suffix:
+                    continue
+                prefix = transaction[:bisect_left(transaction, e)]
+                if suffix in merged:
+                    merged[suffix][0].intersection_update(prefix)
+                    merged[suffix][1] += weight
+                else:
+                    merged[suffix] = [set(prefix), weight]
+            self._count('merged_transactions', len(Q), len(occurrences[e]) - len(merged))
+
+            conditional_database = [
+                (tuple(sorted(prefix)) + suffix, weight)
+                for suffix, (prefix, weight) in merged.items()
+            ]
+            self._lcm(Q, conditional_database, e, min_count)
+
+    def _save_closed(self, itemset, count):
+        """
+        Save a closed itemset given by ranks.
+        """
+        self._count('closed', len(itemset))
+        self._save(frozenset(self.rank_to_item[r] for r in itemset), count / self.n_transactions)
+
+
+if __name__ == "__main__":
+    data = pd.DataFrame({
+        'items': [
+            ['bread', 'milk'], ['bread', 'diaper', 'beer', 'egg'], ['milk', 'diaper', 'beer', 'coke'],
+            ['bread', 'milk', 'diaper', 'beer'], ['bread', 'milk', 'diaper', 'coke']
+        ]
+    })
+    alg = LCM(data, 'items')
+    alg.run(min_support=0.4)
+
+    print(data)
+    print(alg.get_results())
@@ -2,13 +2,15 @@
 from collections import Counter
 import pandas as pd
 
-from pml.base import FPMiner
+from pml.base import FPMiner, interruptible, cached
 
 
 class PatternGrowth(FPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
+    @cached
+    @interruptible
     def run(self, min_support):
         """
         Run a basic pattern-growth algorithm. 
@@ -24,8 +26,12 @@ class PatternGrowth(FPMiner):
         itemset is  the current itemset.
         """
 
+        self._checkpoint(len(itemset) + 1, itemset)
+
         # Scan db to find all frequent items
-        frequent_items = self._find_frequent_items(db, min_support)
+        with self._phase('scan'):
+            frequent_items = self._find_frequent_items(db, min_support)
+        self._count('frequent', len(itemset) + 1, len(frequent_items))
 
         # Generate k+1-itemsets that are extensions of the current itemset
         for item, support in frequent_items.items():
@@ -34,10 +40,12 @@ class PatternGrowth(FPMiner):
             new_itemset = itemset + [item]
 
             # Save union as a frequent pattern
-            self._frequent_patterns[frozenset(new_itemset)] = support
+            self._save(frozenset(new_itemset), support)
 
             # Project db
-            db_proj = self._project_db(db, item)
+            with self._phase('projection'):
+                db_proj = self._project_db(db, item)
+            self._count('projected_db_size', len(new_itemset), len(db_proj))
 
             # Continue depth-first search
             self._pattern_growth(db_proj, new_itemset, min_support)
@@ -52,12 +60,14 @@ class PatternGrowth(FPMiner):
         counter = Counter()
         for items in db:
             for item in items:
-                counter[item] += 1/self.n_transactions
+                counter[item] += 1
 
+        # Supports are computed from integer counts to avoid accumulated rounding errors
         frequent_items = {}
         for candidate in sorted(counter):
-            if (counter[candidate]) >= min_support:
-                frequent_items[candidate] = counter[candidate]
+            support = counter[candidate] / self.n_transactions
+            if support >= min_support:
+                frequent_items[candidate] = support
 
         return frequent_items
     
@@ -3,7 +3,7 @@ from collections import Counter
 import pandas as pd
 
 from pml.sequential_pattern_mining.AprioriAll.hash_tree import HashTree
-from pml.base import FSPMiner
+from pml.base import FSPMiner, interruptible
 
 
 class AprioriAll(FSPMiner):
@@ -11,9 +11,10 @@ class AprioriAll(FSPMiner):
     AprioriAll from Agrawal and Srikant, Mining Sequential Patterns (1995).
     """
 
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
         
+    @interruptible
     def run(self, min_support=0.4):
         """
         AprioriAll algorithm.
@@ -22,14 +23,16 @@ class AprioriAll(FSPMiner):
         self.frequent_patterns = {}
 
         # k = 1: first scan to compute support of 1-sequences (i.e., 1-itemsets)
+        # Items are counted once per sequence, supports are computed from integer 
+        # counts to avoid accumulated rounding errors
         counter = Counter()
         for sequence in self.sequences:
-            for itemset in sequence:
-                for item in itemset:
-                    counter[item] += 1/self.n_sequences
+            for item in {item for itemset in sequence for item in itemset}:
+                counter[item] += 1
         for candidate in counter:
-            if (counter[candidate]) >= min_support:
-                self.frequent_patterns[((candidate,),)] = counter[candidate]
+            support = counter[candidate] / self.n_sequences
+            if support >= min_support:
+                self.frequent_patterns[((candidate,),)] = support
 
         # k >= 2
         k = 2
@@ -37,18 +40,27 @@ class AprioriAll(FSPMiner):
         print('L_k =', L_k)
         while L_k:
             # print('\n L_k =', L_k)
+            self._checkpoint(k)
 
             # Generate k-sequences
-            C_k = self._generate_candidates(L_k)
+            with self._phase('candidate_generation'):
+                C_k = self._generate_candidates(L_k)
             # print('C_k =', C_k)
+            n_generated = len(C_k)
 
             # Prune candidates
-            C_k = self._prune_candidates(L_k, C_k, k)
+            with self._phase('pruning'):
+                C_k = self._prune_candidates(L_k, C_k, k)
             # print('candidates =', C_k)
+            self._count('candidates_generated', k, n_generated)
+            self._count('candidates_pruned', k, n_generated - len(C_k))
 
             # Compute support and retain frequent candidates
-            L_k, frequent_candidates = self._compute_support(C_k, min_support)
+            with self._phase('support_counting'):
+                L_k, frequent_candidates = self._compute_support(C_k, min_support)
             self.frequent_patterns.update(frequent_candidates)
+            self._count('candidates_counted', k, len(C_k))
+            self._count('frequent', k, len(frequent_candidates))
 
             k += 1
 
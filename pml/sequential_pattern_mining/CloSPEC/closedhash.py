@@ -1,193 +1,177 @@
+from functools import reduce
+from operator import or_
+
 
 class ClosedHash():
 
     def __init__(self):
         self._hash_table = {}
+        self._item_bits = {}
+        self.n_patterns = 0
 
-    def insert(self, P, support):
+    def insert(self, P, support, seq_ids):
         """
         Insert pattern P in a tree.
+
+        Trees are indexed by the support of P and by the sum of the ids of the
+        sequences containing P: a pattern can only include (or be included in) a
+        pattern of equal support if both appear in the same sequences.
         """
         # print(f'\nInserting {P} in tree (support={support})')
 
-        # If support not in hash table, init tree
-        if not support in self._hash_table:
-            self._hash_table[support] = Tree()
+        # If signature not in hash table, init tree
+        key = (support, sum(seq_ids))
+        if not key in self._hash_table:
+            self._hash_table[key] = Tree()
 
         # Insert into tree
-        tree = self._hash_table[support]
-        tree.insert(P)
-    
+        tree = self._hash_table[key]
+        n_patterns = len(tree.patterns)
+        tree.insert(P, self._encode(P))
+        self.n_patterns += len(tree.patterns) - n_patterns
+
+    def _encode(self, P):
+        """
+        Encode each itemset of P as a bitmask of its items.
+        """
+        P_code = []
+        for itemset in P:
+            code = 0
+            for item in itemset:
+                if item not in self._item_bits:
+                    self._item_bits[item] = 1 << len(self._item_bits)
+                code |= self._item_bits[item]
+            P_code.append(code)
+        return tuple(P_code)
+
     @property
     def patterns(self):
-        patterns = [tree.patterns for tree in self._hash_table.values()]
-        return {s: p for s, p in zip(self._hash_table, patterns)}
+        patterns = {}
+        for (support, _), tree in self._hash_table.items():
+            patterns.setdefault(support, []).extend(tree.patterns)
+        return patterns
 
 
 class Tree():
 
     def __init__(self):
-        self.root = Node('∅', level=-1, root=True)
+        self.root = Node('∅', 0, level=-1, root=True)
         self.nodes = [self.root]
         self.patterns = []
+        self._codes = []
+        self._masks = []
 
-    def insert(self, P):
+    def insert(self, P, P_code):
         """
         Insert a pattern P in the tree.
-        """ 
+        P_code is the encoded pattern, i.e., a tuple of itemset bitmasks.
+        """
         # print('\tcurrent patterns =', self.patterns)
-        
+
+        # Bitmask of all the items in P
+        P_mask = reduce(or_, P_code, 0)
+
         # Check inclusion
-        P_is_subseq, P_is_superseq, i_p = self._inclusion_checks(P)
-        # print(f'\tInclusion checks: P_is_subseq={P_is_subseq}; P_is_superseq={P_is_superseq}; i_p={i_p}')
-        
+        P_is_subseq, included = self._inclusion_checks(P_code, P_mask)
+        # print(f'\tInclusion checks: P_is_subseq={P_is_subseq}; included={included}')
+
         # If P is a subsequence of an existing pattern
         if P_is_subseq:
             # print('\t--> pattern already in tree')
             return
 
-        # If an existing pattern is included in P
-        if P_is_superseq:
+        # If existing patterns are included in P, remove them
+        for i_p in reversed(included):
             # print('\t--> reorganizing tree')
-            self._reorganize(P, self.patterns[i_p])
-            
-        # If P not in the tree, add it
-        if (not P_is_subseq) and (not P_is_superseq):
-            # print('\t--> adding pattern in tree')
-            self._add(P)
+            self._remove(self._codes[i_p])
+            del self.patterns[i_p]
+            del self._codes[i_p]
+            del self._masks[i_p]
+
+        # Add P to the tree
+        # print('\t--> adding pattern in tree')
+        self._add(P, P_code)
 
         # Save pattern
-        self.patterns.append(P) 
+        self.patterns.append(P)
+        self._codes.append(P_code)
+        self._masks.append(P_mask)
 
-    def _add(self, P):
+    def _add(self, P, P_code):
         """
         Add a pattern P to the tree.
         """
 
-        # Start from the root
-        current_node = self.root 
-        level = 0
-
-        # Iterate over the itemsets
-        for itemset in P:
-            # Check if a child with the same itemset already exists
-            matching_child = None
-            for child in current_node.children:
-                if set(child.symb) == set(itemset):
-                    matching_child = child
-                    break
-
-            # If no matching child, create a new node
-            if not matching_child:
-                new_node = Node(itemset, level=level)
-                new_node.add_parent(current_node)
-                current_node.add_child(new_node)
-                self.nodes.append(new_node)
-                current_node = new_node
-            else:
-                current_node = matching_child
-
-            level += 1
-
-    def _reorganize(self, P, P_old):
-        """ 
-        Add a pattern to the tree, potentially restructuring it.
-        """
-
-        # Step 1: Find the longest prefix match
-        match_path = self._find_longest_prefix_path(P)
-
-        # Step 2: From the last matched node, add the rest of the pattern
+        # Start from the longest prefix match
+        match_path = self._find_longest_prefix_path(P_code)
         current_node = match_path[-1] if match_path else self.root
         level = current_node.level + 1
+
+        # Add the rest of the pattern
         for i in range(len(match_path), len(P)):
-            itemset = P[i]
-            new_node = Node(itemset, level=level)
+            new_node = Node(P[i], P_code[i], level=level)
             new_node.add_parent(current_node)
             current_node.add_child(new_node)
             self.nodes.append(new_node)
             current_node = new_node
             level += 1
 
-        # Step 3: Clean old pattern
-        self._clean(P_old, len(match_path))
-
-    def _inclusion_checks(self, P):
+    def _remove(self, P_code):
         """
-        Check if P is included in an existing pattern, or if an existing pattern
-        is included in P.
-        
-        Returns a tuple of bools, and the index of the eventual included pattern. 
-        First bool indicates whether P is included in the existing patterns.
-        Second bool indicates whether an existing pattern is included in P.
+        Remove the path corresponding to an encoded pattern.
+        Stored patterns never include each other, so a pattern always ends on
+        a leaf and the path can be cleaned up to the first shared node.
         """
-        
-        # Iterate over the existing patterns
-        for i_p, p in enumerate(self.patterns):
-
-            # Check lengths
-            l1 = len(P)
-            l2 = len(p)
-
-            # P is (strictly) longer than p
-            if l1 > l2:
-                if self._is_subseq(p, P):
-                    return False, True, i_p
-            
-            # p is (strictly) longer than P
-            if l2 > l1:
-                if self._is_subseq(P, p):
-                    return True, False, i_p
-
-            # Equal lengths
-            if l1 == l2:
-                # Compare number of items
-                l1 = sum(len(itemset) for itemset in P)
-                l2 = sum(len(itemset) for itemset in p)
-                if l1 > l2:
-                    if self._is_subseq(p, P):
-                        return False, True, i_p
-                if l2 > l1:
-                    if self._is_subseq(P, p):
-                        return True, False, i_p
-
-        # No match
-        return False, False, -1
-
-    def _clean(self, P, offset):
-        """
-        Remove the path corresponding to P after reorganization.
-        offset corresponds to the number of nodes matched to add the new pattern
-        in the tree: the first 'offset' nodes should not be considered.
-        """
-
-        # Nothing to clean if offset = to pattern length
-        if offset == len(P):
-            return
 
         # Get node path to P
-        node_path = self._find_longest_prefix_path(P)
+        node_path = self._find_longest_prefix_path(P_code)
 
-        # Start cleaning proces
-        for node in reversed(node_path[offset:]):
+        # Start cleaning process
+        for node in reversed(node_path):
             if not node.children:
                 node.parent.children.remove(node)
                 self.nodes.remove(node)
             else:
                 return
 
-    def _find_longest_prefix_path(self, P):
+    def _inclusion_checks(self, P_code, P_mask):
         """
-        Return the path of nodes that match the longest prefix of the pattern.
+        Check if P is included in an existing pattern, or if existing patterns
+        are included in P.
+
+        Returns a bool indicating whether P is included in the existing patterns,
+        and the list of indexes of the existing patterns included in P.
+        Subsequence checks are only run when the item bitmasks allow inclusion.
+        """
+
+        # Iterate over the existing patterns
+        included = []
+        for i_p, (p_code, p_mask) in enumerate(zip(self._codes, self._masks)):
+
+            # P can only be included in p if all its items appear in p
+            if not P_mask & ~p_mask:
+                if self._is_subseq(P_code, p_code):
+                    return True, []
+
+            # p can only be included in P if all its items appear in P
+            if not p_mask & ~P_mask:
+                if self._is_subseq(p_code, P_code):
+                    included.append(i_p)
+
+        return False, included
+
+    def _find_longest_prefix_path(self, P_code):
+        """
+        Return the path of nodes that match the longest prefix of the encoded pattern.
         """
 
         path = []
         current = self.root
-        for itemset in P:
+        for code in P_code:
             match = None
 
             for child in current.children:
-                if set(child.symb) == set(itemset):
+                if child.code == code:
                     match = child
                     break
 
@@ -200,16 +184,18 @@ class Tree():
         return path
 
     @staticmethod
-    def _is_subseq(P1, P2):
+    def _is_subseq(P1_code, P2_code):
         """
-        Check of P1 is a subsequence of P2.
+        Check of encoded pattern P1 is a subsequence of encoded pattern P2.
         """
 
-        n1, n2 = len(P1), len(P2)
+        n1, n2 = len(P1_code), len(P2_code)
+        if n1 > n2:
+            return False
         i1, i2 = 0, 0
 
         while i1 < n1 and i2 < n2:
-            if set(P1[i1]).issubset(set(P2[i2])):
+            if P1_code[i1] & P2_code[i2] == P1_code[i1]:
                 i1 += 1
             i2 += 1
 
@@ -218,15 +204,16 @@ class Tree():
 
 class Node():
 
-    def __init__(self, symb, level, root=False):
+    def __init__(self, symb, code, level, root=False):
         self.symb = symb
+        self.code = code
         self.level = level
         self.is_root = root
         self.parent = None
         self.children = []
-        
+
     def add_parent(self, parent):
         self.parent = parent
 
     def add_child(self, child):
-        self.children.append(child)
\ No newline at end of file
+        self.children.append(child)
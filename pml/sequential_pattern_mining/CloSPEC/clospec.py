@@ -1,14 +1,19 @@
 
-from collections import Counter, defaultdict
+from collections import defaultdict
+from bisect import bisect_left, bisect_right
 import pandas as pd
+import numpy as np
 
 from pml.sequential_pattern_mining.CloSPEC.closedhash import ClosedHash
-from pml.base import FSPMiner
+from pml.base import FSPMiner, interruptible
 
 
 class CloSPEC(FSPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    # Closed patterns with temporal constraints are not maintained by update
+    supports_update = False
+
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
         self.C = {
             'min_support': 1,
@@ -20,6 +25,10 @@ class CloSPEC(FSPMiner):
         self.ht = ClosedHash()
         self.infrequent_items = set()
 
+        # Integer-encoded representation of the sequences
+        self.encoded_sequences = self._encode_sequences()
+
+    @interruptible
     def run(self, C=None):
         """
         Run the CloSPEC algorithm.
@@ -35,6 +44,7 @@ class CloSPEC(FSPMiner):
 
         # Initialization: get all itemsets of size 1
         frequent_items,  self.infrequent_items, occ_by_item = self._get_frequent_items()
+        self._scan_tables = self._build_scan_tables()
         # print('frequent_items =', frequent_items)
         # print('occ_by_item =', occ_by_item)
         # print('infrequent_items =', self.infrequent_items)
@@ -50,16 +60,47 @@ class CloSPEC(FSPMiner):
             # Start process
             self._pattern_growth(new_P, new_occurrences, support)
 
-    def _prepare_sequences(self):
+    def _encode_sequences(self):
         """
-        Prepare sequences from a list of sets from the DataFrame.
-        Transaction data is a list of list of sets.
-        Items need to be sorted in lexicographic order.
+        Encode each sequence as flat arrays of integer-mapped symbols and of their
+        start and end timestamps (in seconds), along with the offsets of the 
+        itemsets in the flat arrays.
         """
-        return [
-            list(map(lambda t: tuple(sorted(t)), row)) 
-            for row in self.data['items']
-        ]
+
+        # Create mapping between symbols and integers
+        self.int_to_item = sorted({
+            item.repr for sequence in self.sequences 
+            for itemset in sequence for item in itemset
+        })
+        self.item_to_int = {item: i for i, item in enumerate(self.int_to_item)}
+
+        # Timestamps are expressed relatively to the first symbol
+        t_ref = next((
+            itemset[0].t_s for sequence in self.sequences 
+            for itemset in sequence if itemset
+        ), None)
+
+        encoded_sequences = []
+        for sequence in self.sequences:
+            items = [item for itemset in sequence for item in itemset]
+            encoded_sequences.append((
+                np.array([self.item_to_int[item.repr] for item in items], dtype=np.int64),
+                np.array([self._to_seconds(item.t_s, t_ref) for item in items], dtype=float),
+                np.array([self._to_seconds(item.t_e, t_ref) for item in items], dtype=float),
+                np.cumsum([0] + [len(itemset) for itemset in sequence]),
+            ))
+
+        return encoded_sequences
+
+    @staticmethod
+    def _to_seconds(t, t_ref):
+        """
+        Convert a timestamp into a number of seconds since t_ref.
+        """
+        delta = t - t_ref
+        if hasattr(delta, 'total_seconds'):
+            return delta.total_seconds()
+        return float(delta)
 
     def _get_frequent_items(self):
         """
@@ -68,12 +109,12 @@ class CloSPEC(FSPMiner):
 
         # Get items and their occurrences 
         candidates = defaultdict(list)
-        for i_seq, sequence in enumerate(self.sequences):
-            for i_itemset, itemset in enumerate(sequence):
-                for i_item, item in enumerate(itemset):
-                    candidates[item.repr].append((
-                        (i_seq, i_itemset, i_item, item.t_s),
-                        (i_seq, i_itemset, i_item, item.t_e)
+        for i_seq, (codes, t_s, t_e, bounds) in enumerate(self.encoded_sequences):
+            for i_itemset in range(len(bounds)-1):
+                for i in range(bounds[i_itemset], bounds[i_itemset+1]):
+                    candidates[self.int_to_item[codes[i]]].append((
+                        (i_seq, i_itemset, i-bounds[i_itemset], t_s[i]),
+                        (i_seq, i_itemset, i-bounds[i_itemset], t_e[i])
                     ))
         
         # Get item support
@@ -119,6 +160,8 @@ class CloSPEC(FSPMiner):
         ##### Debug ######
         # if sum(len(itemset) for itemset in P) > 4:
         #     raise RuntimeError
+
+        self._checkpoint(sum(len(itemset) for itemset in P), P)
         
         # Check anti-monotonic constraints
         ## Minimum support
@@ -133,15 +176,22 @@ class CloSPEC(FSPMiner):
             return
 
         # Closure computation
-        prune, closed, extensions_results = self._closure_computation(P, P_occ, support)
+        with self._phase('closure_computation'):
+            prune, closed, extensions_results = self._closure_computation(P, P_occ, support)
+        depth = sum(len(itemset) for itemset in P)
+        self._count('closure_checks', depth)
+        self._count('occurrences', depth, len(P_occ))
         
         # Safe pruning 
         if prune:
+            self._count('safe_prunings', depth)
             return
 
         # Add pattern to ClosedHash
         if closed:
-            self.ht.insert(P, support)
+            with self._phase('closed_hash'):
+                self.ht.insert(P, support, {occ[0][0] for occ in P_occ})
+            self._count('closed', depth)
         
         # Continue with each extension
         # The pseudo-projection was actually already done during the closure computation,
@@ -159,9 +209,10 @@ class CloSPEC(FSPMiner):
         Closure test.
         """
 
-        # Compute left item extensions
-        l_item_I_extensions, l_item_I_occ = self._get_item_left_I_extensions(P, P_occ)
-        l_item_S_extensions, l_item_S_occ = self._get_item_left_S_extensions(P_occ)
+        # Compute all item extensions in a single scan of the occurrences
+        l_item_I_extensions, l_item_I_occ, l_item_S_extensions, l_item_S_occ, \
+            r_item_I_extensions, r_item_I_occ, r_item_S_extensions, r_item_S_occ \
+                = self._get_item_extensions(P, P_occ)
         # print('\n\tLeft item extensions:')
         # print('\tI-extensions =', l_item_I_extensions, l_item_I_occ)
         # print('\tS-extensions =', l_item_S_extensions, l_item_S_occ)
@@ -173,13 +224,7 @@ class CloSPEC(FSPMiner):
             return True, False, []
         # print('\t\tNo pruning')
 
-        # Compute right item extensions
-        if len(P) == 1: # Left and right I-extensions are identical for 1-patterns
-            r_item_I_extensions = {i: sup for i, sup in l_item_I_extensions.items()}
-            r_item_I_occ = {i: occ for i, occ in l_item_I_occ.items()}
-        else:
-            r_item_I_extensions, r_item_I_occ = self._get_item_right_I_extensions(P, P_occ)
-        r_item_S_extensions, r_item_S_occ = self._get_item_right_S_extensions(P_occ)
+        # Right item extensions
         # print('\n\tRight item extensions:')
         # print('\tI-extensions =', r_item_I_extensions, r_item_I_occ)
         # print('\tS-extensions =', r_item_S_extensions, r_item_S_occ)
@@ -205,221 +250,137 @@ class CloSPEC(FSPMiner):
             closed = False
         return False, closed, [right_extensions, right_extensions_occ]
 
-    def _get_item_left_I_extensions(self, P, P_occ):
+    def _build_scan_tables(self):
         """
-        Get all possible items for left I-extensions of the current pattern.
+        Build, for each encoded sequence, the list of frequent items of each itemset
+        as (position, code, t_s, t_e), and the vector of itemset start times.
         """
+        is_frequent = np.array([
+            item not in self.infrequent_items for item in self.int_to_item
+        ], dtype=bool)
+
+        scan_tables = []
+        for codes, t_s, t_e, bounds in self.encoded_sequences:
+            itemsets = []
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                positions = np.flatnonzero(is_frequent[codes[lo:hi]])
+                itemsets.append(list(zip(
+                    positions.tolist(), codes[lo+positions].tolist(),
+                    t_s[lo+positions].tolist(), t_e[lo+positions].tolist()
+                )))
+            scan_tables.append((itemsets, t_s[bounds[:-1]].tolist()))
+
+        return scan_tables
+
+    def _get_item_extensions(self, P, P_occ):
+        """
+        Get all possible items for left and right I- and S-extensions of the 
+        current pattern, in a single scan of its occurrences.
+
+        Returns the left I-, left S-, right I- and right S-extensions, each as a
+        dictionary {item: support} followed by a dictionary {item: occurrences}.
+        """
+
+        # Items are sorted in each itemset, and so are their codes: left I-extensions
+        # are the items with a lower code than the first item of the pattern, right
+        # I-extensions the items with a greater code than its last item
+        first_code = self.item_to_int[P[0][0]]
+        last_code = self.item_to_int[P[-1][-1]]
+        min_gap = self.C['min_gap']
+        max_gap = self.C['max_gap']
+        I_keys = [f'_{item}' for item in self.int_to_item]
+        S_keys = self.int_to_item
 
         # Iterate over the occurrences of the pattern
-        left_extensions_occ = defaultdict(list)
+        l_I_occ = defaultdict(list)
+        l_S_occ = defaultdict(list)
+        r_I_occ = defaultdict(list)
+        r_S_occ = defaultdict(list)
         for occ in P_occ:
-            sequence = self.sequences[occ[0][0]]
-            itemset = sequence[occ[0][1]]
-
-            # Items at the left of the rightmost item in the pattern's first itemset
-            # should not be considered
-            i_first_item = [item.repr == P[0][-1] for item in itemset].index(True) + 1
-            if i_first_item == len(itemset):
-                continue
-            
-            # Get possible extensions
-            for i_item, item in enumerate(itemset[i_first_item:]):
-                
-                # # Items already present in the pattern should not be considered 
-                # if any(item.repr == i for i in P[0]):
-                #     continue
-
-                # Infrequent items should not be considered
-                if item.repr in self.infrequent_items:
-                    continue
+            (i_seq, i_start_itemset, i_start_item, t_start), \
+                (_, i_end_itemset, i_end_item, t_end) = occ
+            itemsets, T = self._scan_tables[i_seq]
 
-                # Add extension: occ depends on the position of the items in the itemset
-                if occ[0][1] == occ[1][1]: # essentially len(P) == 1
-                    max_item_pos = max(occ[1][2], i_first_item+i_item)
+            # Left I-extensions
+            for pos, code, t_s, _ in itemsets[i_start_itemset]:
+                if code >= first_code:
+                    continue
+                # occ depends on the position of the items in the itemset
+                if i_start_itemset == i_end_itemset: # essentially len(P) == 1
+                    max_item_pos = max(i_end_item, pos)
                 else: # otherwise max occ does not change
-                    max_item_pos = occ[1][2]
-                left_extensions_occ[f'_{item.repr}'].append((
-                    (occ[0][0], occ[0][1], min(occ[0][2], i_first_item+i_item), item.t_s),
-                    (occ[1][0], occ[1][1], max_item_pos, occ[1][-1])
+                    max_item_pos = i_end_item
+                l_I_occ[I_keys[code]].append((
+                    (i_seq, i_start_itemset, min(i_start_item, pos), t_s),
+                    (i_seq, i_end_itemset, max_item_pos, t_end)
                 ))
 
-        # Support computation
-        left_extensions = {}
-        for candidate in sorted(left_extensions_occ):
-            support = len(set([occ[0][0] for occ in left_extensions_occ[candidate]]))/self.n_sequences
-            left_extensions[candidate] = support
-    
-        return left_extensions, left_extensions_occ
-
-    def _get_item_right_I_extensions(self, P, P_occ):
-        """
-        Get all possible items for right I-extensions of the current pattern.
-        """
-
-        # Iterate over the occurrences of the pattern
-        right_extensions_occ = defaultdict(list)
-        for occ in P_occ:
-            sequence = self.sequences[occ[1][0]]
-            itemset = sequence[occ[1][1]]
-
-            # Items at the left of the rightmost item in the pattern's last itemset
-            # should not be considered
-            i_first_item = [item.repr == P[-1][-1] for item in itemset].index(True) + 1
-            if i_first_item == len(itemset):
-                continue
-            
-            # Get possible extensions
-            for i_item, item in enumerate(itemset[i_first_item:]):
-                
-                # # Items already present in the pattern should not be considered 
-                # if any(item.repr == i for i in P[-1]):
-                #     continue
-
-                # If item is infrequent it should not be considered
-                if item.repr in self.infrequent_items:
+            # Right I-extensions
+            for pos, code, _, t_e in itemsets[i_end_itemset]:
+                if code <= last_code:
                     continue
-
-                # Add extension: occ depends on the position of the items in the itemset 
-                right_extensions_occ[f'_{item.repr}'].append((
-                    (occ[0][0], occ[0][1], occ[0][2], occ[0][-1]),
-                    (occ[1][0], occ[1][1], max(occ[1][2], i_first_item+i_item), item.t_e)
+                r_I_occ[I_keys[code]].append((
+                    occ[0],
+                    (i_seq, i_end_itemset, max(i_end_item, pos), t_e)
                 ))
 
-        # Support computation
-        right_extensions = {}
-        for candidate in sorted(right_extensions_occ):
-            support = len(set([occ[0][0] for occ in right_extensions_occ[candidate]]))/self.n_sequences
-            right_extensions[candidate] = support
-    
-        return right_extensions, right_extensions_occ
-
-    def _get_item_left_S_extensions(self, P_occ):
-        """
-        Get all possible items for left S-extensions of the current pattern.
-        """
-
-        # Iterate over the occurrences of the pattern
-        left_extensions_occ = defaultdict(list)
-        for occ in P_occ:
-            sequence = self.sequences[occ[0][0]]
-
-            # If occ occurs in the first itemset of the sequence, no possible left S-extensions
-            i_start_itemset = occ[0][1]
-            if i_start_itemset == 0:
-                continue
-
-            # Early stop condition if max_gap not respected
-            early_stop = False
-
-            # Iterate over the itemsets before
-            for i_itemset, itemset in enumerate(sequence[i_start_itemset-1::-1]):
-                if early_stop:
-                    break
-                
-                # Min and max gap constraints can be applied at the itemset scale as all items in 
-                # the itemset appear at the same time
-                if self.C['min_gap']:
-                    first_item = itemset[0]
-                    gap = (occ[0][-1]-first_item.t_s).total_seconds()
-                    if gap <= self.C['min_gap']:
-                        continue 
-                if self.C['max_gap']:
-                    first_item = itemset[0]
-                    gap = (occ[0][-1]-first_item.t_s).total_seconds()
-                    if gap > self.C['max_gap']:
-                        early_stop = True
-                        break 
-                
-                # Iterate over the items and ensure max gap constraint
-                for i_item, item in enumerate(itemset):
-                    
-                    # If item is infrequent it should not be considered
-                    if item.repr in self.infrequent_items:
-                        continue
-                    
-                    left_extensions_occ[item.repr].append((
-                        (occ[0][0], i_start_itemset-i_itemset-1, i_item, item.t_s),
+            # Min and max gap constraints can be applied at the itemset scale as all
+            # items in the itemset appear at the same time. Itemsets are sorted in
+            # time, so valid itemsets are found by bisecting their start times
+            # Left S-extensions: itemsets before the pattern, closest first
+            lo, hi = 0, i_start_itemset
+            if min_gap:
+                hi = min(hi, bisect_left(T, t_start - min_gap))
+            if max_gap:
+                lo = bisect_left(T, t_start - max_gap)
+            for i_itemset in range(hi-1, lo-1, -1):
+                for pos, code, t_s, _ in itemsets[i_itemset]:
+                    l_S_occ[S_keys[code]].append((
+                        (i_seq, i_itemset, pos, t_s),
                         occ[1],
                     ))
 
-        # Support computation
-        left_extensions = {}
-        for candidate in sorted(left_extensions_occ):
-            support = len(set([occ[0][0] for occ in left_extensions_occ[candidate]]))/self.n_sequences
-            left_extensions[candidate] = support
-    
-        return left_extensions, left_extensions_occ
-
-    def _get_item_right_S_extensions(self, P_occ):
-        """
-        Get all possible items for right S-extensions of the current pattern.
-        """
-
-        # Iterate over the occurrences of the pattern
-        right_extensions_occ = defaultdict(list)
-        for occ in P_occ:
-            sequence = self.sequences[occ[1][0]]
-
-            # If occ occurs in the last itemset of the sequence, no possible right S-extensions
-            i_start_itemset = occ[1][1]
-            if i_start_itemset == len(sequence):
-                continue
-
-            # Early stop condition if max_gap not respected
-            early_stop = False
-
-            # Iterate over the itemsets before
-            for i_itemset, itemset in enumerate(sequence[i_start_itemset+1:]):
-                if early_stop:
-                    break
-
-                # Min and max gap constraints can be applied at the itemset scale as all items in 
-                # the itemset appear at the same time
-                if self.C['min_gap']:
-                    first_item = itemset[0]
-                    gap = (first_item.t_s-occ[1][-1]).total_seconds()
-                    if gap < self.C['min_gap']:
-                        continue 
-                if self.C['max_gap']:
-                    first_item = itemset[0]
-                    gap = (first_item.t_s-occ[1][-1]).total_seconds()
-                    if gap > self.C['max_gap']:
-                        early_stop = True
-                        break 
-                
-                # Iterate over the items and ensure max gap constraint
-                for i_item, item in enumerate(itemset):
-                    
-                    # If item is infrequent it should not be considered
-                    if item.repr in self.infrequent_items:
-                        continue
-
-                    right_extensions_occ[item.repr].append((
+            # Right S-extensions: itemsets after the pattern
+            lo, hi = i_end_itemset + 1, len(T)
+            if min_gap:
+                lo = max(lo, bisect_left(T, t_end + min_gap))
+            if max_gap:
+                hi = min(hi, bisect_right(T, t_end + max_gap))
+            for i_itemset in range(lo, hi):
+                for pos, code, _, t_e in itemsets[i_itemset]:
+                    r_S_occ[S_keys[code]].append((
                         occ[0],
-                        (occ[1][0], i_start_itemset+i_itemset+1, i_item, item.t_e),
+                        (i_seq, i_itemset, pos, t_e),
                     ))
 
-        # Support computation
-        right_extensions = {}
-        for candidate in sorted(right_extensions_occ):
-            support = len(set([occ[0][0] for occ in right_extensions_occ[candidate]]))/self.n_sequences
-            right_extensions[candidate] = support
-    
-        return right_extensions, right_extensions_occ
+        return (
+            self._get_supports(l_I_occ), l_I_occ,
+            self._get_supports(l_S_occ), l_S_occ,
+            self._get_supports(r_I_occ), r_I_occ,
+            self._get_supports(r_S_occ), r_S_occ,
+        )
+
+    def _get_supports(self, extensions_occ):
+        """
+        Support computation.
+        """
+        extensions = {}
+        for candidate in sorted(extensions_occ):
+            support = len(set([occ[0][0] for occ in extensions_occ[candidate]]))/self.n_sequences
+            extensions[candidate] = support
+        return extensions
     
     def _safe_pruning(self, P_occ, l_item_occ):
         """
         Check if the pattern can be safely pruned according to line 1 of Algorithm 2.
         """
 
-        # Get combined support of items (I + S extensions)
-        item_occ = Counter()
-        for item, occ in l_item_occ.items():
-            item_occ[item.strip('_')] += len(occ)
-
-        # Check "closure"
-        if any(len(P_occ) == occ for occ in item_occ.values()):
-            return True
+        # Check "closure": an I- or S-extension that precedes every occurrence of
+        # the pattern. Occurrences are identified by their end, as an occurrence 
+        # can have several left S-extensions with the same item
+        for occ in l_item_occ.values():
+            if len(occ) >= len(P_occ) and len({o[1] for o in occ}) == len(P_occ):
+                return True
         return False
 
     def _get_extensions(
@@ -434,12 +395,8 @@ class CloSPEC(FSPMiner):
         """
 
         # Merge I- and S-extensions
-        if len(P) == 1: # Left and right I-extensions are identical, let's keep the right ones
-            l_item_extensions = l_item_S_extensions
-            l_item_occ = l_item_S_occ
-        else:
-            l_item_extensions = l_item_I_extensions | l_item_S_extensions
-            l_item_occ = l_item_I_occ | l_item_S_occ
+        l_item_extensions = l_item_I_extensions | l_item_S_extensions
+        l_item_occ = l_item_I_occ | l_item_S_occ
         r_item_extensions = r_item_I_extensions | r_item_S_extensions
         r_item_occ = r_item_I_occ | r_item_S_occ
 
@@ -452,10 +409,10 @@ class CloSPEC(FSPMiner):
             # Combine item with the current pattern
             if item.startswith('_'):
                 # I-extension
-                new_P = P[:-1] + (tuple(sorted(P[-1] + (item[1:],))),)
+                new_P = (tuple(sorted(P[0] + (item[1:],))),) + P[1:]
             else:
                 # S-extension
-                new_P = P + ((item,),)
+                new_P = ((item,),) + P
             # print(f'\t\t\titem={item}, new_P={new_P}')
 
             # Save pattern support (equal to item support)
@@ -485,6 +442,28 @@ class CloSPEC(FSPMiner):
             
         return left_extensions, right_extensions, left_extensions_occ, right_extensions_occ
 
+    def _n_patterns(self):
+        """
+        Number of closed patterns found so far.
+        """
+        return self.ht.n_patterns
+
+    def _reset_results(self):
+        """
+        Clear the results of a previous run, including its closed patterns.
+        """
+        super()._reset_results()
+        self.ht = ClosedHash()
+        self._patterns = None
+
+    def _retained_patterns(self):
+        """
+        Closed patterns, emitted to the sink at the end of the run.
+        """
+        for support, P in self.ht.patterns.items():
+            for p in P:
+                yield p, support
+
     @property
     def patterns(self):
         """
@@ -1,8 +1,92 @@
+from collections import defaultdict
+
 
 class PSL:
     """
     Prefix Sequence Lattice.
+
+    Explored prefixes are hashed by the total size of their projected database
+    and by the sum of the ids of the sequences in it. Two prefixes s ⊑ s' have
+    the same projected database iff they share this key, as the projections of
+    s' are suffixes of the projections of s.
     """
 
     def __init__(self):
-        pass
\ No newline at end of file
+        self._lattice = defaultdict(list)
+        self.size = 0
+
+    def insert(self, sequence, support, key):
+        """
+        Insert an explored prefix in the lattice.
+        Returns True if the prefix is included in a prefix with the same projected
+        database and the same last element (backward sub-pattern): its subtree can 
+        be pruned, as all of its extensions are included in the extensions of that
+        prefix with the same support.
+        A prefix with the same projected database included in the new prefix
+        (backward super-pattern) is not closed, and is removed from the lattice.
+        """
+
+        # Iterate over the prefixes with the same key
+        bucket = self._lattice[key]
+        non_closed = []
+        for i_p, (other, other_support) in enumerate(bucket):
+            if other_support != support:
+                continue
+
+            # Backward sub-pattern: i-extensions depend on the last element
+            if sequence[-1] == other[-1] and self._is_subseq(sequence, other):
+                return True
+
+            # Backward super-pattern
+            if self._is_subseq(other, sequence):
+                non_closed.append(i_p)
+
+        # Save prefix
+        for i_p in reversed(non_closed):
+            del bucket[i_p]
+        bucket.append((sequence, support))
+        self.size += 1 - len(non_closed)
+        return False
+
+    def closed_patterns(self):
+        """
+        Return the closed patterns in the lattice as {pattern: support}.
+        A pattern is closed if no other pattern with the same support includes it.
+        Such patterns occur in the same sequences, so they are searched among the
+        patterns with the same support and sequence-id sum.
+        """
+
+        # Group patterns by support and sequence ids
+        groups = defaultdict(list)
+        for (_, seq_id_sum), bucket in self._lattice.items():
+            for sequence, support in bucket:
+                groups[(support, seq_id_sum)].append(sequence)
+
+        # Remove non-closed patterns
+        closed_patterns = {}
+        for (support, _), sequences in groups.items():
+            for sequence in sequences:
+                if any(
+                    other != sequence and self._is_subseq(sequence, other)
+                    for other in sequences
+                ):
+                    continue
+                closed_patterns[sequence] = support
+
+        return closed_patterns
+
+    @staticmethod
+    def _is_subseq(P1, P2):
+        """
+        Check if P1 is a subsequence of P2.
+        """
+
+        n1, n2 = len(P1), len(P2)
+        i1, i2 = 0, 0
+
+        while i1 < n1 and i2 < n2:
+            if set(P1[i1]).issubset(P2[i2]):
+                i1 += 1
+            i2 += 1
+
+        return i1 == n1
@@ -1,76 +1,106 @@
-
-from collections import Counter
 import pandas as pd
 
-from pml.base import FSPMiner
-from .PSL import PSL
+from pml.sequential_pattern_mining.PrefixSpan.prefixspan import PrefixSpan
+from pml.sequential_pattern_mining.CloSpan.PSL import PSL
+from pml.base import interruptible, cached
+
+
+class CloSpan(PrefixSpan):
+    """
+    CloSpan from Yan, Han and Afshar, CloSpan: Mining Closed Sequential Patterns
+    in Large Datasets (2003).
+    Relies on PrefixSpan's projection, with early termination of the branches
+    whose projected database was already explored.
+    """
 
+    # Closed patterns are not maintained by update
+    supports_update = False
 
-""" 
-WIP
-"""
-class CloSpan(FSPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
+    @cached
+    @interruptible
     def run(self, min_support):
         """
         Run the CloSpan algorithm.
         """
-        
+
         self.min_support = min_support
 
         # Initialization
         self.frequent_patterns = {}
-        L = PSL()
+        self._psl = L = PSL()
 
         # Process starts with the complete db and the empty set
-        self._pattern_growth(self.sequences, [], L, min_support)
+        # Sequences are kept along with their ids to hash projected databases
+        try:
+            self._pattern_growth(list(enumerate(self.sequences)), [], L, min_support)
 
-    def _prepare_sequences(self):
-        """
-        Prepare sequences from a list of sets from the DataFrame.
-        Transaction data is a list of list of sets.
-        Items need to be sorted in lexicographic order.
-        """
-        return [
-            list(map(lambda t: tuple(sorted(t)), row)) 
-            for row in self.data['items']
-        ]
-    
-    def _find_frequent_items(self, db, min_support):
-        """
-        Find all frequent items in db. 
-        db is a list of sequences. 
-        Returns a dictionary of frequent items as {item: support}.
-        """
-        
-        global_counter = Counter()
-        for sequence in db:
-            counter = Counter()
-            for element in sequence:
-                for item in element:
-                    if item in counter:
-                        continue
-                    counter[item] += 1/self.n_sequences
-            global_counter += counter
-
-        frequent_items = {}
-        for candidate in sorted(global_counter):
-            if (global_counter[candidate]) >= min_support:
-                frequent_items[candidate] = global_counter[candidate]
-
-        return frequent_items
+        # Eliminate non-closed patterns, also when the run is interrupted
+        finally:
+            self.frequent_patterns = L.closed_patterns()
 
     def _pattern_growth(self, db, sequence, L, min_support):
         """
         Main recursive function of the CloSpan algorithm.
-        db is a transaction database.
+        db is a transaction database, as a list of (seq_id, sequence).
         sequence is the current frequent sequence.
         """
-        
-        
-    
+
+        self._checkpoint(len(sequence) + 1, sequence)
+
+        # Last element of the sequence, used to find i-extensions
+        last_element = sequence[-1] if sequence else None
+
+        # Scan db to find all frequent items
+        with self._phase('scan'):
+            f_list = self._find_frequent_items(
+                [s for _, s in db], min_support, last_element
+            )
+        self._count('frequent', len(sequence) + 1, len(f_list))
+
+        # Divide search space
+        for item, support in f_list.items():
+
+            # Combine item with current sequence
+            if item.startswith('_'):
+                # i-extension
+                new_sequence = sequence[:-1] + \
+                    [tuple(sorted(sequence[-1] + (item[1:],)))]
+            else:
+                # s-extension
+                new_sequence = sequence + [(item,)]
+
+            # Project db
+            with self._phase('projection'):
+                db_proj = []
+                for seq_id, s in db:
+                    s_proj = self._project_sequence(s, item, last_element)
+                    if s_proj is not None:
+                        db_proj.append((seq_id, s_proj))
+            self._count('projected_db_size', len(new_sequence), len(db_proj))
+
+            # Hash the projected db with its size and its sequence ids
+            key = (
+                sum(len(element) for _, s in db_proj for element in s),
+                sum(seq_id for seq_id, _ in db_proj)
+            )
+
+            # Early termination if an equivalent projected db was already explored
+            if L.insert(tuple(new_sequence), support, key):
+                self._count('early_terminations', len(new_sequence))
+                continue
+
+            # Continue depth-first search
+            self._pattern_growth(db_proj, new_sequence, L, min_support)
+
+    def _n_patterns(self):
+        """
+        Number of prefixes in the lattice so far.
+        """
+        return self._psl.size
+
 
 if __name__ == "__main__":
 
@@ -92,6 +122,6 @@ if __name__ == "__main__":
 
     alg = CloSpan(data, 'items')
     alg.run(min_support=0.3)
-    
+
     print('data =\n', data)
-    print('Frequent patterns =\n', alg.frequent_patterns)
\ No newline at end of file
+    print('Frequent patterns =\n', alg.frequent_patterns)
@@ -1,19 +1,24 @@
 
 from itertools import combinations
+from math import ceil
 from collections import Counter
 import pandas as pd
 import numpy as np
 
-from pml.base import FSPMiner
+from pml.base import FSPMiner, interruptible, cached
 
 
-""" 
-WIP
-"""
 class FreeSpan(FSPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    """
+    FreeSpan from Han et al., FreeSpan: Frequent Pattern-Projected Sequential 
+    Pattern Mining (2000).
+    """
 
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
+
+    @cached
+    @interruptible
     def run(self, min_support):
         """
         Run the FreeSpan algorithm.
@@ -22,37 +27,103 @@ class FreeSpan(FSPMiner):
         # Initialization
         self.frequent_patterns = {}
 
-        # Process starts with the complete db and the empty set
-        self._pattern_growth(self.sequences, [], min_support)
+        # Process starts with the complete db
+        self._pattern_growth(self.sequences, min_support)
 
-    def _prepare_sequences(self):
-        """
-        Prepare sequences from a list of sets from the DataFrame.
-        Transaction data is a list of list of sets.
-        Items are sorted in lexicographic order.
-        """
-        return [
-            list(map(lambda t: tuple(sorted(t)), row)) 
-            for row in self.data['items']
-        ]
     
-    def _pattern_growth(self, db, sequence, min_support):
+    def _pattern_growth(self, db, min_support):
         """
-        Main recursive function of a pattern-growth algorithm.
+        Main function of the frequent pattern-projected growth.
         db is a transaction database.
-        sequence is  the current itemset.
+
+        The search space is partitioned using f_list = <f_1, ..., f_n>: the 
+        f_i-projected database holds the sequences containing f_i, restricted to 
+        items f_1, ..., f_i, and is used to mine the patterns that contain f_i 
+        and no item after f_i.
         """
 
         # Scan db to find all frequent items
         f_list = self._find_frequent_items(db, min_support)
-        print('\nf_list =', f_list)
+        # print('\nf_list =', f_list)
+        f_items = list(f_list)
+        index = {item: i for i, item in enumerate(f_items)}
+        min_count = ceil(min_support * self.n_sequences - 1e-9)
 
         # Build frequent item matrix
-        F = self._build_F(db, list(f_list.keys()))
+        with self._phase('frequent_item_matrix'):
+            F = self._build_F(db, index)
         # To print F:
         # for i in range(len(F)):
         #     for j in range(i, len(F)):
-        #         print(f'F[{list(f_list.keys())[i]}, {list(f_list.keys())[j]}] = {F[i, j]}')
+        #         print(f'F[{f_items[i]}, {f_items[j]}] = {F[i, j]}')
+
+        # Save frequent 1- and 2-patterns
+        for item, support in f_list.items():
+            self.frequent_patterns[((item,),)] = support
+        for i, j in zip(*np.triu_indices(len(f_items))):
+            self.frequent_patterns.update(self._generate_length_2_patterns(
+                F[i, j], f_items[i], f_items[j], min_count
+            ))
+
+        # Mine each f_i-projected database
+        for i, item in enumerate(f_items):
+            alphabet = set(f_items[:i+1])
+            db_proj = []
+            for sequence in db:
+                sequence_proj = [
+                    tuple(e for e in element if e in alphabet) for element in sequence
+                ]
+                sequence_proj = [element for element in sequence_proj if element]
+                if any(item in element for element in sequence_proj):
+                    db_proj.append(sequence_proj)
+            self._count('projected_db_size', 1, len(db_proj))
+
+            # Length-2 patterns are already known from F, growth starts with the 
+            # length-3 patterns
+            visited = set()
+            for pattern in self._generate_candidates_from_annotations(
+                ((item,),), f_items[:i+1], F, index, min_count
+            ):
+                if pattern not in self.frequent_patterns or pattern in visited:
+                    continue
+                visited.add(pattern)
+                db_pattern = [s for s in db_proj if self._is_subsequence(pattern, s)]
+                self._projected_growth(
+                    pattern, db_pattern, f_items[:i+1], F, index, min_count, visited
+                )
+
+    def _projected_growth(self, pattern, db, alphabet, F, index, min_count, visited):
+        """
+        Recursive growth of a pattern in its projected database.
+        db holds the sequences of the f_i-projected database that contain the
+        pattern. Candidates are obtained by inserting an item of the alphabet
+        anywhere in the pattern, provided that the annotations of matrix F allow it.
+        """
+
+        self._checkpoint(sum(len(element) for element in pattern) + 1, pattern)
+
+        for candidate in self._generate_candidates_from_annotations(
+            pattern, alphabet, F, index, min_count
+        ):
+            if candidate in visited:
+                continue
+            visited.add(candidate)
+
+            # Compute support in the projected database
+            db_candidate = [s for s in db if self._is_subsequence(candidate, s)]
+            level = sum(len(element) for element in candidate)
+            self._count('candidates_counted', level)
+            if len(db_candidate) < min_count:
+                continue
+            self._count('frequent', level)
+
+            # Save frequent pattern
+            self.frequent_patterns[candidate] = len(db_candidate) / self.n_sequences
+
+            # Continue growth with the projected database of the candidate
+            self._projected_growth(
+                candidate, db_candidate, alphabet, F, index, min_count, visited
+            )
 
     def _find_frequent_items(self, db, min_support):
         """
@@ -68,7 +139,7 @@ class FreeSpan(FSPMiner):
                 for item in element:
                     if item in counter:
                         continue
-                    counter[item] += 1/self.n_sequences
+                    counter[item] += 1
             global_counter += counter
 
         # Sort elements in "support descending order" and then lexicographically
@@ -77,7 +148,9 @@ class FreeSpan(FSPMiner):
             key=lambda item: (-item[1], item[0])  # Sort by negative support, then lexicographically
         )
         frequent_items = {}
-        for candidate, support in sorted_candidates:
+        for candidate, count in sorted_candidates:
+            # Supports are computed from integer counts to avoid accumulated rounding errors
+            support = count / self.n_sequences
             if support >= min_support:
                 frequent_items[candidate] = support
             else:
@@ -85,207 +158,131 @@ class FreeSpan(FSPMiner):
         return frequent_items
 
     @staticmethod
-    def _build_F(db, f_items):
+    def _build_F(db, index):
         """
         Build the frequent item matrix.
-        f_items is a list of frequent items sorted by decreasing order
-        of support.
+        index maps the frequent items, sorted by decreasing order of support, to 
+        their position in the matrix.
+
+        For items a = f_i and b = f_j with i < j, F[i, j] holds the number of 
+        sequences containing <a b>, <b a> and (a b). F[i, i, 0] holds the number
+        of sequences containing <a a>. Each sequence is counted once per cell.
         """
 
-        F_global = np.zeros((len(f_items), len(f_items)), dtype=(float, 3))
+        n = len(index)
+        F = np.zeros((n, n, 3), dtype=np.int32)
 
         # Iterate over the sequences in the db
         for sequence in db:
-            F = np.zeros((len(f_items), len(f_items)), dtype=(float, 3))
 
-            # Keep track of the items encountered
-            states = {item: None for item in f_items}
-
-            # Iterate over the elements
+            # First and last elements of each frequent item in the sequence
+            first, last = {}, {}
+            together = set()
             for i_element, element in enumerate(sequence):
-
-                # Increase the count of elements that appear together
-                pairwise_combinations = list(
-                    combinations((e for e in element if e in f_items), 2)
-                )
-                for pair in pairwise_combinations:
-                    i_1 = f_items.index(pair[0])
-                    i_2 = f_items.index(pair[1])
-                    if i_1 < i_2:
-                        if F[i_1, i_2][2] != 0:
-                            continue
-                        else:
-                            F[i_1, i_2][2] += 1
-                    else:
-                        if F[i_2, i_1][2] != 0:
-                            continue
-                        else:
-                            F[i_2, i_1][2] += 1
-
-                # Increase the count of elements that appear consecutively
-                delayed_update = {item: None for item in element}
-                for item in element:
-                    if item not in states:
-                        continue
-
-                    # Update same item combination
-                    if (states[item] is not None) and (states[item] != i_element):
-                        i = f_items.index(item)
-                        if F[i, i][0] == 0:
-                            F[i, i][0] += 1
-                    
-                    # Other combinations
-                    delayed_update[item] = i_element
-                    for f_item in f_items:
-                        if states[f_item] is None:
-                            continue
-
-                        state_1 = i_element
-                        state_2 = states[f_item]                        
-                        i_1 = f_items.index(item)
-                        i_2 = f_items.index(f_item) 
-            
-                        # Skip same item or item from the same element
-                        if (item == f_item) or (state_1 == state_2):
-                            continue                     
-                        if i_1 < i_2:
-                            if state_1 < state_2:
-                                i = 0
-                            else:
-                                i = 1
-                            if F[i_1, i_2][i] != 0:
-                                continue
-                            else:
-                                F[i_1, i_2][i] += 1
-                        else:
-                            if state_1 < state_2:
-                                i = 1
-                            else:
-                                i = 0
-                            if F[i_2, i_1][i] != 0:
-                                continue
-                            else:
-                                F[i_2, i_1][i] += 1
-
-                # Update the state of the items in the element
-                for item, state in delayed_update.items():
-                    states[item] = state
-
-            # Update F
-            F_global += F
-                    
-        return F_global
-
-    def _generate_length_2_patterns(self, cell, item_1, item_2, min_support):
+                items = sorted(index[item] for item in element if item in index)
+                for i in items:
+                    first.setdefault(i, i_element)
+                    last[i] = i_element
+
+                # Items that appear together
+                together.update(combinations(items, 2))
+            if not first:
+                continue
+
+            # Items that appear consecutively: a then b iff first(a) < last(b)
+            items = np.fromiter(first, dtype=np.int64)
+            before = np.fromiter(first.values(), dtype=np.int64)[:, None] \
+                < np.fromiter((last[i] for i in first), dtype=np.int64)[None, :]
+            rows, cols = np.nonzero(before)
+            rows, cols = items[rows], items[cols]
+            np.add.at(F, (
+                np.minimum(rows, cols), np.maximum(rows, cols), (rows > cols).astype(np.int64)
+            ), 1)
+
+            # Update F with items that appear together
+            if together:
+                i_1, i_2 = np.array(list(together), dtype=np.int64).T
+                np.add.at(F, (i_1, i_2, 2), 1)
+
+        return F
+
+    def _generate_length_2_patterns(self, cell, item_1, item_2, min_count):
         """
         Given a cell from matrix F, generate all length-2 sequential patterns.
         """
         patterns = {}
-        if cell[0] >= min_support:
-            patterns[tuple((item_1,) (item_2))] = cell[0] / self.n_sequences
-        if cell[1] >= min_support:
-            patterns[tuple((item_2,) (item_1))]= cell[1] / self.n_sequences
-        if cell[2] >= min_support:
-            patterns[tuple(sorted([item_1, item_2]))] = cell[2] / self.n_sequences
+        if cell[0] >= min_count:
+            patterns[((item_1,), (item_2,))] = int(cell[0]) / self.n_sequences
+        if item_1 == item_2:
+            return patterns
+        if cell[1] >= min_count:
+            patterns[((item_2,), (item_1,))] = int(cell[1]) / self.n_sequences
+        if cell[2] >= min_count:
+            patterns[(tuple(sorted([item_1, item_2])),)] = int(cell[2]) / self.n_sequences
         return patterns
-    
+
     @staticmethod
-    def _generate_item_annotations(F, f_items, min_support):
+    def _relation_count(F, index, item_1, item_2, together=False):
         """
-        Generate annotations on item-repeating patterns. 
+        Get the number of sequences containing <item_1 item_2>, or (item_1 item_2)
+        if together is True, from matrix F.
         """
-
-        for i in range(len(F)):
-            annotations = []
-
-            for j in range(i, len(F)):
-                print(f'F[{f_items[i]}, {f_items[j]}] = {F[i, j]}')
-
-                # Diagonal elements
-                if i == j:
-                    if F[i, j][0] < min_support:
-                        continue
-                    annotations.append(tuple((f_items[i],), (f_items[j],)))
-                    continue
-
-                # i != j
-                annotation = []
-                if F[i, i][0] >= min_support:
-                    annotation.append(f_items[i] + '+')
-                else:
-                    annotation.append(f_items[i])
-                if F[j, j][0] >= min_support:
-                    annotation.append(f_items[j] + '+')
-                else:
-                    annotation.append(f_items[j])
-                if not sum(1 for x in F[i, j] if x >= min_support) == 1:
-                    annotation = set(annotation)
-                annotations.append(annotation)
-            
-            yield annotations
-                    
-    @staticmethod
-    def _generate_db_annotations(F, f_items, min_support):
+        i, j = index[item_1], index[item_2]
+        if together:
+            return F[min(i, j), max(i, j), 2]
+        if i <= j:
+            return F[i, j, 0]
+        return F[j, i, 1]
+
+    def _generate_candidates_from_annotations(self, pattern, alphabet, F, index, min_count):
         """
-        Generate annotations on projected databases. 
+        Generate the candidate patterns obtained by inserting an item of the
+        alphabet in the pattern, either as a new element or in an existing element.
+        Annotations from F are used to discard candidates: every pair formed by 
+        the new item and an item of the pattern must be a frequent 2-pattern.
         """
 
-        for i in range(len(F)):
-            annotations = []
-            row = F[i, :]
-
-            # Check how many cells from the row are frequent
-            if sum(
-                sum(1 for element in cell if element >= 2) >= 1 for cell in row
-            ) < 2:
-                yield annotations
-
-            # In what follows, there are at least two frequent cells
-            for j in range(1, len(row)-1):
-
-                # Check if cell has at least one frequent pattern
-                if sum(1 for x in F[i, j] if x >= min_support) >= 1:
-                    
-                    # Get pattern
-                    patterns = []
-                    for i_x, x in F[i, j]:
-                        if x < min_support:
-                            continue
-                        if i_x == 0:
-                            patterns.append(
-                                tuple((f_items.index(i),), (f_items.index(j),))
-                            )
-                        elif i_x == 1:
-                            patterns.append(
-                                tuple((f_items.index(j),), (f_items.index(i),))
-                            )
-                        else:
-                            patterns.append(
-                                tuple((f_items.index(i), f_items.index(j),))
-                            )
-
-                    # Iterate over the columns before j
-                    for k in range(j):
-
-                        # Check if cell has at least one frequent pattern
-                        if sum(1 for x in F[i, k] if x >= min_support) >= 1:
-
-                            # Add an annotation for each possible pattern
-                            for p in patterns:
-                                annotations.append(tuple(p, f_items.index(k)))
-
-            yield annotations
+        for item in alphabet:
+
+            # Check the relations between the item and each element of the pattern
+            # after[k] is True if the item can appear after the k-th element,
+            # before[k] if it can appear before it, and with[k] if it can be part of it
+            after = [
+                all(self._relation_count(F, index, e, item) >= min_count for e in element)
+                for element in pattern
+            ]
+            before = [
+                all(self._relation_count(F, index, item, e) >= min_count for e in element)
+                for element in pattern
+            ]
+            with_ = [
+                item not in element and all(
+                    self._relation_count(F, index, e, item, together=True) >= min_count 
+                    for e in element
+                )
+                for element in pattern
+            ]
+
+            # Insert the item as a new element at position p
+            for p in range(len(pattern)+1):
+                if all(after[:p]) and all(before[p:]):
+                    yield pattern[:p] + ((item,),) + pattern[p:]
 
+            # Insert the item in the element at position p
+            for p in range(len(pattern)):
+                if with_[p] and all(after[:p]) and all(before[p+1:]):
+                    yield pattern[:p] + (tuple(sorted(pattern[p] + (item,))),) + pattern[p+1:]
 
     @staticmethod
-    def _generate_candidates_from_annotations(annotations):
+    def _is_subsequence(pattern, sequence):
         """
-        Generate a set of candidate patterns from the annotations.
+        Check if a pattern is contained in a sequence.
         """
-
-        for a in annotations:
-            pass
-
+        i = 0
+        for element in sequence:
+            if i < len(pattern) and all(item in element for item in pattern[i]):
+                i += 1
+        return i == len(pattern)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ from collections import Counter
 import pandas as pd
 
 from pml.sequential_pattern_mining.GSP.hash_tree import HashTree
-from pml.base import FSPMiner
+from pml.base import FSPMiner, interruptible
 
 
 class GSP(FSPMiner):
@@ -13,8 +13,8 @@ class GSP(FSPMiner):
     This implementation handles time constraints only. 
     """
 
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
         # "Alternate db" representation to find item occurrences efficiently
         self.vert_temp_repr = self._create_vert_temp_repr()
@@ -25,6 +25,17 @@ class GSP(FSPMiner):
             for s in self.sequences
         ]
 
+    def _sequences_updated(self):
+        """
+        Rebuild the alternate db and the time vector after an update.
+        """
+        self.vert_temp_repr = self._create_vert_temp_repr()
+        self.t = [
+            [i for i, _ in enumerate(s)]
+            for s in self.sequences
+        ]
+
+    @interruptible
     def run(self, min_support=0.4, min_gap=0, max_gap=100, window_size=0):
         """
         GSP algorithm.
@@ -33,32 +44,43 @@ class GSP(FSPMiner):
         self.frequent_patterns = {}
 
         # k = 1: first scan to compute support of 1-sequences (i.e., 1-itemsets)
+        # Items are counted once per sequence, supports are computed from integer 
+        # counts to avoid accumulated rounding errors
         counter = Counter()
         for sequence in self.sequences:
-            for itemset in sequence:
-                for item in itemset:
-                    counter[item] += 1/self.n_sequences
+            for item in {item for itemset in sequence for item in itemset}:
+                counter[item] += 1
         for candidate in counter:
-            if (counter[candidate]) >= min_support:
-                self.frequent_patterns[((candidate,),)] = counter[candidate]
+            support = counter[candidate] / self.n_sequences
+            if support >= min_support:
+                self.frequent_patterns[((candidate,),)] = support
 
         # k >= 2
         k = 2
         L_k = [[tuple(item)] for itemset in self.frequent_patterns for item in itemset]
         while L_k:
             # print('\nL_k =', L_k)
+            self._checkpoint(k)
 
             # Generate k-sequences
-            C_k = self._generate_candidates(L_k, k)
+            with self._phase('candidate_generation'):
+                C_k = self._generate_candidates(L_k, k)
             # print('C_k =', C_k)
+            n_generated = len(C_k)
 
             # Prune candidates
-            C_k = self._prune_candidates(L_k, C_k, k)
+            with self._phase('pruning'):
+                C_k = self._prune_candidates(L_k, C_k, k)
             # print('candidates =', C_k)
+            self._count('candidates_generated', k, n_generated)
+            self._count('candidates_pruned', k, n_generated - len(C_k))
 
             # Compute support and retain frequent candidates
-            L_k, frequent_candidates = self._compute_support(C_k, min_support, min_gap, max_gap, window_size)
+            with self._phase('support_counting'):
+                L_k, frequent_candidates = self._compute_support(C_k, min_support, min_gap, max_gap, window_size)
             self.frequent_patterns.update(frequent_candidates)
+            self._count('candidates_counted', k, len(C_k))
+            self._count('frequent', k, len(frequent_candidates))
 
             k += 1
     
@@ -86,23 +108,21 @@ class GSP(FSPMiner):
         C_k = []
 
         # When joining L1 with itself, all items should be added as part
-        # of an itemset and as a separate element 
+        # of an itemset (once per pair of items, in order) and as a separate
+        # element, including the item itself
         if k == 2:
             for i in range(len(L_k)):
                 for j in range(len(L_k)):
-                    if i == j:
-                        continue
                     # i-extension
-                    C_k.append([L_k[i][-1] + L_k[j][-1]]) 
+                    if L_k[i][-1] < L_k[j][-1]:
+                        C_k.append([L_k[i][-1] + L_k[j][-1]])
                     # s-extension
                     C_k.append(L_k[i] + [L_k[j][-1]])
 
-        # When k > 2
+        # When k > 2, a sequence can join with itself, e.g., <(a)(a)> gives <(a)(a)(a)>
         else:
             for i in range(len(L_k)):
                 for j in range(len(L_k)):
-                    if i == j:
-                        continue
                     # Subsequence check
                     if not self._join_check(L_k[i], L_k[j]):
                         continue
@@ -213,19 +233,13 @@ class GSP(FSPMiner):
             l_itemset = len(itemset)
             if not l_itemset > 1:
 
-                # Handle Condition 1: dropping from s1
-                if i_itemset == 0:
-                    first_element, multi = self._get_element(s, 0)
-                    yield self._drop_item(s, first_element, multi, 0)
-                
-                # Handle Condition 1: dropping from sn
-                elif i_itemset == len(s):
-                    last_element, multi = self._get_element(s, pos=-1)
-                    yield self._drop_item(s, last_element, multi, -1)
-                
+                # Handle Condition 1: dropping s1 or sn, an element of one item,
+                # rather than leaving it empty
+                if i_itemset in (0, len(s) - 1):
+                    yield self._drop_item(s, itemset[0], False, i_itemset)
+
                 # Conditions not met
-                else:
-                    continue
+                continue
         
             # Iterate over the items
             for i_item in range(l_itemset):
@@ -246,6 +260,8 @@ class GSP(FSPMiner):
         # hash_tree.display()
 
         # Iterate over the data sequences
+        # Candidates are counted once per sequence, as they may be reached from
+        # several items of the sequence, and supports are computed from integer counts
         counter = Counter()
         for i_seq, (t, sequence) in enumerate(zip(self.t, self.sequences)):
             # print('\nsequence =', sequence)
@@ -253,16 +269,16 @@ class GSP(FSPMiner):
                 hash_tree, hash_tree.root, sequence, i_seq, t, window_size, max_gap
             )
             # print('\n matches =', matches)
-            for match in matches:
-                counter[tuple(tuple(item) for item in match)] += 1/self.n_sequences
+            for match in {tuple(tuple(item) for item in match) for match in matches}:
+                counter[match] += 1
 
-        L_k = [
-            [tuple(inner) for inner in outer] for outer in counter
-        ]
         frequent_sequences = {
-            s: support for s, support in counter.items()
-            if support >= min_support
+            s: count / self.n_sequences for s, count in counter.items()
+            if count / self.n_sequences >= min_support
         }
+        L_k = [
+            [tuple(inner) for inner in outer] for outer in frequent_sequences
+        ]
         # print('\n NEW L_k =', L_k)
         # print('\n frequent_sequences =', frequent_sequences)
         return L_k, frequent_sequences
@@ -273,16 +289,24 @@ class GSP(FSPMiner):
         """
         matches = []
 
-        # Flatten the sequence for processing
+        # Flatten the sequence for processing, with the time of each item
         flattened_sequence = [item for transaction in data_sequence for item in transaction]
+        item_times = [time for time, transaction in zip(t, data_sequence) for _ in transaction]
 
         # Handle leaf nodes
         if node.is_leaf:
             for candidate in node.sequences:
-                if self._is_subsequence(candidate, seq_id, max_gap, window_size=2):
+                if self._is_subsequence(candidate, seq_id, max_gap, window_size):
                     matches.append(candidate)
             return matches
 
+        # Candidates with no item left to hash, kept under the None key when a leaf is split
+        if None in node.children:
+            matches += self._find_subsequences(
+                hash_tree, node.children[None], data_sequence, seq_id, t, window_size, max_gap,
+                depth + 1, prev_time
+            )
+
         # Handle interior nodes
         for i_item, item in enumerate(flattened_sequence):
             if node.is_root:
@@ -298,14 +322,14 @@ class GSP(FSPMiner):
                         window_size,
                         max_gap,
                         depth + 1,
-                        t[i_item]
+                        item_times[i_item]
                     )
 
             else:
                 # Non-root node: apply temporal constraints
                 min_time = max(prev_time - window_size, 0)
                 max_time = prev_time + max(window_size, max_gap)
-                time = t[i_item]
+                time = item_times[i_item]
 
                 if min_time <= time <= max_time:
                     hash_value = hash_tree.hash_function(item)
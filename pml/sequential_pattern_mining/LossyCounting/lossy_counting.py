@@ -0,0 +1,232 @@
+from collections import deque
+import pandas as pd
+
+from pml.base import FSPMiner, interruptible
+from pml.base.incremental import _extensions
+
+
+class LossyCounting(FSPMiner):
+    """
+    Sliding-window stream miner of sequential patterns, with the Lossy Counting
+    algorithm from Manku and Motwani, Approximate Frequency Counts over Data
+    Streams (2002).
+
+    Events (sequence id, timestamp, items) are ingested one at a time. The
+    events of a sequence are gathered until it has been idle for session_timeout,
+    then the sequence is closed and its patterns of at most max_size items are
+    counted. Closed sequences expire once they ended more than window before the
+    latest event, and their patterns are uncounted.
+
+    Pattern counts are kept in a table of entries (count, index of the first
+    sequence counted), pruned at the end of each bucket of 1/epsilon sequences:
+    memory is bounded by the table, not by the stream. Entries whose count in
+    the window may not exceed epsilon times the number of sequences of the
+    window are dropped, and this bound is recorded until the sequences it
+    covers expire. A count then misses at most the occurrences in the sequences
+    of the window closed before its entry was created, and at most the bound of
+    the pruning that dropped its previous entry. run(min_support) reports the
+    patterns whose count plus these missed occurrences reaches min_support,
+    with their counted support, a lower bound. No pattern of the window more
+    frequent than max_missed() is missed.
+    """
+
+    # The window is updated by ingesting events, see add_event and replay
+    supports_update = False
+
+    def __init__(self, window, session_timeout, epsilon=0.01, max_size=3, item_col: str = 'items'):
+        super().__init__([], item_col)
+        self.window = window
+        self.session_timeout = session_timeout
+        self.epsilon = epsilon
+        self.max_size = max_size
+        self.bucket_width = int(1 / epsilon + 0.5)
+
+        # Open sequences as {sequence id: (itemsets, timestamp of the last event)}
+        self.open_sequences = {}
+        # Closed sequences in the window, and their (end, sequence index)
+        self.sequences = deque()
+        self.window_sequences = deque()
+        # Pattern counts as {pattern: [count, index of the first sequence counted]}
+        self.entries = {}
+        # Prunings of the window, as (number of sequences closed, bound of the counts dropped)
+        self.prunings = deque()
+        self.n_closed = 0
+        self.now = None
+
+    @interruptible
+    def run(self, min_support):
+        """
+        Report the approximate frequent patterns of the window.
+        """
+        n = self.n_sequences
+        self.frequent_patterns = {}
+        if n == 0:
+            return
+        first = self.window_sequences[0][1]
+        for pattern, (count, created) in self.entries.items():
+            if count + self._missed(created, first) >= min_support * n:
+                self._save(pattern, count / n)
+
+    def max_missed(self):
+        """
+        Upper bound of the count in the window of the patterns missing from the
+        table, i.e., of the patterns that run() cannot report.
+        """
+        return max((bound for _, bound in self.prunings), default=0)
+
+    def add_event(self, sequence_id, timestamp, items):
+        """
+        Ingest an event: the items occurring in a sequence at a given timestamp.
+        Events of a sequence with the same timestamp form a single itemset.
+        """
+        self.advance(timestamp)
+        itemsets, last = self.open_sequences.get(sequence_id, ([], None))
+        if last == timestamp and itemsets:
+            itemsets[-1] = tuple(sorted(set(itemsets[-1]) | set(items)))
+        else:
+            itemsets.append(tuple(sorted(set(items))))
+        self.open_sequences[sequence_id] = (itemsets, timestamp)
+
+    def advance(self, timestamp):
+        """
+        Move the clock forward: close the idle sequences and expire those that
+        left the window.
+        """
+        if self.now is not None and timestamp < self.now:
+            raise ValueError('Events must be ingested in timestamp order.')
+        self.now = timestamp
+
+        idle = [
+            sid for sid, (_, last) in self.open_sequences.items()
+            if timestamp - last > self.session_timeout
+        ]
+        for sid in idle:
+            self._close(sid)
+
+        while self.window_sequences and self.window_sequences[0][0] < timestamp - self.window:
+            self._expire()
+
+    def flush(self):
+        """
+        Close all the open sequences, e.g., at the end of a replayed log.
+        """
+        for sid in list(self.open_sequences):
+            self._close(sid)
+
+    def replay(self, events, id_col='sequence_id', time_col='timestamp', every=None, callback=None):
+        """
+        Ingest a recorded log of events, given as a DataFrame with columns id_col,
+        time_col and item_col, or as (sequence id, timestamp, items) tuples.
+        If every is set, callback(self) is called every this many events, e.g.,
+        to run the miner on the window. Open sequences are closed at the end.
+        """
+        if isinstance(events, pd.DataFrame):
+            events = events[[id_col, time_col, self.item_col]].itertuples(index=False, name=None)
+        for i, (sequence_id, timestamp, items) in enumerate(events, 1):
+            self.add_event(sequence_id, timestamp, items)
+            if every is not None and i % every == 0:
+                callback(self)
+        self.flush()
+
+    def _close(self, sequence_id):
+        """
+        Close a sequence, count its patterns and prune the table at the end of
+        a bucket.
+        """
+        itemsets, last = self.open_sequences.pop(sequence_id)
+        index = self.n_closed
+        self.n_closed += 1
+        self.window_sequences.append((last, index))
+        self.sequences.append(itemsets)
+        self.n_sequences = len(self.sequences)
+
+        # Count patterns
+        for pattern in self._patterns(itemsets):
+            entry = self.entries.get(pattern)
+            if entry is None:
+                self.entries[pattern] = [1, index]
+            else:
+                entry[0] += 1
+        self._count('sequences_closed')
+
+        # End of bucket: drop entries whose count in the window is at most epsilon * n
+        if self.n_closed % self.bucket_width == 0:
+            bound = self.epsilon * self.n_sequences
+            first = self.window_sequences[0][1]
+            n_entries = len(self.entries)
+            self.entries = {
+                pattern: entry for pattern, entry in self.entries.items()
+                if entry[0] + self._missed(entry[1], first) > bound
+            }
+            self.prunings.append((self.n_closed, bound))
+            self._count('candidates_pruned', self.n_closed // self.bucket_width, n_entries - len(self.entries))
+
+    def _expire(self):
+        """
+        Remove the oldest sequence of the window and uncount its patterns, for
+        entries that counted it.
+        """
+        _, index = self.window_sequences.popleft()
+        itemsets = self.sequences.popleft()
+        self.n_sequences = len(self.sequences)
+        self._count('sequences_expired')
+        for pattern in self._patterns(itemsets):
+            entry = self.entries.get(pattern)
+            if entry is not None and entry[1] <= index:
+                entry[0] -= 1
+
+        # Prunings whose sequences all expired bound nothing in the window
+        while self.prunings and self.prunings[0][0] <= index + 1:
+            self.prunings.popleft()
+
+    def _missed(self, created, first):
+        """
+        Upper bound of the occurrences of a pattern in the sequences of the
+        window closed before its entry was created, first being the index of the
+        oldest sequence of the window.
+
+        They all precede the pruning that dropped the previous entry of the
+        pattern, since any later occurrence would have kept it, and were then
+        counted in the entry, at most the bound of that pruning.
+        """
+        if created <= first:
+            return 0
+        bound = max((bound for end, bound in self.prunings if end <= created), default=0)
+        return min(bound, created - first)
+
+    def _patterns(self, sequence):
+        """
+        Distinct subsequences of a sequence with at most max_size items.
+        """
+        patterns = []
+
+        def grow(pattern, occurrences, size):
+            if size == self.max_size:
+                return
+            for (extension, item), child_occurrences in _extensions([sequence], pattern, occurrences).items():
+                if extension == 's':
+                    child = pattern + ((item,),)
+                else:
+                    child = pattern[:-1] + (pattern[-1] + (item,),)
+                patterns.append(child)
+                grow(child, child_occurrences, size + 1)
+
+        grow((), [(0, -1, -1)], 0)
+        return patterns
+
+
+if __name__ == "__main__":
+
+    # Sample log: (sequence id, timestamp in minutes, items)
+    log = pd.DataFrame({
+        'sequence_id': [1, 2, 1, 2, 3, 1, 3, 4, 3, 4, 5, 5],
+        'timestamp': [0, 1, 2, 3, 4, 5, 6, 20, 21, 22, 23, 25],
+        'items': [['a'], ['a'], ['b'], ['b', 'c'], ['a'], ['c'], ['b'], ['a'], ['c'], ['b'], ['a'], ['b']],
+    })
+
+    alg = LossyCounting(window=30, session_timeout=10, epsilon=0.1, max_size=2)
+    alg.replay(log)
+    alg.run(min_support=0.5)
+
+    print(log)
+    print(alg.frequent_patterns)
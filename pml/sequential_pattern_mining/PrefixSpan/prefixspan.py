@@ -2,17 +2,24 @@
 from collections import Counter
 import pandas as pd
 
-from pml.base import FSPMiner
+from pml.base import FSPMiner, interruptible, cached
 
 
 class PrefixSpan(FSPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
-    def run(self, min_support):
+    @cached
+    @interruptible
+    def run(self, min_support=None, top_k=None):
         """
         Run the PrefixSpan algorithm.
+
+        With top_k, the top_k patterns of highest support are found instead,
+        above min_support if given (see pml.base.topk).
         """
+        if min_support is None and top_k is None:
+            raise ValueError('Either min_support or top_k must be given.')
         
         # Initialization
         self.frequent_patterns = {}
@@ -27,11 +34,19 @@ class PrefixSpan(FSPMiner):
         sequence is the current frequent sequence.
         """
         
+        self._checkpoint(len(sequence) + 1, sequence)
+
+        # Last element of the sequence, used to find i-extensions
+        last_element = sequence[-1] if sequence else None
+
         # Scan db to find all frequent items
-        f_list = self._find_frequent_items(db, min_support)
+        with self._phase('scan'):
+            f_list = self._find_frequent_items(db, self._min_support_now(min_support), last_element)
         # print('\nf_list =', f_list)
+        self._count('frequent', len(sequence) + 1, len(f_list))
 
         # Divide search space
+        extensions = []
         for item, support in f_list.items():
             # print('\titem =', item)
 
@@ -44,26 +59,41 @@ class PrefixSpan(FSPMiner):
                 # s-extension
                 # print('\ts-extension')
                 new_sequence = sequence + [(item,)]
+            extensions.append((item, support, new_sequence))
 
-            # print('\tnew_sequence =', new_sequence)
+        if self._top_k is not None:
+            # Save all the extensions, then grow those of highest support first,
+            # so that the threshold of the top-k run rises quickly
+            extensions.sort(key=lambda x: -x[1])
+            for _, support, new_sequence in extensions:
+                self._save(tuple(new_sequence), support)
 
-            # Save frequent pattern
-            self.frequent_patterns[
-                tuple(e for e in new_sequence)
-            ] = support
+        for item, support, new_sequence in extensions:
+            # print('\tnew_sequence =', new_sequence)
+            if self._top_k is not None:
+                if support < self._min_support_now(min_support):
+                    # Below the threshold, which rose since f_list was built
+                    continue
+            else:
+                # Save frequent pattern
+                self._save(tuple(e for e in new_sequence), support)
 
             # Project db
-            db_proj = self._project_db(db, item.strip('_'))
+            with self._phase('projection'):
+                db_proj = self._project_db(db, item, last_element)
             # print('\n\tprojection =', db_proj)
+            self._count('projected_db_size', len(new_sequence), len(db_proj))
 
             # Continue depth-first search
             self._pattern_growth(db_proj, new_sequence, min_support)
 
 
-    def _find_frequent_items(self, db, min_support):
+    def _find_frequent_items(self, db, min_support, last_element=None):
         """
         Find all frequent items in db. 
         db is a list of sequences. 
+        last_element is the last element of the current sequence: items that 
+        follow it in an element containing it are counted as i-extensions.
         Returns a dictionary of frequent items as {item: support}.
         """
         
@@ -74,18 +104,27 @@ class PrefixSpan(FSPMiner):
                 for item in element:
                     if item in counter:
                         continue
-                    counter[item] += 1/self.n_sequences
+                    counter[item] += 1
+
+                # i-extensions from an element that contains the last element
+                if self._contains_last_element(element, last_element):
+                    for item in element:
+                        if item <= last_element[-1] or f'_{item}' in counter:
+                            continue
+                        counter[f'_{item}'] += 1
             global_counter += counter
 
+        # Supports are computed from integer counts to avoid accumulated rounding errors
         frequent_items = {}
         for candidate in sorted(global_counter):
-            if (global_counter[candidate]) >= min_support:
-                frequent_items[candidate] = global_counter[candidate]
+            support = global_counter[candidate] / self.n_sequences
+            if support >= min_support:
+                frequent_items[candidate] = support
 
         return frequent_items
     
     @staticmethod
-    def _project_db(db, item):
+    def _project_db(db, item, last_element=None):
         """
         Project database db according according to the item. 
         Itemsets in the sequences are assumed to be sorted. 
@@ -96,39 +135,67 @@ class PrefixSpan(FSPMiner):
 
         # Iterate over the sequences
         for sequence in db: 
+            sequence_proj = PrefixSpan._project_sequence(sequence, item, last_element)
+            if sequence_proj is not None:
+                db_proj.append(sequence_proj)
 
-            # Iterate over the elements
-            for raw_element in sequence:
-
-                # Element might contain items with a trailing '_'
-                element = tuple(e.strip('_') for e in raw_element)
+        return db_proj
 
-                # Check if the item appears in the transaction
-                if not item in element:
-                    continue
+    @staticmethod
+    def _project_sequence(sequence, item, last_element=None):
+        """
+        Project a sequence according to the item.
+        Returns None if the item cannot extend the sequence.
 
-                # Find the index of the element in the sequence
-                i_element = sequence.index(raw_element)
+        A leading '_' in an element marks the remaining items of the itemset 
+        where the last element was matched. An item starting with '_' (i-extension) 
+        is found in such an element, or in an element containing last_element. 
+        Other items (s-extensions) are found in the other elements.
+        """
 
-                # Find the index of the item in the element
-                i_item = element.index(item)
+        # Iterate over the elements
+        for i_element, element in enumerate(sequence):
+            is_partial = element[0].startswith('_')
 
-                # If the item appears at the last position in the element,
-                # this element is not returned in the new sequence
-                if i_item == len(element) - 1:
-                    db_proj.append(sequence[i_element+1:])
-                # Otherwise, the items before the item are removed and all
-                # next items receive an '_'
+            # Find the index of the item in the element
+            if item.startswith('_'):
+                if is_partial:
+                    if item not in element:
+                        continue
+                    i_item = element.index(item)
+                elif PrefixSpan._contains_last_element(element, last_element) \
+                    and item[1:] in element:
+                    i_item = element.index(item[1:])
                 else:
-                    first_element = tuple(
-                        f'_{item}' if not item.startswith('_') else item 
-                        for item in sequence[i_element][i_item+1:]
-                    )
-                    db_proj.append([first_element] + sequence[i_element+1:])
+                    continue
+            else:
+                if is_partial or item not in element:
+                    continue
+                i_item = element.index(item)
 
-                break
+            # If the item appears at the last position in the element,
+            # this element is not returned in the new sequence
+            if i_item == len(element) - 1:
+                return sequence[i_element+1:]
+            
+            # Otherwise, the items before the item are removed and all
+            # next items receive an '_'
+            first_element = tuple(
+                e if e.startswith('_') else f'_{e}'
+                for e in element[i_item+1:]
+            )
+            return [first_element] + sequence[i_element+1:]
+
+        return None
 
-        return db_proj
+    @staticmethod
+    def _contains_last_element(element, last_element):
+        """
+        Check if a complete element of a sequence contains last_element.
+        """
+        if not last_element or element[0].startswith('_'):
+            return False
+        return all(item in element for item in last_element)
     
 
 if __name__ == "__main__":
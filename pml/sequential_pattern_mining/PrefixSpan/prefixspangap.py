@@ -2,15 +2,20 @@
 from collections import defaultdict
 import pandas as pd
 
-from pml.base import FSPMiner
+from pml.base import FSPMiner, interruptible, cached
 
 """
 WIP, requires using a Symbol class to handle temporal constraints.
 """
 class PrefixSpan(FSPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    # Patterns with temporal constraints are not maintained by update
+    supports_update = False
 
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
+
+    @cached
+    @interruptible
     def run(self, min_support, max_gap=None, max_size=None):
         """
         Run the PrefixSpan algorithm.
@@ -27,16 +32,6 @@ class PrefixSpan(FSPMiner):
         # Process starts with the complete db and the empty set
         self._pattern_growth([], [])
 
-    def _prepare_sequences(self):
-        """
-        Prepare sequences from a list of sets from the DataFrame.
-        Transaction data is a list of list of sets.
-        Items need to be sorted in lexicographic order.
-        """
-        return [
-            list(map(lambda t: tuple(sorted(t)), row)) 
-            for row in self.data['items']
-        ]
     
     def _pattern_growth(self, sequence, occurrences):
         """
@@ -47,8 +42,10 @@ class PrefixSpan(FSPMiner):
         # print('\nseq =', sequence)
         # print('occurrences =', occurrences)
 
+        self._checkpoint(len(sequence) + 1, sequence)
+
         # Max size constraint check
-        if len(sequence) >= self.max_size:
+        if self.max_size is not None and len(sequence) >= self.max_size:
             # print('reached max_size constraint')
             return
         
@@ -70,7 +67,7 @@ class PrefixSpan(FSPMiner):
             # print('\tnew_occurrences =', new_occurrences)
 
             # Save frequent pattern
-            self.frequent_patterns[tuple(e for e in new_sequence)] = support
+            self._save(tuple(e for e in new_sequence), support)
 
             # Continue depth-first search
             self._pattern_growth(new_sequence, new_occurrences)
@@ -80,52 +77,58 @@ class PrefixSpan(FSPMiner):
         """
         Find all frequent items in db. 
         db is a list of sequences. 
-        Returns a dictionary of frequent items as {item: support}.
+        Returns a dictionary of frequent items as {item: support}, and the 
+        pruned occurrences of each frequent item.
         """
         # print('finding frequent items')
 
-        f_list = defaultdict(list)
+        # Occurrences are stored in sets so that an end position reached from
+        # several occurrences of the prefix is only kept once
+        f_list = defaultdict(set)
         # When db is empty, a full scan is necessary
         if not occurrences:
             for i_seq, sequence in enumerate(self.sequences):
                 for i_itemset, itemset in enumerate(sequence):
                     for i_item, item in enumerate(itemset):
-                        f_list[item].append((i_seq, i_itemset, i_item, item.t_s))
+                        f_list[item.repr].add((i_seq, i_itemset, i_item, item.t_s))
 
         # Otherwise, just check for the symbols within max_gap
         else:
+            # Without max_gap, the leftmost occurrence of a sequence reaches all
+            # the s-extensions of the later ones
+            s_scanned = set()
             for occ in occurrences:
                 sequence = self.sequences[occ[0]]
                 # print('\tseq =', sequence)
                 # print('\tocc =', occ)
+
+                # i-extensions
+                itemset = sequence[occ[1]]
+                for i_item, item in enumerate(itemset[occ[2]+1:]):
+                    f_list[f'_{item.repr}'].add((
+                        occ[0], occ[1], i_item+occ[2]+1, item.t_s
+                    ))
+
+                # s-extensions
+                if self.max_gap is None:
+                    if occ[0] in s_scanned:
+                        continue
+                    s_scanned.add(occ[0])
                 # Early stop condition if max_gap not respected
                 early_stop = False
-                for i_itemset, itemset in enumerate(sequence[occ[1]:]):
-                    # print('\t\titemset =', i_itemset+occ[1], itemset)
+                for i_itemset, itemset in enumerate(sequence[occ[1]+1:]):
                     if early_stop:
                         break
-                    # i-extensions
-                    if i_itemset == 0:
-                        # print('\t\t\ti-ext')
-                        for i_item, item in enumerate(itemset[occ[2]+1:]):
-                            # print('\t\t\titem =', i_item+occ[2]+1, item)
-                            f_list[f'_{item}'].append((
-                                occ[0], i_itemset+occ[1], i_item+occ[2]+1, item.t_s
-                            ))
-                    # s-extensions
-                    else:
-                        # print('\t\t\ts-ext')
-                        for i_item, item in enumerate(itemset):
-                            # print('\t\t\titem =', i_item, item)
-                            # Ensure max_gap constraint
-                            if self.max_gap:
-                                gap = (item.t_s - occ[-1]).total_seconds()
-                                if gap > self.max_gap:
-                                    early_stop = True
-                                    break 
-                            f_list[item.repr].append((
-                                occ[0], i_itemset+occ[1], i_item, item.t_s
-                            ))
+                    for i_item, item in enumerate(itemset):
+                        # Ensure max_gap constraint
+                        if self.max_gap is not None:
+                            gap = (item.t_s - occ[-1]).total_seconds()
+                            if gap > self.max_gap:
+                                early_stop = True
+                                break 
+                        f_list[item.repr].add((
+                            occ[0], i_itemset+occ[1]+1, i_item, item.t_s
+                        ))
 
         frequent_items = {}
         for candidate in sorted(f_list):
@@ -134,7 +137,60 @@ class PrefixSpan(FSPMiner):
             if support >= self.min_support:
                 frequent_items[candidate] = support
     
-        return frequent_items, {c: f_list[c] for c in frequent_items}
+        return frequent_items, {
+            c: self._prune_occurrences(f_list[c]) for c in frequent_items
+        }
+
+    def _prune_occurrences(self, occurrences):
+        """
+        Remove the dominated occurrences of a sequence.
+
+        An occurrence (seq_id, itemset_id, item_id, t_s) dominates another one of
+        the same data sequence when every extension reachable from the latter is
+        also reachable from the former. Without max_gap this keeps the leftmost
+        occurrence of each sequence, plus at most one occurrence per later itemset 
+        that still allows i-extensions. With max_gap, only the non-dominated 
+        occurrences are kept. 
+        Returns the occurrences sorted by (seq_id, itemset_id, item_id).
+        """
+
+        pruned = []
+        for occ in sorted(occurrences, key=lambda occ: occ[:3]):
+
+            # Occurrences are sorted, so potential dominating occurrences of the
+            # same sequence have already been kept
+            dominated = False
+            for other in reversed(pruned):
+                if other[0] != occ[0]:
+                    break
+                if self._dominates(other, occ):
+                    dominated = True
+                    break
+
+            if not dominated:
+                pruned.append(occ)
+
+        return pruned
+
+    def _dominates(self, occ_1, occ_2):
+        """
+        Check if occurrence occ_1 dominates occurrence occ_2.
+        Both occurrences are assumed to belong to the same sequence.
+        """
+
+        # i-extensions of occ_2 are the items after it in its own itemset
+        last_item = len(self.sequences[occ_2[0]][occ_2[1]]) - 1
+        if occ_2[2] != last_item:
+            if occ_1[1] != occ_2[1] or occ_1[2] > occ_2[2]:
+                return False
+
+        # s-extensions of occ_2 are the items of the following itemsets that
+        # respect the max_gap constraint
+        if occ_1[1] > occ_2[1]:
+            return False
+        if self.max_gap is not None:
+            return occ_1[3] >= occ_2[3]
+        return True
     
     def _multi_proj(self, sequence, seq_occ, item, item_occ):
         """
@@ -145,79 +201,46 @@ class PrefixSpan(FSPMiner):
             seq_occ: list of occurrences of the sequence [(seq_id, itemset_id, item_id, t_s), ...]
             item: item to extend with (may start with '_' to signal i-extension)
             item_occ: list of occurrences of the item [(seq_id, itemset_id, item_id, t_s), ...]
-            max_gap: max allowed gap in seconds between two items
 
         Returns:
             new_sequence: extended pattern
             new_occurrences: list of new valid occurrences
+
+        Item occurrences are found by scanning forward from the occurrences of the 
+        sequence, with the i-extension and max_gap checks already applied: they 
+        are the occurrences of the extended pattern.
         """
         # print('\nmulti proj')
 
         # Combine item with current sequence
-        extension_type = None
         if item.startswith('_'):
             # i-extension
             new_sequence = sequence[:-1] + \
                 [tuple(sorted(sequence[-1] + (item[1:],)))]
-            extension_type = 'i-extension'
         else:
             # s-extension
             # print('\ts-extension')
             new_sequence = sequence + [(item,)]
-            extension_type = 's-extension'
-        # print('\tnew_sequence =', new_sequence, extension_type)
-
-        # Return item occurrences if it's the first pass
-        if not seq_occ:
-            # print('\t--> first pass')
-            return new_sequence, item_occ
-
-        # Index item_occ by sequence ID for fast lookup
-        item_occ_index = defaultdict(list)
-        for occ in item_occ:
-            item_occ_index[occ[0]].append(occ)
-        # print('\titem_occ_index =', item_occ_index)
-
-        # Generate new possible occurrences
-        new_occurrences = []
-        for s_occ in seq_occ:
-            # print('\t\ts_occ =', s_occ)
-            seq_id, itemset_id, item_id, t_s = s_occ
-
-            # Early stop if item not in sequence
-            if seq_id not in item_occ_index:
-                # print('\t\tearly stop')
-                continue
-            
-            # Check occurrence per sequence
-            for i_occ in item_occ_index[seq_id]:
-                # print('\t\t\ti_occ =', i_occ)
-                i_seq_id, i_itemset_id, i_item_id, i_t_s = i_occ
-                if extension_type == 'i-extension':
-                    # Same itemset, later item
-                    if i_itemset_id == itemset_id and i_item_id > item_id:
-                        # print('\t\t\t--> apended')
-                        new_occurrences.append((seq_id, i_itemset_id, i_item_id, i_t_s))
-                else:  # s-extension
-                    if i_itemset_id > itemset_id:
-                        if self.max_gap is not None:
-                            gap = (i_t_s - t_s).total_seconds()
-                            if gap > self.max_gap:
-                                continue
-                        # print('\t\t\t--> apended')
-                        new_occurrences.append((seq_id, i_itemset_id, i_item_id, i_t_s))
+        # print('\tnew_sequence =', new_sequence)
 
-        return new_sequence, new_occurrences
+        return new_sequence, item_occ
     
 
 if __name__ == "__main__":
 
+    from pml.utils.symbol import Symbol 
+    from datetime import datetime, timedelta
+
+    t0 = datetime.combine(datetime.today().date(), datetime.min.time())
+    def s(repr, t):
+        return Symbol(repr, t0 + timedelta(seconds=t), t0 + timedelta(seconds=t+1))
+
     data = pd.DataFrame({
         'items': [
-            [('a',), ('a', 'c', 'b',), ('a', 'c',), ('d',), ('c', 'f',)],
-            [('a', 'd',), ('c',), ('b', 'c',), ('a', 'e',),],
-            [('e', 'f',), ('a', 'b',), ('d', 'f',), ('c',), ('b',),],
-            [('e',), ('g',), ('a', 'f',), ('c',), ('b'), ('c'),],
+            [(s('a', 0),), (s('a', 1), s('b', 1), s('c', 1),), (s('a', 2), s('c', 2),), (s('d', 3),), (s('c', 4), s('f', 4),)],
+            [(s('a', 0), s('d', 0),), (s('c', 1),), (s('b', 2), s('c', 2),), (s('a', 3), s('e', 3),),],
+            [(s('e', 0), s('f', 0),), (s('a', 1), s('b', 1),), (s('d', 2), s('f', 2),), (s('c', 3),), (s('b', 4),),],
+            [(s('e', 0),), (s('g', 1),), (s('a', 2), s('f', 2),), (s('c', 3),), (s('b', 4),), (s('c', 5),),],
         ]
     })
 
@@ -225,4 +248,4 @@ if __name__ == "__main__":
     alg.run(min_support=0.3, max_gap=2, max_size=3)
     
     print('data =\n', data)
-    print('Frequent patterns =\n', alg.frequent_patterns)
\ No newline at end of file
+    print('Frequent patterns =\n', alg.frequent_patterns)
@@ -0,0 +1,211 @@
+from collections import defaultdict
+from math import ceil
+import pandas as pd
+
+from pml.base import FSPMiner, interruptible
+
+
+class RuleGrowth(FSPMiner):
+    """
+    Sequential rule miner, following RuleGrowth from Fournier-Viger et al.,
+    RuleGrowth: Mining Sequential Rules Common to Several Sequences by
+    Pattern-Growth (2011).
+
+    A rule X => Y between two disjoint itemsets holds in a sequence if all the
+    items of X occur before all the items of Y, in any order. Its support is the
+    fraction of the sequences where it holds, and its confidence this support
+    divided by the fraction of the sequences containing all the items of X.
+
+    Rules are grown from the rules between two items, without mining the
+    sequential patterns first: right expansions add a greater item to the
+    consequent, left expansions a greater item to the antecedent, and left
+    expansions are never followed by right ones, so that each rule is reached
+    once. For each sequence where a rule holds, the first position where X is
+    complete and the last position where Y can start are kept, and expansions
+    are only looked for after or before them.
+    Rules are saved in frequent_patterns as {(X, Y): support}, with X and Y
+    sorted tuples of items, and their confidence in confidences.
+    """
+
+    # Sequential rules are not maintained by update
+    supports_update = False
+
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
+
+        # First and last itemset of each item, by sequence
+        self.occurrences = self._index_occurrences()
+        self.confidences = {}
+
+    @interruptible
+    def run(self, min_support, min_confidence=0.5, max_antecedent=None, max_consequent=None):
+        """
+        Run the RuleGrowth algorithm.
+
+        Parameters:
+        min_support (float): Minimum support of the rules, as a fraction of the sequences.
+        min_confidence (float): Minimum confidence of the rules.
+        max_antecedent (int): Maximum number of items of X, unbounded if None.
+        max_consequent (int): Maximum number of items of Y, unbounded if None.
+        """
+        self.frequent_patterns = {}
+        self.confidences = {}
+        self.min_confidence = min_confidence
+        self.max_antecedent = max_antecedent
+        self.max_consequent = max_consequent
+        min_count = ceil(min_support * self.n_sequences - 1e-9)
+
+        items = sorted(item for item, sids in self.occurrences.items() if len(sids) >= min_count)
+        self._count('frequent', 1, len(items))
+
+        # Rules between two items, both ways from the sequences containing both
+        for a, i in enumerate(items):
+            occurrences_i = self.occurrences[i]
+            for j in items[a + 1:]:
+                occurrences_j = self.occurrences[j]
+                common = occurrences_i.keys() & occurrences_j.keys()
+                if len(common) < min_count:
+                    continue
+                for x, y, occurrences_x, occurrences_y in (
+                        (i, j, occurrences_i, occurrences_j), (j, i, occurrences_j, occurrences_i)):
+                    self._checkpoint(2, (x, y))
+                    # The rule holds where x starts before the last itemset of y
+                    holds = {
+                        sid: (occurrences_x[sid][0], occurrences_y[sid][1])
+                        for sid in common if occurrences_x[sid][0] < occurrences_y[sid][1]
+                    }
+                    if len(holds) < min_count:
+                        continue
+                    X, Y, sids_X = (x,), (y,), set(occurrences_x)
+                    self._save_rule(X, Y, holds, sids_X)
+                    self._expand_left(X, Y, holds, sids_X, min_count)
+                    self._expand_right(X, Y, holds, sids_X, min_count)
+
+    def sequential_rules(self, min_confidence=None):
+        """
+        Return the rules of the last run whose confidence reaches min_confidence,
+        by default the one of the run, as a DataFrame with columns antecedent,
+        consequent, support, confidence and lift.
+        """
+        if not self.frequent_patterns:
+            raise RuntimeError('Run algorithm first.')
+        if min_confidence is None:
+            min_confidence = self.min_confidence
+
+        rules = []
+        consequent_supports = {}
+        for (X, Y), support in self.frequent_patterns.items():
+            confidence = self.confidences[(X, Y)]
+            if confidence < min_confidence:
+                continue
+            # Lift against the fraction of the sequences containing all the items of Y
+            if Y not in consequent_supports:
+                sids = set.intersection(*(set(self.occurrences[y]) for y in Y))
+                consequent_supports[Y] = len(sids) / self.n_sequences
+            rules.append((frozenset(X), frozenset(Y), support, confidence, confidence / consequent_supports[Y]))
+
+        return pd.DataFrame(rules, columns=['antecedent', 'consequent', 'support', 'confidence', 'lift'])
+
+    def _index_occurrences(self):
+        """
+        Map each item to {sequence id: (first itemset, last itemset)} of the
+        sequences containing it.
+        """
+        occurrences = defaultdict(dict)
+        for sid, sequence in enumerate(self.sequences):
+            for position, itemset in enumerate(sequence):
+                for item in itemset:
+                    if sid in occurrences[item]:
+                        occurrences[item][sid] = (occurrences[item][sid][0], position)
+                    else:
+                        occurrences[item][sid] = (position, position)
+        return dict(occurrences)
+
+    def _expand_left(self, X, Y, holds, sids_X, min_count):
+        """
+        Add an item greater than those of X to the antecedent.
+        holds maps the sequences where X => Y holds to the first itemset where
+        X is complete and the last itemset where Y can start.
+        """
+        if self.max_antecedent is not None and len(X) >= self.max_antecedent:
+            return
+        # Sequences where each item occurs before Y can start
+        candidates = defaultdict(list)
+        for sid, (first_X, last_Y) in holds.items():
+            seen = set()
+            for itemset in self.sequences[sid][:last_Y]:
+                for c in itemset:
+                    if c > X[-1] and c not in seen and c not in Y:
+                        seen.add(c)
+                        candidates[c].append(sid)
+
+        for c in sorted(candidates):
+            sids = candidates[c]
+            if len(sids) < min_count:
+                continue
+            self._checkpoint(len(X) + len(Y) + 1, (X, Y))
+            occurrences_c = self.occurrences[c]
+            new_holds = {sid: (max(holds[sid][0], occurrences_c[sid][0]), holds[sid][1]) for sid in sids}
+            new_X = X + (c,)
+            new_sids_X = sids_X.intersection(occurrences_c)
+            self._save_rule(new_X, Y, new_holds, new_sids_X)
+            self._expand_left(new_X, Y, new_holds, new_sids_X, min_count)
+
+    def _expand_right(self, X, Y, holds, sids_X, min_count):
+        """
+        Add an item greater than those of Y to the consequent, then expand the
+        new rule both ways.
+        """
+        if self.max_consequent is not None and len(Y) >= self.max_consequent:
+            return
+        # Sequences where each item occurs after X is complete
+        candidates = defaultdict(list)
+        for sid, (first_X, last_Y) in holds.items():
+            seen = set()
+            for itemset in self.sequences[sid][first_X + 1:]:
+                for d in itemset:
+                    if d > Y[-1] and d not in seen and d not in X:
+                        seen.add(d)
+                        candidates[d].append(sid)
+
+        for d in sorted(candidates):
+            sids = candidates[d]
+            if len(sids) < min_count:
+                continue
+            self._checkpoint(len(X) + len(Y) + 1, (X, Y))
+            occurrences_d = self.occurrences[d]
+            new_holds = {sid: (holds[sid][0], min(holds[sid][1], occurrences_d[sid][1])) for sid in sids}
+            new_Y = Y + (d,)
+            self._save_rule(X, new_Y, new_holds, sids_X)
+            self._expand_left(X, new_Y, new_holds, sids_X, min_count)
+            self._expand_right(X, new_Y, new_holds, sids_X, min_count)
+
+    def _save_rule(self, X, Y, holds, sids_X):
+        """
+        Save a frequent rule if its confidence reaches min_confidence.
+        Frequent rules below it are still expanded, as expansions of the
+        consequent can only lower the confidence but expansions of the
+        antecedent can raise it.
+        """
+        self._count('frequent', len(X) + len(Y))
+        confidence = len(holds) / len(sids_X)
+        if confidence < self.min_confidence:
+            return
+        self._count('rules', len(X) + len(Y))
+        self._save((X, Y), len(holds) / self.n_sequences)
+        self.confidences[(X, Y)] = confidence
+
+
+if __name__ == "__main__":
+
+    data = pd.DataFrame({
+        'items': [
+            [('a', 'b'), ('c',), ('f',), ('g',), ('e',)], [('a', 'd'), ('c',), ('b',), ('a', 'b', 'e', 'f')],
+            [('a',), ('b',), ('f',), ('e',)], [('b',), ('f', 'g')]
+        ]
+    })
+    alg = RuleGrowth(data, 'items')
+    alg.run(min_support=0.5, min_confidence=0.6)
+
+    print('data =\n', data)
+    print('Sequential rules =\n', alg.sequential_rules())
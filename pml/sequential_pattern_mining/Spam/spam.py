@@ -3,12 +3,12 @@ import pandas as pd
 
 from pml.sequential_pattern_mining.Spam.bitmap import Bitmap
 from pml.sequential_pattern_mining.Spam.tree import Tree
-from pml.base import FSPMiner
+from pml.base import FSPMiner, interruptible, cached
 
 
 class Spam(FSPMiner):
-    def __init__(self, data: pd.DataFrame, item_col: str):
-        super().__init__(data, item_col)
+    def __init__(self, data, item_col: str, **kwargs):
+        super().__init__(data, item_col, **kwargs)
 
         # Convert horizontal db input into the vertical format
         self.item_bitmaps = self._create_vertical_bitmaps()
@@ -18,6 +18,8 @@ class Spam(FSPMiner):
         # additional pruning strategies
         self.tree = Tree()
 
+    @cached
+    @interruptible
     def run(self, min_support):
         """
         Run the Spam algorithm.
@@ -27,13 +29,21 @@ class Spam(FSPMiner):
         self.frequent_patterns = {}
 
         # Get frequent 1-itemsets
-        L_0 = [b for b in self.item_bitmaps.values()]
+        L_0 = [b for b in self.item_bitmaps.values() if b.compute_support() >= min_support]
         # print('L_0 =', L_0)
+        self._count('frequent', 1, len(L_0))
 
         # Process starts with all frequent 1-itemsets
+        # Itemset-extensions only use greater items, so that each itemset is generated once
         for sequence in L_0:
-            self._DFS_pruning(sequence, L_0, L_0, min_support)
+            self._DFS_pruning(sequence, L_0, [j for j in L_0 if j > sequence], min_support)
     
+    def _sequences_updated(self):
+        """
+        Rebuild the item bitmaps after an update.
+        """
+        self.item_bitmaps = self._create_vertical_bitmaps()
+
     def _create_vertical_bitmaps(self):
         """
         Items are sorted in lexicographic order.
@@ -69,9 +79,9 @@ class Spam(FSPMiner):
         """
 
         # Add frequent pattern
-        self.frequent_patterns[
-            tuple(tuple(itemset) for itemset in sequence.sequence)
-        ] = sequence.compute_support()        
+        self._save(
+            tuple(tuple(itemset) for itemset in sequence.sequence), sequence.compute_support()
+        )        
 
         # Initialize empty children's S_n and I_n lists
         S_temp = []
@@ -81,6 +91,10 @@ class Spam(FSPMiner):
         # print('\t --> ADDING frequent pattern')
         # print('\tS_n =', S_n)
         # print('\tI_n =', I_n)
+        depth = sum(len(itemset) for itemset in sequence.sequence) + 1
+        self._checkpoint(depth, sequence.sequence)
+        self._count('s_steps', depth, len(S_n))
+        self._count('i_steps', depth, len(I_n))
 
         # Populate S_temp with the frequent items i in S_n
         # if the sequence-extension of the current sequence
@@ -101,6 +115,7 @@ class Spam(FSPMiner):
 
             # Continue tree exploration with the new updated sequence
             self._DFS_pruning(sequence.S_step(item), S_temp, I_children, min_support)
+        self._count('frequent', depth, len(S_temp))
 
         # Populate I_temp with the frequent items i in I_n
         # if the itemset-extension of the current sequence
@@ -125,6 +140,7 @@ class Spam(FSPMiner):
 
             # Continue tree exploration with the new updated sequence
             self._DFS_pruning(sequence.I_step(item), S_temp, I_children, min_support)
+        self._count('frequent', depth, len(I_temp))
 
 
 if __name__ == "__main__":
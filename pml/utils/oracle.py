@@ -0,0 +1,439 @@
+from importlib import import_module
+from itertools import combinations
+import argparse
+import random
+import pandas as pd
+
+from pml.utils.symbol import Symbol
+
+
+# Miners checked against the reference, as (name, module, class, kind, mode, options)
+# kind is 'itemsets', 'sequences' or 'symbols' (sequences of Symbols), mode is the
+# family of patterns returned ('all', 'closed', 'maximal' or 'top_k') and options
+# are passed to run along with min_support (top_k instead for 'top_k')
+CASES = [
+    ('Apriori', 'pml.pattern_mining.apriori', 'Apriori', 'itemsets', 'all', {}),
+    ('AprioriTID', 'pml.pattern_mining.apriori_TID', 'AprioriTID', 'itemsets', 'all', {}),
+    ('Apriori (top-k)', 'pml.pattern_mining.apriori', 'Apriori', 'itemsets', 'top_k', {}),
+    ('Eclat', 'pml.pattern_mining.eclat', 'Eclat', 'itemsets', 'all', {}),
+    ('Eclat (top-k)', 'pml.pattern_mining.eclat', 'Eclat', 'itemsets', 'top_k', {}),
+    ('Eclat (bitset)', 'pml.pattern_mining.eclat', 'Eclat', 'itemsets', 'all', {'representation': 'bitset'}),
+    ('Eclat (diffset)', 'pml.pattern_mining.eclat', 'Eclat', 'itemsets', 'all', {'representation': 'diffset'}),
+    ('Eclat (closed)', 'pml.pattern_mining.eclat', 'Eclat', 'itemsets', 'closed', {'mode': 'closed'}),
+    ('Eclat (maximal)', 'pml.pattern_mining.eclat', 'Eclat', 'itemsets', 'maximal', {'mode': 'maximal'}),
+    ('PatternGrowth', 'pml.pattern_mining.pattern_growth', 'PatternGrowth', 'itemsets', 'all', {}),
+    ('FPGrowth', 'pml.pattern_mining.fp_growth.fp_growth', 'FPGrowth', 'itemsets', 'all', {}),
+    ('FPGrowth (closed)', 'pml.pattern_mining.fp_growth.fp_growth', 'FPGrowth', 'itemsets', 'closed', {'mode': 'closed'}),
+    ('FPGrowth (maximal)', 'pml.pattern_mining.fp_growth.fp_growth', 'FPGrowth', 'itemsets', 'maximal', {'mode': 'maximal'}),
+    ('LCM', 'pml.pattern_mining.lcm', 'LCM', 'itemsets', 'closed', {}),
+    ('GSP', 'pml.sequential_pattern_mining.GSP.gsp', 'GSP', 'sequences', 'all', {}),
+    ('AprioriAll', 'pml.sequential_pattern_mining.AprioriAll.apriori_all', 'AprioriAll', 'sequences', 'all', {}),
+    ('PrefixSpan', 'pml.sequential_pattern_mining.PrefixSpan.prefixspan', 'PrefixSpan', 'sequences', 'all', {}),
+    ('PrefixSpan (top-k)', 'pml.sequential_pattern_mining.PrefixSpan.prefixspan', 'PrefixSpan', 'sequences', 'top_k', {}),
+    ('PrefixSpan (gap)', 'pml.sequential_pattern_mining.PrefixSpan.prefixspangap', 'PrefixSpan', 'symbols', 'all', {}),
+    ('PrefixSpan (max_gap=1)', 'pml.sequential_pattern_mining.PrefixSpan.prefixspangap', 'PrefixSpan', 'symbols', 'all', {
+        'max_gap': 1
+    }),
+    ('PrefixSpan (max_gap=0)', 'pml.sequential_pattern_mining.PrefixSpan.prefixspangap', 'PrefixSpan', 'symbols', 'all', {
+        'max_gap': 0
+    }),
+    ('Spam', 'pml.sequential_pattern_mining.Spam.spam', 'Spam', 'sequences', 'all', {}),
+    ('FreeSpan', 'pml.sequential_pattern_mining.FreeSpan.freespan', 'FreeSpan', 'sequences', 'all', {}),
+    ('CloSpan', 'pml.sequential_pattern_mining.CloSpan.clospan', 'CloSpan', 'sequences', 'closed', {}),
+    ('CloSPEC', 'pml.sequential_pattern_mining.CloSPEC.clospec', 'CloSPEC', 'symbols', 'closed', {
+        'min_gap': 0, 'max_gap': float('inf'), 'max_size': float('inf')
+    }),
+]
+
+
+def reference_itemsets(transactions, min_count, mode='all'):
+    """
+    Brute-force reference for frequent itemset mining.
+    Itemsets are enumerated level-wise and counted against every transaction.
+    Returns a dictionary of {frozenset: count}.
+    """
+    transactions = [frozenset(t) for t in transactions]
+    items = sorted({item for t in transactions for item in t})
+
+    patterns = {}
+    level = [frozenset()]
+    while level:
+        next_level = set()
+        for itemset in level:
+            for item in items:
+                if item in itemset:
+                    continue
+                candidate = itemset | {item}
+                if candidate in patterns or candidate in next_level:
+                    continue
+                count = sum(candidate <= t for t in transactions)
+                if count >= min_count:
+                    patterns[candidate] = count
+                    next_level.add(candidate)
+        level = next_level
+
+    def extensions(itemset):
+        return (itemset | {item} for item in items if item not in itemset)
+
+    return _filter(patterns, mode, extensions)
+
+
+def reference_sequences(sequences, min_count, mode='all', max_gap=None):
+    """
+    Brute-force reference for frequent sequential pattern mining.
+    Patterns are grown by i- and s-extensions and counted against every sequence.
+    With max_gap, consecutive elements of a pattern must match elements at most
+    max_gap apart (elements are one time unit apart, see _to_symbols).
+    Returns a dictionary of {tuple of sorted tuples: count}.
+    """
+    sequences = [[set(element) for element in s] for s in sequences]
+    items = sorted({item for s in sequences for element in s for item in element})
+
+    patterns = {}
+    level = [()]
+    while level:
+        next_level = []
+        for pattern in level:
+            candidates = [pattern + ((item,),) for item in items]
+            if pattern:
+                candidates += [
+                    pattern[:-1] + (pattern[-1] + (item,),)
+                    for item in items if item > pattern[-1][-1]
+                ]
+            for candidate in candidates:
+                if candidate in patterns:
+                    continue
+                count = sum(is_subsequence(candidate, s, max_gap) for s in sequences)
+                if count >= min_count:
+                    patterns[candidate] = count
+                    next_level.append(candidate)
+        level = next_level
+
+    def extensions(sequence):
+        for i in range(len(sequence) + 1):
+            for item in items:
+                # Insertion of a new element
+                yield sequence[:i] + ((item,),) + sequence[i:]
+                # Insertion in an existing element
+                if i < len(sequence) and item not in sequence[i]:
+                    yield sequence[:i] + (tuple(sorted(sequence[i] + (item,))),) + sequence[i+1:]
+
+    return _filter(patterns, mode, extensions)
+
+
+def is_subsequence(P1, P2, max_gap=None):
+    """
+    Check if sequence P1 is a subsequence of sequence P2, with consecutive
+    elements of P1 matched at most max_gap elements apart if given.
+    """
+    if max_gap is not None:
+        # Positions of P2 where a match of the first elements of P1 can end
+        ends = None
+        for element in P1:
+            ends = [
+                j for j in range(len(P2))
+                if set(element) <= set(P2[j]) and (ends is None or any(i < j <= i + max_gap for i in ends))
+            ]
+        return ends is None or bool(ends)
+
+    i1 = 0
+    for element in P2:
+        if i1 < len(P1) and set(P1[i1]) <= set(element):
+            i1 += 1
+    return i1 == len(P1)
+
+
+def reference_sequential_rules(sequences, min_count, min_confidence=0.5):
+    """
+    Brute-force reference for FSPMiner.sequential_rules: each frequent pattern
+    is split into a prefix X and the rest Y, and the rule "X, then Y" is kept if
+    count(X + Y) / count(X) reaches min_confidence.
+    Returns a dictionary of {(X, Y): (count, confidence)}.
+    """
+    patterns = reference_sequences(sequences, min_count)
+    return {
+        (pattern[:k], pattern[k:]): (count, count / patterns[pattern[:k]])
+        for pattern, count in patterns.items() for k in range(1, len(pattern))
+        if count / patterns[pattern[:k]] >= min_confidence
+    }
+
+
+def reference_rules(sequences, min_count, min_confidence=0.5):
+    """
+    Brute-force reference for the rules X => Y between unordered itemsets of
+    RuleGrowth, where all the items of X occur before all the items of Y.
+    Every split of the itemsets occurring in min_count sequences is counted
+    against every sequence, and its confidence is its count divided by the
+    number of sequences containing all the items of X.
+    Returns a dictionary of {(X, Y): (count, confidence)}, X and Y sorted tuples.
+    """
+    sequences = [[set(element) for element in s] for s in sequences]
+    itemsets = reference_itemsets([set().union(*s) for s in sequences], min_count)
+
+    rules = {}
+    for itemset in itemsets:
+        items = sorted(itemset)
+        for size in range(1, len(items)):
+            for X in combinations(items, size):
+                Y = tuple(item for item in items if item not in X)
+                count = sum(rule_holds(X, Y, s) for s in sequences)
+                if count >= min_count and count / itemsets[frozenset(X)] >= min_confidence:
+                    rules[(X, Y)] = (count, count / itemsets[frozenset(X)])
+    return rules
+
+
+def rule_holds(X, Y, sequence):
+    """
+    Check if all the items of X occur before all the items of Y in a sequence.
+    """
+    return any(
+        set(X) <= set().union(*sequence[:k]) and set(Y) <= set().union(*sequence[k:])
+        for k in range(1, len(sequence))
+    )
+
+
+def normalize(alg, kind):
+    """
+    Normalize the results of a miner that has been run as {pattern: count}.
+    Itemsets become frozensets and sequences become tuples of sorted tuples,
+    relative supports become exact integer counts.
+    """
+    if kind == 'itemsets':
+        n = alg.n_transactions
+        results = alg.get_results() if alg._frequent_patterns else {}
+    else:
+        n = alg.n_sequences
+        if hasattr(alg, 'patterns'):
+            results = {p: support for support, P in alg.patterns.items() for p in P}
+        else:
+            results = alg.frequent_patterns
+
+    normalized = {}
+    for pattern, support in results.items():
+        if kind == 'itemsets':
+            pattern = frozenset(pattern)
+        else:
+            pattern = tuple(tuple(sorted(_item(i) for i in element)) for element in pattern)
+        normalized[pattern] = int(round(support * n))
+    return normalized
+
+
+def compare(expected, found):
+    """
+    Differences between the reference and a miner's results, as a dictionary of
+    missing patterns, extra patterns and patterns with wrong counts.
+    """
+    return {
+        'missing': {p: c for p, c in expected.items() if p not in found},
+        'extra': {p: c for p, c in found.items() if p not in expected},
+        'wrong_count': {
+            p: (c, found[p]) for p, c in expected.items() if p in found and found[p] != c
+        },
+    }
+
+
+def check(case, data, min_count):
+    """
+    Run a case on data and compare its results with the reference.
+    Returns None if they are equivalent, the differences (or the error) otherwise.
+    """
+    name, module, class_name, kind, mode, options = case
+    n = len(data)
+    min_support = min_count / n
+
+    # Reference
+    reference = reference_itemsets if kind == 'itemsets' else reference_sequences
+    if mode == 'top_k':
+        # min_count is used as k: the expected patterns are those whose count
+        # reaches the k-th highest count, the highest count with k patterns
+        expected = {}
+        for count in range(n, 0, -1):
+            expected = reference(data, count)
+            if len(expected) >= min_count:
+                break
+    elif kind == 'itemsets':
+        expected = reference(data, min_count, mode)
+    else:
+        expected = reference(data, min_count, mode, options.get('max_gap'))
+
+    # Miner
+    try:
+        cls = getattr(import_module(module), class_name)
+        if kind == 'symbols':
+            alg = cls(pd.DataFrame({'items': _to_symbols(data)}), 'items')
+        else:
+            alg = cls(pd.DataFrame({'items': data}), 'items')
+
+        if mode == 'top_k':
+            alg.run(top_k=min_count, **options)
+        elif class_name == 'CloSPEC':
+            alg.run({'min_support': min_support, **options})
+        else:
+            alg.run(min_support=min_support, **options)
+        found = normalize(alg, kind)
+
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+
+    differences = compare(expected, found)
+    return differences if any(differences.values()) else None
+
+
+def check_case(case, n_trials=100, seed=0, max_transactions=8, max_items=5, max_size=4, max_length=4):
+    """
+    Property-based check of a case: the miner must match the reference on
+    n_trials random databases, with thresholds that land exactly on counts.
+    Returns None if all trials pass, or the first counterexample, shrunk to a
+    minimal database, as (data, min_count, differences).
+    """
+    rng = random.Random(seed)
+    kind = case[3]
+
+    for _ in range(n_trials):
+        if kind == 'itemsets':
+            data = random_baskets(rng, max_transactions, max_items, max_size)
+        else:
+            data = random_sequences(rng, max_transactions, max_items, max_size, max_length)
+        min_count = rng.randint(1, len(data))
+
+        differences = check(case, data, min_count)
+        if differences is not None:
+            return _shrink(case, data, min_count, differences)
+
+    return None
+
+
+def check_all(cases=None, **kwargs):
+    """
+    Check every case and return the counterexamples as {name: counterexample}.
+    """
+    counterexamples = {}
+    for case in cases or CASES:
+        counterexample = check_case(case, **kwargs)
+        if counterexample is not None:
+            counterexamples[case[0]] = counterexample
+    return counterexamples
+
+
+def random_baskets(rng, max_transactions, max_items, max_size):
+    """
+    Random basket database over items 'a', 'b', ...
+    """
+    items = [chr(ord('a') + i) for i in range(max_items)]
+    return [
+        sorted(rng.sample(items, rng.randint(1, min(max_size, max_items))))
+        for _ in range(rng.randint(1, max_transactions))
+    ]
+
+
+def random_sequences(rng, max_sequences, max_items, max_size, max_length):
+    """
+    Random sequence database over items 'a', 'b', ...
+    """
+    items = [chr(ord('a') + i) for i in range(max_items)]
+    return [
+        [
+            tuple(sorted(rng.sample(items, rng.randint(1, min(max_size, max_items)))))
+            for _ in range(rng.randint(1, max_length))
+        ]
+        for _ in range(rng.randint(1, max_sequences))
+    ]
+
+
+def _shrink(case, data, min_count, differences):
+    """
+    Greedily drop transactions (or elements) while the miner still fails, to
+    report a minimal counterexample.
+    """
+    shrunk = True
+    while shrunk:
+        shrunk = False
+
+        # Candidate databases: one transaction less, or one element less
+        candidates = [(data[:i] + data[i+1:], i) for i in range(len(data))]
+        if case[3] != 'itemsets':
+            candidates += [
+                (data[:i] + [s[:j] + s[j+1:]] + data[i+1:], None)
+                for i, s in enumerate(data) if len(s) > 1 for j in range(len(s))
+            ]
+
+        for candidate, _ in candidates:
+            if not candidate:
+                continue
+            candidate_count = min(min_count, len(candidate))
+            candidate_differences = check(case, candidate, candidate_count)
+            if candidate_differences is not None:
+                data, min_count, differences = candidate, candidate_count, candidate_differences
+                shrunk = True
+                break
+
+    return data, min_count, differences
+
+
+def _to_symbols(data):
+    """
+    Convert sequences to Symbol sequences, one itemset per second.
+    """
+    t0 = pd.Timestamp('2000-01-01')
+    return [
+        [
+            tuple(
+                Symbol(item, t0 + pd.Timedelta(seconds=k), t0 + pd.Timedelta(seconds=k+1))
+                for item in element
+            )
+            for k, element in enumerate(sequence)
+        ]
+        for sequence in data
+    ]
+
+
+def _item(item):
+    """
+    Underlying item of a pattern item.
+    """
+    return item.repr if isinstance(item, Symbol) else item
+
+
+def _filter(patterns, mode, extensions):
+    """
+    Keep the closed or maximal patterns.
+    A pattern is closed if no super-pattern has the same count, and maximal if no
+    super-pattern is frequent. By anti-monotonicity, it is enough to check the
+    super-patterns with one more item, given by extensions(pattern).
+    """
+    if mode == 'all':
+        return patterns
+    if mode == 'closed':
+        return {
+            p: c for p, c in patterns.items()
+            if not any(patterns.get(q) == c for q in extensions(p))
+        }
+    if mode == 'maximal':
+        return {
+            p: c for p, c in patterns.items()
+            if not any(q in patterns for q in extensions(p))
+        }
+    raise ValueError(f'Invalid mode: {mode}.')
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Check the pml miners against a brute-force reference.')
+    parser.add_argument('--miners', nargs='+', choices=[case[0] for case in CASES])
+    parser.add_argument('--trials', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if not args.miners or case[0] in args.miners]
+    for case in cases:
+        counterexample = check_case(case, n_trials=args.trials, seed=args.seed)
+        if counterexample is None:
+            print(f'{case[0]}: OK')
+            continue
+        data, min_count, differences = counterexample
+        print(f'{case[0]}: FAILED')
+        print('\tdata =', data)
+        print('\tmin_count =', min_count)
+        for key, value in differences.items():
+            if value:
+                print(f'\t{key} =', value)
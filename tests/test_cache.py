@@ -0,0 +1,40 @@
+"""
+Checks of the result cache of the miners.
+"""
+import pandas as pd
+
+from pml.base import CallbackSink
+from pml.pattern_mining.apriori import Apriori
+
+
+DATA = pd.DataFrame({
+    'items': [
+        ['bread', 'milk'], ['bread', 'diaper', 'beer', 'egg'], ['milk', 'diaper', 'beer', 'coke'],
+        ['bread', 'milk', 'diaper', 'beer'], ['bread', 'milk', 'diaper', 'coke'],
+    ]
+})
+
+
+def test_apriori_frontier_only_recorded_for_the_cache():
+    alg = Apriori(DATA, 'items')
+    alg.run(min_support=0.4)
+    assert alg._frontier is None
+
+    alg.enable_cache()
+    alg.run(min_support=0.3, sink=CallbackSink(lambda pattern, support: None))
+    assert alg._frontier is None
+
+    alg.run(min_support=0.4)
+    assert alg._frontier
+
+
+def test_apriori_lower_support_from_frontier():
+    expected = Apriori(DATA, 'items')
+    expected.run(min_support=0.2)
+
+    alg = Apriori(DATA, 'items')
+    alg.enable_cache()
+    alg.run(min_support=0.6)
+    alg.run(min_support=0.2)
+
+    assert alg.get_results() == expected.get_results()
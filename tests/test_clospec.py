@@ -0,0 +1,30 @@
+"""
+Checks of CloSPEC across several runs of the same miner.
+"""
+import pandas as pd
+
+from pml.sequential_pattern_mining.CloSPEC.clospec import CloSPEC
+from pml.utils.oracle import _to_symbols
+
+
+DATA = [
+    [('a',), ('a', 'b', 'c'), ('c',)],
+    [('a',), ('a', 'b', 'c'), ('c', 'e')],
+    [('b',), ('c',), ('e',)],
+]
+
+
+def _patterns(alg):
+    return {p: support for support, P in alg.patterns.items() for p in P}
+
+
+def test_rerun_matches_fresh_miner():
+    alg = CloSPEC(pd.DataFrame({'items': _to_symbols(DATA)}), 'items')
+    alg.run({'min_support': 1 / 3, 'max_gap': 5})
+    alg.run({'min_support': 2 / 3})
+
+    fresh = CloSPEC(pd.DataFrame({'items': _to_symbols(DATA)}), 'items')
+    fresh.run({'min_support': 2 / 3, 'max_gap': 5})
+
+    assert _patterns(alg) == _patterns(fresh)
+    assert alg.ht.n_patterns == fresh.ht.n_patterns
@@ -0,0 +1,45 @@
+"""
+Checks of the arguments and budgets of the runs.
+"""
+import pandas as pd
+import pytest
+
+from pml.base.control import _memory_mb
+from pml.pattern_mining.apriori import Apriori
+
+
+DATA = pd.DataFrame({
+    'items': [
+        ['bread', 'milk'], ['bread', 'diaper', 'beer', 'egg'], ['milk', 'diaper', 'beer', 'coke'],
+        ['bread', 'milk', 'diaper', 'beer'], ['bread', 'milk', 'diaper', 'coke'],
+    ]
+})
+
+@pytest.mark.parametrize('args, kwargs', [((None, 3), {}), ((), {'top_k': 3}), ((None,), {'top_k': 3})])
+def test_top_k_passed_positionally_or_by_name(args, kwargs):
+    alg = Apriori(DATA, 'items')
+    alg.run(*args, **kwargs)
+    assert alg.get_results() == {frozenset([item]): 0.8 for item in ('bread', 'milk', 'diaper')}
+    assert alg.run_min_support == 0.8
+    assert alg.run_constraints == {}
+
+
+needs_memory = pytest.mark.skipif(_memory_mb() is None, reason='memory of the process cannot be read')
+
+
+@needs_memory
+def test_memory_budget_ignores_memory_used_before_the_run():
+    # Peak memory of the process well above the budget, released before the run
+    block = bytearray(b'\x01') * (200 * 2**20)
+    del block
+
+    alg = Apriori(DATA, 'items')
+    alg.run(min_support=0.4, max_memory_mb=50)
+    assert alg.interrupted is None
+
+
+@needs_memory
+def test_memory_budget_stops_the_run():
+    alg = Apriori(DATA, 'items')
+    alg.run(min_support=0.4, max_memory_mb=0)
+    assert alg.interrupted == 'max_memory_mb'
@@ -0,0 +1,143 @@
+"""
+Checks of the incremental updates of the miners.
+"""
+import pandas as pd
+import pytest
+
+from pml.pattern_mining.apriori import Apriori
+from pml.pattern_mining.eclat import Eclat
+from pml.pattern_mining.fp_growth.fp_growth import FPGrowth
+from pml.pattern_mining.lcm import LCM
+from pml.sequential_pattern_mining.CloSPEC.clospec import CloSPEC
+from pml.sequential_pattern_mining.CloSpan.clospan import CloSpan
+from pml.sequential_pattern_mining.GSP.gsp import GSP
+from pml.sequential_pattern_mining.PrefixSpan.prefixspan import PrefixSpan
+from pml.sequential_pattern_mining.PrefixSpan import prefixspangap
+from pml.sequential_pattern_mining.RuleGrowth.rulegrowth import RuleGrowth
+from pml.sequential_pattern_mining.Spam.spam import Spam
+from pml.utils.oracle import _to_symbols
+
+
+TRANSACTIONS = [
+    ['bread', 'milk'], ['bread', 'diaper', 'beer', 'egg'], ['milk', 'diaper', 'beer', 'coke'],
+    ['bread', 'milk', 'diaper', 'beer'], ['bread', 'milk', 'diaper', 'coke'],
+]
+
+SEQUENCES = [
+    [('a',), ('a', 'b', 'c'), ('a', 'c'), ('d',), ('c', 'f')],
+    [('a', 'd'), ('c',), ('b', 'c'), ('a', 'e')],
+    [('e', 'f'), ('a', 'b'), ('d', 'f'), ('c',), ('b',)],
+    [('e',), ('g',), ('a', 'f'), ('c',), ('b',), ('c',)],
+]
+
+
+@pytest.mark.parametrize('miner', [Apriori, Eclat, FPGrowth])
+def test_itemsets_update_matches_rerun(miner):
+    new_transactions = [['bread', 'beer'], ['coke', 'egg', 'beer'], ['egg', 'coke', 'jam']]
+    alg = miner(pd.DataFrame({'items': TRANSACTIONS}), 'items')
+    alg.run(min_support=0.3)
+    alg.update(pd.DataFrame({'items': new_transactions[:1]}))
+    alg.update(pd.DataFrame({'items': new_transactions[1:]}))
+
+    fresh = miner(pd.DataFrame({'items': TRANSACTIONS + new_transactions}), 'items')
+    fresh.run(min_support=0.3)
+
+    assert alg.get_results() == pytest.approx(fresh.get_results())
+
+
+NEW_SEQUENCES = [[('a',), ('b', 'f'), ('c',)], [('e', 'f'), ('b',)]]
+
+APPENDED = {1: [('b', 'f'), ('c',)], 3: [('e',), ('f',)]}
+
+
+@pytest.mark.parametrize('miner', [PrefixSpan, Spam])
+@pytest.mark.parametrize('updates', [
+    [{'new_data': NEW_SEQUENCES}],
+    [{'appended': APPENDED}],
+    [{'new_data': NEW_SEQUENCES}, {'appended': APPENDED}],
+    [{'appended': APPENDED}, {'new_data': NEW_SEQUENCES[:1]}, {'new_data': NEW_SEQUENCES[1:]}],
+])
+def test_sequences_update_matches_rerun(miner, updates):
+    alg = miner(pd.DataFrame({'items': SEQUENCES}), 'items')
+    alg.run(min_support=0.5)
+
+    sequences = list(SEQUENCES)
+    for update in updates:
+        if 'new_data' in update:
+            alg.update(new_data=pd.DataFrame({'items': update['new_data']}))
+            sequences += update['new_data']
+        else:
+            alg.update(appended=update['appended'])
+            for sid, itemsets in update['appended'].items():
+                sequences[sid] = sequences[sid] + itemsets
+
+        # Updates after the first one only re-mine the affected sequences from the buffer
+        fresh = miner(pd.DataFrame({'items': sequences}), 'items')
+        fresh.run(min_support=0.5)
+        assert alg.frequent_patterns == pytest.approx(fresh.frequent_patterns)
+
+
+def test_itemsets_update_refuses_interrupted_run():
+    alg = Apriori(pd.DataFrame({'items': TRANSACTIONS}), 'items')
+    alg.run(min_support=0.4, max_patterns=3)
+    assert alg.interrupted == 'max_patterns'
+
+    with pytest.raises(RuntimeError, match='interrupted'):
+        alg.update(pd.DataFrame({'items': [['bread', 'beer']]}))
+
+
+def test_sequences_update_refuses_interrupted_run():
+    alg = PrefixSpan(pd.DataFrame({'items': SEQUENCES}), 'items')
+    alg.run(min_support=0.5, max_patterns=3)
+    assert alg.interrupted == 'max_patterns'
+
+    with pytest.raises(RuntimeError, match='interrupted'):
+        alg.update(pd.DataFrame({'items': [[('a',), ('b',)]]}))
+
+
+def test_sequences_update_refuses_constrained_run():
+    sequences = [[(item,) for item in sequence] for sequence in ['abcd', 'acbd', 'bcd', 'abd']]
+    alg = GSP(pd.DataFrame({'items': sequences}), 'items')
+    alg.run(min_support=0.5, max_gap=2)
+    assert alg.run_constraints == {'max_gap': 2}
+
+    with pytest.raises(RuntimeError, match='constraints'):
+        alg.update(pd.DataFrame({'items': [[('a',), ('b',)]]}))
+
+
+def test_itemsets_update_ignores_representation():
+    alg = Eclat(pd.DataFrame({'items': TRANSACTIONS}), 'items')
+    alg.run(min_support=0.4, representation='bitset')
+    alg.update(pd.DataFrame({'items': [['bread', 'beer']]}))
+
+    assert alg.run_constraints == {'representation': 'bitset'}
+
+
+@pytest.mark.parametrize('miner', [Eclat, FPGrowth])
+@pytest.mark.parametrize('mode', ['closed', 'maximal'])
+def test_itemsets_update_refuses_condensed_modes(miner, mode):
+    alg = miner(pd.DataFrame({'items': TRANSACTIONS}), 'items')
+    alg.run(min_support=0.4, mode=mode)
+
+    with pytest.raises(RuntimeError, match='constraints'):
+        alg.update(pd.DataFrame({'items': [['bread', 'beer']]}))
+
+
+def test_itemsets_update_refuses_closed_miner():
+    alg = LCM(pd.DataFrame({'items': TRANSACTIONS}), 'items')
+    alg.run(min_support=0.4)
+
+    with pytest.raises(ValueError, match='LCM does not support'):
+        alg.update(pd.DataFrame({'items': [['bread', 'beer']]}))
+
+
+@pytest.mark.parametrize('miner, min_support, encode', [
+    (CloSpan, 0.5, list), (RuleGrowth, 0.5, list),
+    (prefixspangap.PrefixSpan, 0.5, _to_symbols), (CloSPEC, {'min_support': 0.5}, _to_symbols),
+])
+def test_sequences_update_refuses_unsupported_miner(miner, min_support, encode):
+    alg = miner(pd.DataFrame({'items': encode(SEQUENCES)}), 'items')
+    alg.run(min_support)
+
+    with pytest.raises(ValueError, match='does not support'):
+        alg.update(pd.DataFrame({'items': encode([[('a',), ('b',)]])}))
@@ -0,0 +1,54 @@
+"""
+Brute-force replay checks of the guarantee of LossyCounting on random logs.
+"""
+from math import ceil
+import random
+
+import pytest
+
+from pml.sequential_pattern_mining.LossyCounting.lossy_counting import LossyCounting
+from pml.utils.oracle import reference_sequences
+
+
+def _random_log(rng, n_events=200, n_items=4):
+    """
+    Events of overlapping sessions, at increasing timestamps.
+    """
+    log, t = [], 0
+    for _ in range(n_events):
+        t += rng.randint(0, 2)
+        log.append((rng.randint(0, 5), t, rng.sample('abcdefg'[:n_items], rng.randint(1, 2))))
+    return log
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('min_support', [0.3, 0.6])
+def test_no_frequent_pattern_missed(seed, min_support):
+    rng = random.Random(seed)
+    alg = LossyCounting(window=30, session_timeout=3, epsilon=0.2, max_size=3)
+
+    def check(alg):
+        alg.run(min_support)
+        n = alg.n_sequences
+        if n == 0:
+            return
+        window = reference_sequences(list(alg.sequences), 1)
+        for pattern, count in window.items():
+            if sum(map(len, pattern)) > alg.max_size:
+                continue
+            if count >= min_support * n and count > alg.max_missed():
+                assert pattern in alg.frequent_patterns, (pattern, count, n)
+        for pattern, support in alg.frequent_patterns.items():
+            assert support <= window[pattern] / n + 1e-9
+
+    alg.replay(_random_log(rng), every=10, callback=check)
+    check(alg)
+
+
+def test_update_refused():
+    alg = LossyCounting(window=30, session_timeout=3)
+    alg.replay(_random_log(random.Random(0)))
+    alg.run(0.3)
+
+    with pytest.raises(ValueError, match='does not support'):
+        alg.update([])
@@ -0,0 +1,85 @@
+"""
+Property-based checks of the miners against the brute-force references of
+pml.utils.oracle, on seeded random databases.
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from pml.sequential_pattern_mining.PrefixSpan.prefixspan import PrefixSpan
+from pml.sequential_pattern_mining.RuleGrowth.rulegrowth import RuleGrowth
+from pml.utils.oracle import CASES, check_case, random_sequences, reference_rules, reference_sequential_rules
+
+
+# Known failures, as {case name: reason}
+KNOWN_FAILURES = {
+    'GSP': 'IndexError on elements of several items',
+    'AprioriAll': 'misses the patterns of several items in one element',
+}
+
+SEEDS = [0, 1]
+
+
+def _params():
+    params = []
+    for case in CASES:
+        marks = []
+        if case[0] in KNOWN_FAILURES:
+            marks.append(pytest.mark.xfail(reason=KNOWN_FAILURES[case[0]]))
+        for seed in SEEDS:
+            params.append(pytest.param(case, seed, id=f'{case[0]}-{seed}', marks=marks))
+    return params
+
+
+@pytest.mark.parametrize('case, seed', _params())
+def test_matches_reference(case, seed):
+    counterexample = check_case(case, n_trials=50, seed=seed)
+    if counterexample is not None:
+        data, min_count, differences = counterexample
+        differences = {key: value for key, value in differences.items() if value}
+        pytest.fail(f'{case[0]} differs from the reference on {data} with min_count={min_count}: {differences}')
+
+
+def _random_rule_cases(seed, n_trials=30):
+    """
+    Random sequence databases, with a minimum count and a minimum confidence.
+    """
+    rng = random.Random(seed)
+    for _ in range(n_trials):
+        data = random_sequences(rng, 8, 5, 3, 4)
+        yield data, rng.randint(1, len(data)), rng.choice([0.0, 0.5, 0.8])
+
+
+def _rules(rules, n):
+    return {
+        (rule.antecedent, rule.consequent): (int(round(rule.support * n)), rule.confidence)
+        for rule in rules.itertuples()
+    }
+
+
+def _assert_same_rules(found, expected, data):
+    assert found.keys() == expected.keys(), data
+    for rule, (count, confidence) in expected.items():
+        assert found[rule] == (count, pytest.approx(confidence)), (data, rule)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_rulegrowth_matches_reference(seed):
+    for data, min_count, min_confidence in _random_rule_cases(seed):
+        alg = RuleGrowth(pd.DataFrame({'items': data}), 'items')
+        alg.run(min_support=min_count / len(data), min_confidence=min_confidence)
+        found = {
+            rule: (int(round(support * len(data))), alg.confidences[rule])
+            for rule, support in alg.frequent_patterns.items()
+        }
+        _assert_same_rules(found, reference_rules(data, min_count, min_confidence), data)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_sequential_rules_match_reference(seed):
+    for data, min_count, min_confidence in _random_rule_cases(seed):
+        alg = PrefixSpan(pd.DataFrame({'items': data}), 'items')
+        alg.run(min_support=min_count / len(data))
+        found = _rules(alg.sequential_rules(min_confidence), len(data)) if alg.frequent_patterns else {}
+        _assert_same_rules(found, reference_sequential_rules(data, min_count, min_confidence), data)
@@ -0,0 +1,41 @@
+"""
+Checks of the miners built from an encoded store.
+"""
+import pandas as pd
+import pytest
+
+from pml.pattern_mining.eclat import Eclat
+
+
+DATA = pd.DataFrame({
+    'items': [
+        ['bread', 'milk'], ['bread', 'diaper', 'beer', 'egg'], ['milk', 'diaper', 'beer', 'coke'],
+        ['bread', 'milk', 'diaper', 'beer'], ['bread', 'milk', 'diaper', 'coke'],
+    ]
+})
+
+
+@pytest.mark.parametrize('mode, representation', [
+    ('all', 'tidset'), ('all', 'bitset'), ('all', 'diffset'), ('closed', 'tidset'), ('maximal', 'tidset'),
+])
+def test_eclat_from_store_matches_memory(tmp_path, mode, representation):
+    expected = Eclat(DATA, 'items')
+    expected.run(min_support=0.4, mode=mode, representation=representation)
+
+    alg = Eclat.from_store(Eclat(DATA, 'items').save_encoded(tmp_path).path)
+    assert alg.TID_lists is None
+    alg.run(min_support=0.4, mode=mode, representation=representation)
+
+    assert alg.get_results() == expected.get_results()
+
+
+def test_eclat_from_store_update(tmp_path):
+    new_data = pd.DataFrame({'items': [['beer', 'coke'], ['bread', 'beer']]})
+    expected = Eclat(pd.concat([DATA, new_data], ignore_index=True), 'items')
+    expected.run(min_support=0.4)
+
+    alg = Eclat.from_store(Eclat(DATA, 'items').save_encoded(tmp_path).path)
+    alg.run(min_support=0.4)
+    alg.update(new_data)
+
+    assert alg.get_results() == expected.get_results()